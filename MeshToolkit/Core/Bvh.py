@@ -0,0 +1,433 @@
+# -*- coding:utf-8 -*-
+
+#
+# Provide a bounding volume hierarchy over the faces of a mesh
+# for batched spatial queries (closest point on the mesh, ray casting)
+#
+
+# The tree is stored in flat numpy arrays (node bounding boxes, first child, face ranges),
+# and built level by level by splitting the faces sorted along a Morton curve at the spatial median
+# given by the highest differing bit of their Morton codes (median face if the codes are identical).
+# The queries traverse the tree for a whole batch of points or rays at once.
+# Besides its box, every node has a bounding cylinder along the average normal of its faces,
+# which gives a much tighter lower bound of the distance to the curved surfaces seen from afar.
+
+# External dependencies
+import numpy as np
+
+# Bounding volume hierarchy of the faces of a mesh
+class Bvh( object ) :
+
+	# Initialisation
+	def __init__( self, mesh, leaf_size = 8 ) :
+		# Register the mesh geometry
+		self.vertices = np.asarray( mesh.vertices, dtype=np.float64 )
+		self.faces = np.asarray( mesh.faces )
+		# Maximum number of faces in a leaf
+		self.leaf_size = leaf_size
+		# Build the tree
+		self.Build()
+
+	# Build the tree
+	def Build( self ) :
+		# Create an indexed view of the triangles
+		tris = self.vertices[ self.faces ]
+		# Sort the faces along a Morton curve of their centroid
+		codes = GetMortonCodes( tris.mean( axis=1 ) )
+		self.face_index = np.argsort( codes, kind='stable' )
+		codes = codes[ self.face_index ]
+		# Node face ranges (first sorted face and face number) for each level
+		# The root node contains every face
+		level_start = [ np.zeros( 1, dtype=np.intp ) ]
+		level_count = [ np.array( [ len( self.faces ) ], dtype=np.intp ) ]
+		# Index of the first child of each node (-1 for a leaf), the second child follows the first one
+		level_child = []
+		# Number of nodes already created
+		node_number = 1
+		# Split the nodes level by level
+		while True :
+			# Nodes to split
+			split = level_count[-1] > self.leaf_size
+			# Register the children of every node
+			child = np.full( len( split ), -1, dtype=np.intp )
+			child[ split ] = node_number + 2 * np.arange( split.sum() )
+			level_child.append( child )
+			# No more node to split
+			if not split.any() : break
+			node_number += 2 * split.sum()
+			# Face ranges of the nodes to split
+			start = level_start[-1][ split ]
+			count = level_count[-1][ split ]
+			# Split the faces where the highest differing bit of their Morton codes changes
+			first_code = codes[ start ]
+			difference = first_code ^ codes[ start + count - 1 ]
+			bit = ( np.frexp( difference.astype( np.float64 ) )[1] - 1 ).clip( 0 ).astype( np.uint64 )
+			middle = np.searchsorted( codes, ( ( first_code >> bit ) | np.uint64( 1 ) ) << bit )
+			# Split the faces at the median if their codes are identical
+			middle[ difference == 0 ] = ( start + count // 2 )[ difference == 0 ]
+			# Create the children
+			level_start.append( np.dstack( ( start, middle ) ).reshape( -1 ) )
+			level_count.append( np.dstack( ( middle - start, start + count - middle ) ).reshape( -1 ) )
+		# Store the triangles in the sorted face order, so that the faces of a leaf are contiguous
+		self.triangles = tris[ self.face_index ]
+		# Bounding discs of the sorted faces (centroid, unit normal, and farthest vertex), to discard the faces cheaply
+		self.face_center = self.triangles.mean( axis=1 )
+		self.face_area_normal = np.cross( self.triangles[:,1] - self.triangles[:,0], self.triangles[:,2] - self.triangles[:,0] )
+		self.face_normal = Normalize( self.face_area_normal )
+		self.face_radius = np.sqrt( SquaredNorm( ( self.triangles - self.face_center[ :, np.newaxis ] ).reshape( -1, 3 ) ).reshape( -1, 3 ).max( axis=1 ) )
+		# Tree depth (number of levels below the root)
+		self.depth = len( level_child ) - 1
+		# Flatten the node arrays
+		self.node_start = np.concatenate( level_start )
+		self.node_count = np.concatenate( level_count )
+		self.node_child = np.concatenate( level_child )
+		# Compute the leaf bounding boxes (the leaves cover the sorted faces without overlap)
+		self.node_min = np.zeros( ( len( self.node_start ), 3 ) )
+		self.node_max = np.zeros( ( len( self.node_start ), 3 ) )
+		leaves = np.flatnonzero( self.node_child < 0 )
+		leaves = leaves[ np.argsort( self.node_start[ leaves ] ) ]
+		if len( self.faces ) :
+			self.node_min[ leaves ] = np.minimum.reduceat( tris.min( axis=1 )[ self.face_index ], self.node_start[ leaves ] )
+			self.node_max[ leaves ] = np.maximum.reduceat( tris.max( axis=1 )[ self.face_index ], self.node_start[ leaves ] )
+		# Compute the leaf bounding cylinders from their faces (axis along the average normal of the faces)
+		self.node_center = np.zeros( ( len( self.node_start ), 3 ) )
+		self.node_axis = np.zeros( ( len( self.node_start ), 3 ) )
+		self.node_radius = np.zeros( len( self.node_start ) )
+		self.node_thickness = np.zeros( len( self.node_start ) )
+		area_normals = np.zeros( ( len( self.node_start ), 3 ) )
+		if len( self.faces ) :
+			( first, owner ) = ( self.node_start[ leaves ], np.repeat( np.arange( len( leaves ) ), self.node_count[ leaves ] ) )
+			self.node_center[ leaves ] = np.add.reduceat( self.face_center, first ) / self.node_count[ leaves ][ :, np.newaxis ]
+			area_normals[ leaves ] = np.add.reduceat( self.face_area_normal, first )
+			self.node_axis[ leaves ] = Normalize( area_normals[ leaves ] )
+			# Height and squared lateral distance of the face vertices
+			( vertices, axis ) = ( self.triangles - self.node_center[ leaves ][ owner, np.newaxis ], self.node_axis[ leaves ][ owner, np.newaxis ] )
+			height = ( vertices * axis ).sum( axis=2 )
+			lateral = ( ( vertices - height[ :, :, np.newaxis ] * axis ) ** 2 ).sum( axis=2 )
+			# Cylinder half-thickness and radius (the farthest vertices)
+			self.node_thickness[ leaves ] = np.maximum.reduceat( np.abs( height ).max( axis=1 ), first )
+			self.node_radius[ leaves ] = np.sqrt( np.maximum.reduceat( lateral.max( axis=1 ), first ) )
+		# Compute the parent bounding boxes and cylinders, from the deepest level to the root
+		level_first = np.cumsum( [ 0 ] + [ len( c ) for c in level_child ] )
+		for i in reversed( range( len( level_child ) ) ) :
+			parents = np.arange( level_first[i], level_first[i+1] )
+			parents = parents[ self.node_child[ parents ] >= 0 ]
+			children = self.node_child[ parents ]
+			self.node_min[ parents ] = np.minimum( self.node_min[ children ], self.node_min[ children + 1 ] )
+			self.node_max[ parents ] = np.maximum( self.node_max[ children ], self.node_max[ children + 1 ] )
+			# The parent cylinder is centered on the face centroids, along the average normal, and contains the child cylinders
+			count = self.node_count[ children ][ :, np.newaxis ]
+			count_next = self.node_count[ children + 1 ][ :, np.newaxis ]
+			center = ( self.node_center[ children ] * count + self.node_center[ children + 1 ] * count_next ) / ( count + count_next )
+			area_normals[ parents ] = area_normals[ children ] + area_normals[ children + 1 ]
+			axis = Normalize( area_normals[ parents ] )
+			( height, lateral ) = np.maximum( self.GetCylinderExtent( children, center, axis ), self.GetCylinderExtent( children + 1, center, axis ) )
+			( self.node_center[ parents ], self.node_axis[ parents ], self.node_thickness[ parents ], self.node_radius[ parents ] ) = ( center, axis, height, lateral )
+
+	# Bound the height and the lateral distance of the cylinders of the given nodes
+	# in the frame of other cylinders (center and axis)
+	def GetCylinderExtent( self, nodes, center, axis ) :
+		# Position of the node cylinder centers
+		vectors = self.node_center[ nodes ] - center
+		height = Dot( vectors, axis )
+		lateral = np.sqrt( SquaredNorm( vectors - height[ :, np.newaxis ] * axis ) )
+		# Extent of the node cylinders, depending on their axis angle
+		cosine = np.minimum( np.abs( Dot( self.node_axis[ nodes ], axis ) ), 1 )
+		sine = np.sqrt( 1 - cosine ** 2 )
+		( radius, thickness ) = ( self.node_radius[ nodes ], self.node_thickness[ nodes ] )
+		return ( np.abs( height ) + thickness * cosine + radius * sine, lateral + thickness * sine + radius )
+
+	# Squared distance between points and the given nodes (the largest of the box and cylinder distances)
+	def NodeDistance( self, points, nodes ) :
+		return np.maximum( BoxDistance( points, self.node_min[ nodes ], self.node_max[ nodes ] ),
+			CylinderDistance( points, self.node_center[ nodes ], self.node_axis[ nodes ], self.node_radius[ nodes ], self.node_thickness[ nodes ] ) )
+
+	# Get the faces contained in a set of leaves
+	# Return the index of the leaf owning each face, and the face positions in the sorted face order
+	def GetLeafFaces( self, leaves ) :
+		# Face number of each leaf
+		count = self.node_count[ leaves ]
+		# Repeat each leaf for each of its faces
+		owner = np.repeat( np.arange( len( leaves ) ), count )
+		# Position of each face in its leaf
+		position = np.arange( len( owner ) ) - np.repeat( np.cumsum( count ) - count, count )
+		# Return the leaf owner and the face indices
+		return ( owner, self.node_start[ leaves ][ owner ] + position )
+
+	# Find the closest point on the mesh of every given point
+	# Return the closest face index, the barycentric coordinates of the closest point in this face, and the distance
+	def ClosestPoint( self, points, chunk_size = 10000 ) :
+		# Initialisation
+		points = np.asarray( points, dtype=np.float64 ).reshape( -1, 3 )
+		faces = np.full( len( points ), -1, dtype=np.intp )
+		barycentrics = np.zeros( ( len( points ), 3 ) )
+		distances = np.full( len( points ), np.inf )
+		# Process the points by chunks
+		for i in range( 0, len( points ), chunk_size ) :
+			( faces[ i : i + chunk_size ], barycentrics[ i : i + chunk_size ], distances[ i : i + chunk_size ] ) = \
+				self.ClosestPointChunk( points[ i : i + chunk_size ] )
+		# Return the closest points
+		return ( faces, barycentrics, distances )
+
+	# Find the closest point on the mesh of a chunk of points
+	# Every point first descends to its closest leaf, whose faces give a tight bound of the closest distance,
+	# then the tree is traversed level by level, keeping only the nodes closer than the closest face found so far
+	def ClosestPointChunk( self, points ) :
+		# Initialisation
+		query_number = len( points )
+		faces = np.full( query_number, -1, dtype=np.intp )
+		barycentrics = np.zeros( ( query_number, 3 ) )
+		best = np.full( query_number, np.inf )
+		if not len( self.faces ) : return ( faces, barycentrics, best )
+		# Descend the tree to the closest child of every node, until a leaf is reached
+		queries = np.arange( query_number )
+		nodes = np.zeros( query_number, dtype=np.intp )
+		for i in range( self.depth ) :
+			inner = self.node_child[ nodes ] >= 0
+			( q, left ) = ( queries[ inner ], self.node_child[ nodes[ inner ] ] )
+			nodes[ inner ] = left + ( self.NodeDistance( points[ q ], left + 1 ) < self.NodeDistance( points[ q ], left ) )
+		# Initialise the closest faces with the faces of these leaves
+		self.UpdateClosestFaces( points, queries, nodes, faces, barycentrics, best )
+		# Traverse the tree from the root with the whole batch of points
+		nodes = np.zeros( query_number, dtype=np.intp )
+		while len( queries ) :
+			# Discard the nodes farther than the closest face found so far
+			keep = self.NodeDistance( points[ queries ], nodes ) < best[ queries ]
+			( queries, nodes ) = ( queries[ keep ], nodes[ keep ] )
+			# Process the faces of the leaves
+			leaf = self.node_child[ nodes ] < 0
+			self.UpdateClosestFaces( points, queries[ leaf ], nodes[ leaf ], faces, barycentrics, best )
+			# Visit the children of the inner nodes
+			( queries, nodes ) = ( queries[ ~leaf ], self.node_child[ nodes[ ~leaf ] ] )
+			( queries, nodes ) = ( np.repeat( queries, 2 ), ( nodes.reshape( -1, 1 ) + [ 0, 1 ] ).reshape( -1 ) )
+		# Return the closest faces, barycentric coordinates and distances
+		return ( faces, barycentrics, np.sqrt( best ) )
+
+	# Test the faces of the given leaves against the given points
+	# and update the closest faces found so far (squared distances)
+	def UpdateClosestFaces( self, points, queries, leaves, faces, barycentrics, best, pair_number = 2 ** 20 ) :
+		# Limit the number of point-face pairs processed at once
+		if self.node_count[ leaves ].sum() > pair_number :
+			pieces = np.searchsorted( np.cumsum( self.node_count[ leaves ] ), np.arange( pair_number, self.node_count[ leaves ].sum(), pair_number ) )
+			for ( q, l ) in zip( np.split( queries, pieces ), np.split( leaves, pieces ) ) :
+				self.UpdateClosestFaces( points, q, l, faces, barycentrics, best, pair_number )
+			return
+		# Get the faces of the leaves
+		( owner, sorted_faces ) = self.GetLeafFaces( leaves )
+		queries = queries[ owner ]
+		# Discard the faces whose bounding disc is farther than the closest face found so far
+		keep = CylinderDistance( points[ queries ], self.face_center[ sorted_faces ], self.face_normal[ sorted_faces ], self.face_radius[ sorted_faces ], 0 ) < best[ queries ]
+		( queries, sorted_faces ) = ( queries[ keep ], sorted_faces[ keep ] )
+		# Compute the closest point on each face
+		tris = self.triangles[ sorted_faces ]
+		bary = ClosestPointOnTriangle( points[ queries ], tris[:,0], tris[:,1], tris[:,2] )
+		distance = SquaredNorm( np.einsum( 'ij,ijk->ik', bary, tris ) - points[ queries ] )
+		# Keep the closest faces
+		np.minimum.at( best, queries, distance )
+		closest = distance == best[ queries ]
+		faces[ queries[ closest ] ] = self.face_index[ sorted_faces[ closest ] ]
+		barycentrics[ queries[ closest ] ] = bary[ closest ]
+
+	# Find the first face hit by every given ray (origin and direction)
+	# The hits are searched between the distances min_distance and max_distance along the rays
+	# Return the hit face index (-1 if none), the hit distance (infinite if none), and the barycentric coordinates of the hit point
+	def CastRays( self, origins, directions, min_distance = 0.0, max_distance = np.inf, chunk_size = 100000 ) :
+		# Initialisation
+		origins = np.asarray( origins, dtype=np.float64 ).reshape( -1, 3 )
+		directions = np.asarray( directions, dtype=np.float64 ).reshape( -1, 3 )
+		faces = np.full( len( origins ), -1, dtype=np.intp )
+		distances = np.full( len( origins ), np.inf )
+		barycentrics = np.zeros( ( len( origins ), 3 ) )
+		# Process the rays by chunks
+		for i in range( 0, len( origins ), chunk_size ) :
+			( faces[ i : i + chunk_size ], distances[ i : i + chunk_size ], barycentrics[ i : i + chunk_size ] ) = \
+				self.CastRaysChunk( origins[ i : i + chunk_size ], directions[ i : i + chunk_size ], min_distance, max_distance )
+		# Return the first hits
+		return ( faces, distances, barycentrics )
+
+	# Find the first face hit by a chunk of rays
+	def CastRaysChunk( self, origins, directions, min_distance, max_distance ) :
+		# Initialisation
+		ray_number = len( origins )
+		faces = np.full( ray_number, -1, dtype=np.intp )
+		barycentrics = np.zeros( ( ray_number, 3 ) )
+		best = np.full( ray_number, float( max_distance ) )
+		if not len( self.faces ) : return ( faces, np.full( ray_number, np.inf ), barycentrics )
+		# Inverse ray directions for the box slab tests
+		with np.errstate( divide='ignore' ) :
+			inverse_directions = 1.0 / directions
+		# Traverse the tree from the root with the whole packet of rays
+		rays = np.arange( ray_number )
+		nodes = np.zeros( ray_number, dtype=np.intp )
+		while len( rays ) :
+			# Distance range of the rays inside the node boxes
+			( near, far ) = BoxRayRange( origins[ rays ], inverse_directions[ rays ], self.node_min[ nodes ], self.node_max[ nodes ] )
+			# Discard the nodes missed by the rays, or farther than the first hit found so far
+			keep = ( near <= far ) & ( far >= min_distance ) & ( near <= best[ rays ] )
+			( rays, nodes ) = ( rays[ keep ], nodes[ keep ] )
+			# Process the faces of the leaves
+			leaf = self.node_child[ nodes ] < 0
+			self.UpdateHitFaces( origins, directions, rays[ leaf ], nodes[ leaf ], min_distance, faces, barycentrics, best )
+			# Visit the children of the inner nodes
+			( rays, nodes ) = ( rays[ ~leaf ], self.node_child[ nodes[ ~leaf ] ] )
+			( rays, nodes ) = ( np.repeat( rays, 2 ), ( nodes.reshape( -1, 1 ) + [ 0, 1 ] ).reshape( -1 ) )
+		# Set the distance of the rays without hit to infinity
+		best[ faces < 0 ] = np.inf
+		# Return the hit faces, distances and barycentric coordinates
+		return ( faces, best, barycentrics )
+
+	# Test the faces of the given leaves against the given rays
+	# and update the first hits found so far
+	def UpdateHitFaces( self, origins, directions, rays, leaves, min_distance, faces, barycentrics, best, pair_number = 2 ** 20 ) :
+		# Limit the number of ray-face pairs processed at once
+		if self.node_count[ leaves ].sum() > pair_number :
+			pieces = np.searchsorted( np.cumsum( self.node_count[ leaves ] ), np.arange( pair_number, self.node_count[ leaves ].sum(), pair_number ) )
+			for ( r, l ) in zip( np.split( rays, pieces ), np.split( leaves, pieces ) ) :
+				self.UpdateHitFaces( origins, directions, r, l, min_distance, faces, barycentrics, best, pair_number )
+			return
+		# Get the faces of the leaves
+		( owner, sorted_faces ) = self.GetLeafFaces( leaves )
+		( rays, face_index ) = ( rays[ owner ], self.face_index[ sorted_faces ] )
+		# Intersect the rays with the faces
+		tris = self.triangles[ sorted_faces ]
+		( distance, u, v ) = RayTriangleIntersection( origins[ rays ], directions[ rays ], tris[:,0], tris[:,1], tris[:,2] )
+		# Keep the valid hits closer than the first hits found so far
+		hit = ( distance >= min_distance ) & ( distance < best[ rays ] )
+		( rays, face_index, distance, u, v ) = ( rays[ hit ], face_index[ hit ], distance[ hit ], u[ hit ], v[ hit ] )
+		np.minimum.at( best, rays, distance )
+		first = distance == best[ rays ]
+		faces[ rays[ first ] ] = face_index[ first ]
+		barycentrics[ rays[ first ] ] = np.array( [ 1.0 - u - v, u, v ] ).T[ first ]
+
+	# Get the positions of points given by their face and barycentric coordinates
+	def GetPoints( self, faces, barycentrics ) :
+		return np.einsum( 'ij,ijk->ik', barycentrics, self.vertices[ self.faces[ faces ] ] )
+
+# Squared distance between points and axis-aligned boxes
+def BoxDistance( points, box_min, box_max ) :
+	return SquaredNorm( np.maximum( np.maximum( box_min - points, points - box_max ), 0 ) )
+
+# Squared distance between points and cylinders (center, unit axis or null vector for a sphere, radius, and half-thickness)
+def CylinderDistance( points, center, axis, radius, thickness ) :
+	# Height along the axis, and lateral distance to the axis
+	vectors = points - center
+	height = Dot( vectors, axis )
+	lateral = np.sqrt( SquaredNorm( vectors - height[ :, np.newaxis ] * axis ) )
+	# Distance to the cylinder
+	return np.maximum( np.abs( height ) - thickness, 0 ) ** 2 + np.maximum( lateral - radius, 0 ) ** 2
+
+# Distance range of rays (origin and inverse direction) inside axis-aligned boxes (slab test)
+def BoxRayRange( origins, inverse_directions, box_min, box_max ) :
+	# Distances to the box planes on each axis
+	with np.errstate( invalid='ignore' ) :
+		t1 = ( box_min - origins ) * inverse_directions
+		t2 = ( box_max - origins ) * inverse_directions
+	# Intersect the slab ranges (undefined values of rays parallel to a plane are ignored)
+	near = np.fmax( np.fmax( np.fmin( t1[:,0], t2[:,0] ), np.fmin( t1[:,1], t2[:,1] ) ), np.fmin( t1[:,2], t2[:,2] ) )
+	far = np.fmin( np.fmin( np.fmax( t1[:,0], t2[:,0] ), np.fmax( t1[:,1], t2[:,1] ) ), np.fmax( t1[:,2], t2[:,2] ) )
+	return ( near, far )
+
+# Squared norm of an array of vectors
+def SquaredNorm( vectors ) :
+	return np.einsum( 'ij,ij->i', vectors, vectors )
+
+# Normalize an array of vectors (the null vectors are left unchanged)
+def Normalize( vectors ) :
+	norms = np.sqrt( SquaredNorm( vectors ) )
+	return vectors / np.where( norms > 0, norms, 1 )[ :, np.newaxis ]
+
+# Dot product of two arrays of vectors
+def Dot( u, v ) :
+	return np.einsum( 'ij,ij->i', u, v )
+
+# Compute 30-bit Morton codes of 3D points (10 bits per axis)
+def GetMortonCodes( points ) :
+	# Quantize the point coordinates in their bounding box
+	if not len( points ) : return np.zeros( 0, dtype=np.uint64 )
+	pmin = points.min( axis=0 )
+	extent = np.maximum( points.max( axis=0 ) - pmin, 1e-30 )
+	cells = np.clip( ( points - pmin ) / extent * 1024, 0, 1023 ).astype( np.uint64 )
+	# Interleave the bits of the coordinates
+	cells = ( cells | ( cells << np.uint64( 16 ) ) ) & np.uint64( 0x030000FF )
+	cells = ( cells | ( cells << np.uint64( 8 ) ) ) & np.uint64( 0x0300F00F )
+	cells = ( cells | ( cells << np.uint64( 4 ) ) ) & np.uint64( 0x030C30C3 )
+	cells = ( cells | ( cells << np.uint64( 2 ) ) ) & np.uint64( 0x09249249 )
+	return ( cells[:,0] << np.uint64( 2 ) ) | ( cells[:,1] << np.uint64( 1 ) ) | cells[:,2]
+
+# Compute the barycentric coordinates of the closest point of every triangle (a, b, c) to every point p
+# Based on :
+#   Real-Time Collision Detection
+#     Christer Ericson, Morgan Kaufmann, 2005, section 5.1.5
+def ClosestPointOnTriangle( p, a, b, c ) :
+	# Initialisation
+	ab = b - a
+	ac = c - a
+	ap = p - a
+	bp = p - b
+	cp = p - c
+	d1 = Dot( ab, ap )
+	d2 = Dot( ac, ap )
+	d3 = Dot( ab, bp )
+	d4 = Dot( ac, bp )
+	d5 = Dot( ab, cp )
+	d6 = Dot( ac, cp )
+	va = d3 * d6 - d5 * d4
+	vb = d5 * d2 - d1 * d6
+	vc = d1 * d4 - d3 * d2
+	bary = np.empty( ( len( p ), 3 ) )
+	with np.errstate( divide='ignore', invalid='ignore' ) :
+		# Projection inside the face (lowest priority, overwritten by the other regions)
+		v = vb / ( va + vb + vc )
+		w = vc / ( va + vb + vc )
+		bary[:] = np.array( [ 1.0 - v - w, v, w ] ).T
+		# Edge BC region
+		region = ( va <= 0 ) & ( d4 - d3 >= 0 ) & ( d5 - d6 >= 0 )
+		w = ( d4 - d3 ) / ( ( d4 - d3 ) + ( d5 - d6 ) )
+		bary[ region ] = np.array( [ np.zeros( len( p ) ), 1.0 - w, w ] ).T[ region ]
+		# Edge AC region
+		region = ( vb <= 0 ) & ( d2 >= 0 ) & ( d6 <= 0 )
+		w = d2 / ( d2 - d6 )
+		bary[ region ] = np.array( [ 1.0 - w, np.zeros( len( p ) ), w ] ).T[ region ]
+	# Vertex C region
+	bary[ ( d6 >= 0 ) & ( d5 <= d6 ) ] = [ 0, 0, 1 ]
+	with np.errstate( divide='ignore', invalid='ignore' ) :
+		# Edge AB region
+		region = ( vc <= 0 ) & ( d1 >= 0 ) & ( d3 <= 0 )
+		v = d1 / ( d1 - d3 )
+		bary[ region ] = np.array( [ 1.0 - v, v, np.zeros( len( p ) ) ] ).T[ region ]
+	# Vertex B region
+	bary[ ( d3 >= 0 ) & ( d4 <= d3 ) ] = [ 0, 1, 0 ]
+	# Vertex A region
+	bary[ ( d1 <= 0 ) & ( d2 <= 0 ) ] = [ 1, 0, 0 ]
+	# Degenerated triangles, use the first vertex
+	bary[ ~np.isfinite( bary ).all( axis=1 ) ] = [ 1, 0, 0 ]
+	# Return the barycentric coordinates
+	return bary
+
+# Compute the intersection of every ray (origin o, direction d) with every triangle (a, b, c)
+# Return the distance along the ray (infinite if there is no hit), and the barycentric coordinates (u, v) of the hit point
+# Based on :
+#   Fast, minimum storage ray/triangle intersection
+#     Tomas Möller and Ben Trumbore, Journal of Graphics Tools, 2(1), 21-28, 1997
+def RayTriangleIntersection( o, d, a, b, c, epsilon = 1e-9 ) :
+	# Initialisation
+	e1 = b - a
+	e2 = c - a
+	p = np.cross( d, e2 )
+	det = Dot( e1, p )
+	with np.errstate( divide='ignore', invalid='ignore' ) :
+		inverse_det = 1.0 / det
+		# First barycentric coordinate
+		t = o - a
+		u = Dot( t, p ) * inverse_det
+		# Second barycentric coordinate
+		q = np.cross( t, e1 )
+		v = Dot( d, q ) * inverse_det
+		# Distance along the ray
+		distance = Dot( e2, q ) * inverse_det
+	# Discard the rays parallel to the triangles, or outside the triangles
+	# (with a small tolerance to avoid missing the hits on the shared edges and vertices)
+	outside = ~( u >= -epsilon ) | ~( v >= -epsilon ) | ~( u + v <= 1 + epsilon )
+	distance[ ( det == 0 ) | outside | ~np.isfinite( distance ) ] = np.inf
+	# Return the hit distance and barycentric coordinates
+	return ( distance, u, v )
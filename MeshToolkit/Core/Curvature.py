@@ -12,6 +12,7 @@
 # External dependencies
 import math
 import numpy as np
+import MeshToolkit as mtk
 
 # Compute the normal curvature vectors of a given mesh
 def GetNormalCurvatureReference( mesh ) :
@@ -159,6 +160,93 @@ def GetGaussianCurvatureReference( mesh ) :
 	gaussian_curvature[ mesh.GetBorderVertices() ] = 0.0
 	return gaussian_curvature
 
+# Compute the principal curvatures and directions of every vertex
+# The curvatures are positive on convex surfaces with outward normals (1/r on a sphere of radius r)
+# Return the maximum and minimum curvatures, and their directions
+# Based on :
+#   Estimating Curvatures and Their Derivatives on Triangle Meshes
+#     Szymon Rusinkiewicz, 3DPVT 2004
+def GetPrincipalCurvatures( mesh ) :
+	# Initialisation
+	if mesh.vertex_normal_number != mesh.vertex_number : mesh.UpdateNormals()
+	faces = mesh.faces
+	tris = mesh.vertices[ faces ]
+	normals = mesh.vertex_normals[ faces ]
+	# Edge vectors and normal variations opposite to each face vertex
+	edges = tris[ :, [ 2, 0, 1 ] ] - tris[ :, [ 1, 2, 0 ] ]
+	dnormals = normals[ :, [ 2, 0, 1 ] ] - normals[ :, [ 1, 2, 0 ] ]
+	# Orthonormal frame of each face
+	face_normals = np.cross( edges[:,0], edges[:,1] )
+	double_areas = np.sqrt( ( face_normals ** 2 ).sum( axis=1 ) )
+	with np.errstate( divide='ignore', invalid='ignore' ) :
+		face_normals /= double_areas.reshape( -1, 1 )
+		face_u = edges[:,2] / np.sqrt( ( edges[:,2] ** 2 ).sum( axis=1 ) ).reshape( -1, 1 )
+	face_v = np.cross( face_normals, face_u )
+	# Least-square fit of the second fundamental form [ [e, f], [f, g] ] of each face
+	#   [ e f ; f g ] [ edge.u ; edge.v ] = [ dnormal.u ; dnormal.v ]
+	( eu, ev ) = ( ( edges * face_u.reshape( -1, 1, 3 ) ).sum( axis=2 ), ( edges * face_v.reshape( -1, 1, 3 ) ).sum( axis=2 ) )
+	( nu, nv ) = ( ( dnormals * face_u.reshape( -1, 1, 3 ) ).sum( axis=2 ), ( dnormals * face_v.reshape( -1, 1, 3 ) ).sum( axis=2 ) )
+	matrices = np.empty( ( len( faces ), 3, 3 ) )
+	matrices[:,0,0] = ( eu * eu ).sum( axis=1 )
+	matrices[:,0,1] = matrices[:,1,0] = ( eu * ev ).sum( axis=1 )
+	matrices[:,1,1] = ( eu * eu + ev * ev ).sum( axis=1 )
+	matrices[:,1,2] = matrices[:,2,1] = ( eu * ev ).sum( axis=1 )
+	matrices[:,2,2] = ( ev * ev ).sum( axis=1 )
+	matrices[:,0,2] = matrices[:,2,0] = 0
+	vectors = np.vstack( ( ( nu * eu ).sum( axis=1 ), ( nu * ev + nv * eu ).sum( axis=1 ), ( nv * ev ).sum( axis=1 ) ) ).T
+	# Skip the degenerated faces
+	valid = np.isfinite( matrices ).all( axis=( 1, 2 ) ) & ( np.abs( np.linalg.det( matrices ) ) > 1e-30 )
+	tensors = np.zeros( ( len( faces ), 3 ) )
+	tensors[ valid ] = np.linalg.solve( matrices[ valid ], vectors[ valid ].reshape( -1, 3, 1 ) ).reshape( -1, 3 )
+	weights = np.where( valid, double_areas / 6.0, 0.0 )
+	# Tangent frame of each vertex
+	( vertex_u, vertex_v ) = mtk.GetTangentFrames( mesh.vertex_normals )
+	# Accumulate the face tensors in the vertex frames
+	vertex_tensors = np.zeros( ( mesh.vertex_number, 3 ) )
+	for i in range( 3 ) :
+		# Rotate the vertex frame into the face plane
+		( u, v ) = RotateFrames( vertex_u[ faces[:,i] ], vertex_v[ faces[:,i] ], normals[:,i], face_normals )
+		# Express the face tensor in the rotated vertex frame
+		( uu, uv ) = ( mtk.Dot( u, face_u ), mtk.Dot( u, face_v ) )
+		( vu, vv ) = ( mtk.Dot( v, face_u ), mtk.Dot( v, face_v ) )
+		( e, f, g ) = ( tensors[:,0], tensors[:,1], tensors[:,2] )
+		projected = ( uu * uu * e + 2 * uu * uv * f + uv * uv * g,
+			uu * vu * e + ( uu * vv + uv * vu ) * f + uv * vv * g,
+			vu * vu * e + 2 * vu * vv * f + vv * vv * g )
+		# Weighted sum of the tensors
+		for j in range( 3 ) :
+			vertex_tensors[:,j] += np.bincount( faces[:,i], weights * np.nan_to_num( projected[j] ), minlength=mesh.vertex_number )
+	# Average the tensors
+	total_weights = np.bincount( faces.reshape( -1 ), np.repeat( weights, 3 ), minlength=mesh.vertex_number )
+	with np.errstate( divide='ignore', invalid='ignore' ) :
+		vertex_tensors /= total_weights.reshape( -1, 1 )
+	vertex_tensors[ ~np.isfinite( vertex_tensors ) ] = 0
+	# Eigen decomposition of the 2x2 symmetric tensors
+	( e, f, g ) = ( vertex_tensors[:,0], vertex_tensors[:,1], vertex_tensors[:,2] )
+	center = ( e + g ) / 2.0
+	radius = np.sqrt( ( ( e - g ) / 2.0 ) ** 2 + f ** 2 )
+	angle = np.arctan2( 2.0 * f, e - g ) / 2.0
+	maximum_direction = np.cos( angle ).reshape( -1, 1 ) * vertex_u + np.sin( angle ).reshape( -1, 1 ) * vertex_v
+	minimum_direction = np.cross( mesh.vertex_normals, maximum_direction )
+	# Return the principal curvatures and directions
+	return ( center + radius, center - radius, maximum_direction, minimum_direction )
+
+# Rotate tangent frames (u, v) of normals old_normals onto the planes orthogonal to the given normals
+def RotateFrames( u, v, old_normals, normals ) :
+	# Flip the frames with opposite normals
+	dot = mtk.Dot( old_normals, normals )
+	sign = np.where( dot <= -1, -1.0, 1.0 ).reshape( -1, 1 )
+	( u, v, old_normals ) = ( sign * u, sign * v, sign * old_normals )
+	dot *= sign[:,0]
+	# Rotation around the common axis of the normals
+	with np.errstate( divide='ignore', invalid='ignore' ) :
+		perpendicular = normals - dot.reshape( -1, 1 ) * old_normals
+		dperpendicular = ( old_normals + normals ) / ( 1 + dot ).reshape( -1, 1 )
+	u = u - dperpendicular * mtk.Dot( perpendicular, u ).reshape( -1, 1 )
+	v = v - dperpendicular * mtk.Dot( perpendicular, v ).reshape( -1, 1 )
+	# Return the rotated frames
+	return ( u, v )
+
 # Cotangent between two arrays of vectors
 def Cotangent( u, v ) :
 	return ( u * v ).sum(axis=1) / np.sqrt( ( u**2 ).sum(axis=1) * ( v**2 ).sum(axis=1) - ( u * v ).sum(axis=1) ** 2 )
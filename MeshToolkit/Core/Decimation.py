@@ -0,0 +1,307 @@
+# -*- coding:utf-8 -*-
+
+#
+# Simplify a triangular mesh by collapsing edges with quadric error metrics
+#
+
+# Based on :
+#   Surface Simplification Using Quadric Error Metrics
+#     Michael Garland, Paul S. Heckbert, SIGGRAPH '97
+
+# The edges are collapsed by rounds instead of one at a time from a heap.
+# The edges are kept sorted by collapse cost from round to round, and at each round, the edges having
+# the lowest cost in their neighborhood (ranked in this global cost order) are collapsed together.
+# The selection is repeated on the edges not touching the faces around the edges already selected.
+# These collapses do not share any face, so they are applied at once on the arrays.
+# Only the edges around the collapsed edges get a new cost, and are merged back into the sorted edges.
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# Decimate a mesh down to the given number of faces
+# At each round, only the given fraction of the lowest cost edges can be collapsed
+# The border vertices (and the vertices of non-manifold edges) are not moved
+def Decimate( mesh, target_faces, round_fraction = 0.5 ) :
+	# Initialisation
+	vertices = np.array( mesh.vertices, dtype=np.float64 )
+	faces = np.array( mesh.faces, dtype=np.intp )
+	colors = np.array( mesh.colors, dtype=np.float64 ) if len( mesh.colors ) == len( vertices ) else None
+	textures = np.array( mesh.textures, dtype=np.float64 ) if len( mesh.textures ) == len( vertices ) else None
+	vertex_number = len( vertices )
+	# Compute the vertex quadrics
+	quadrics = GetVertexQuadrics( vertices, faces )
+	# Lock the vertices of the border and non-manifold edges (the collapses keep the borders, so the locked vertices do not change)
+	( edges, labels, counts, twins ) = mtk.GetHalfEdges( faces, vertex_number )
+	locked = np.zeros( vertex_number, dtype=bool )
+	locked[ faces.reshape( -1 )[ twins < 0 ] ] = True
+	locked[ faces[ :, [ 1, 2, 0 ] ].reshape( -1 )[ twins < 0 ] ] = True
+	# Compute the collapse positions and costs of the edges, and sort the edges by cost
+	( positions, costs ) = GetEdgeCosts( edges, quadrics, vertices, locked )
+	order = np.argsort( costs, kind='stable' )
+	( edges, positions, costs ) = ( edges[ order ], positions[ order ], costs[ order ] )
+	# Collapse the edges by rounds
+	while len( faces ) > max( target_faces, 4 ) :
+		# Number of edges having at least one free vertex (the edges with two locked vertices have an infinite cost)
+		candidates = np.searchsorted( costs, np.inf )
+		if not candidates : break
+		# Rank the edges by cost
+		( a, b ) = ( edges[:,0], edges[:,1] )
+		rank = np.arange( len( edges ) )
+		# Get the neighborhoods of the vertices
+		neighbors = mtk.GetVertexNeighbors( edges, vertex_number )
+		vertex_faces = mtk.GetVertexFaces( faces, vertex_number )
+		# Select independent collapses among the lowest cost edges, discarding the collapses changing the topology or flipping faces
+		edge_index = np.arange( int( np.ceil( max( candidates * round_fraction, 1 ) ) ) )
+		selected = SelectIndependentEdges( faces, vertex_faces, a, b, rank, edge_index,
+			lambda chosen : CheckCollapses( faces, neighbors, vertex_faces, vertices, a[ chosen ], b[ chosen ], positions[ chosen ] ) )
+		if not len( selected ) : break
+		# Collapse only the lowest cost edges required to reach the target face number
+		required = ( len( faces ) - target_faces + 1 ) // 2
+		if len( selected ) > required :
+			selected = np.sort( selected )[ : required ]
+		# Keep the locked vertex of each edge, or the first one
+		( a, b, collapse_positions ) = ( a[ selected ], b[ selected ], positions[ selected ] )
+		keep = np.where( locked[ b ], b, a )
+		remove = np.where( locked[ b ], a, b )
+		# Interpolate the vertex attributes along the edges
+		edge = vertices[ b ] - vertices[ a ]
+		with np.errstate( divide='ignore', invalid='ignore' ) :
+			t = np.clip( mtk.Dot( collapse_positions - vertices[ a ], edge ) / mtk.Dot( edge, edge ), 0, 1 ).reshape( -1, 1 )
+		t[ ~np.isfinite( t ) ] = 0.5
+		if colors is not None : colors[ keep ] = ( 1 - t ) * colors[ a ] + t * colors[ b ]
+		if textures is not None : textures[ keep ] = ( 1 - t ) * textures[ a ] + t * textures[ b ]
+		# Move the kept vertices and merge the quadrics
+		vertices[ keep ] = collapse_positions
+		quadrics[ keep ] += quadrics[ remove ]
+		# Replace the removed vertices in the faces
+		index = np.arange( vertex_number )
+		index[ remove ] = keep
+		faces = index[ faces ]
+		# Remove the collapsed faces, and get the vertex opposite to the collapsed edge in each one
+		valid = ( faces[:,0] != faces[:,1] ) & ( faces[:,1] != faces[:,2] ) & ( faces[:,2] != faces[:,0] )
+		collapsed = faces[ ~valid ]
+		faces = faces[ valid ]
+		opposite = np.where( collapsed[:,1] == collapsed[:,2], collapsed[:,0], np.where( collapsed[:,0] == collapsed[:,2], collapsed[:,1], collapsed[:,2] ) )
+		# The two opposite vertices of each kept vertex (their edges from the removed vertex duplicate their edges from the kept vertex)
+		kept = ( collapsed.sum( axis=1 ) - opposite ) // 2
+		opposites = np.full( ( vertex_number, 2 ), -1 )
+		opposites[ kept, 0 ] = opposite
+		second = opposites[ kept, 0 ] != opposite
+		opposites[ kept[ second ], 1 ] = opposite[ second ]
+		# Update the costs of the edges around the collapsed edges
+		touched = np.zeros( vertex_number, dtype=bool )
+		touched[ keep ] = True
+		touched[ remove ] = True
+		( edges, positions, costs ) = UpdateEdgeCosts( edges, positions, costs, touched, index, opposites, quadrics, vertices, locked )
+	# Update the mesh
+	mesh.vertices = vertices
+	mesh.faces = faces
+	if colors is not None : mesh.colors = colors
+	if textures is not None : mesh.textures = textures
+	# Remove the unreferenced vertices
+	referenced = np.zeros( vertex_number, dtype=bool )
+	referenced[ faces ] = True
+	mtk.CompactVertices( mesh, referenced )
+	# Update the normals
+	if len( mesh.face_normals ) or len( mesh.vertex_normals ) : mesh.UpdateNormals()
+
+# Create a simplified copy of a mesh by vertex clustering (e.g. a proxy mesh for interactive display)
+# The vertices are merged in the cells of a regular grid with the given number of cells along the largest bounding box side
+# Based on :
+#   Multi-resolution 3D approximations for rendering complex scenes
+#     Jarek Rossignac, Paul Borrel, Modeling in Computer Graphics, 1993
+def ClusterVertices( mesh, resolution = 256 ) :
+	# Quantize the vertex positions onto the grid
+	vertices = np.asarray( mesh.vertices, dtype=np.float64 )
+	origin = vertices.min( axis=0 )
+	size = ( vertices.max( axis=0 ) - origin ).max()
+	cells = np.minimum( np.floor( ( vertices - origin ) * ( resolution / size if size > 0 else 0 ) ), resolution - 1 ).astype( np.int64 )
+	# Label the vertices with their cell
+	( keys, first, labels, mode ) = mtk.UniqueRows( cells, 'pack', [ resolution ] * 3 )
+	# Average the vertex attributes in each cell
+	proxy = mtk.Mesh( name=mesh.name, vertices=mtk.MergeRows( vertices, labels, len( keys ) ) )
+	if mesh.color_number == mesh.vertex_number :
+		proxy.colors = mtk.MergeRows( mesh.colors, labels, len( keys ) )
+		if np.issubdtype( mesh.colors.dtype, np.integer ) : proxy.colors = np.round( proxy.colors ).astype( mesh.colors.dtype )
+	if mesh.texture_number == mesh.vertex_number : proxy.textures = mtk.MergeRows( mesh.textures, labels, len( keys ) )
+	# Remap the faces, and remove the collapsed and duplicated faces
+	faces = labels[ mesh.faces ]
+	proxy.faces = faces[ ( faces[:,0] != faces[:,1] ) & ( faces[:,1] != faces[:,2] ) & ( faces[:,2] != faces[:,0] ) ]
+	mtk.RemoveDuplicatedFaces( proxy )
+	# Compute the normals
+	proxy.UpdateNormals()
+	# Return the simplified mesh
+	return proxy
+
+# Select edges (a, b) not touching the faces around each other, by increasing rank
+# The edges having the lowest rank among the edges touching the faces around them are selected,
+# then the selection is repeated on the remaining edges not touching the faces around the selected edges
+# The optional check function returns the validity of a set of chosen edges before their selection
+# Return the selected edges
+def SelectIndependentEdges( faces, vertex_faces, a, b, rank, edge_index, check = None ) :
+	# Initialisation
+	vertex_number = len( vertex_faces[0] ) - 1
+	blocked = np.zeros( vertex_number, dtype=bool )
+	open_faces = faces
+	selected = []
+	while len( edge_index ) :
+		# Select the edges having the lowest rank among the edges touching the faces around them
+		vertex_rank = np.full( vertex_number, len( rank ), dtype=np.intp )
+		np.minimum.at( vertex_rank, a[ edge_index ], rank[ edge_index ] )
+		np.minimum.at( vertex_rank, b[ edge_index ], rank[ edge_index ] )
+		face_rank = np.minimum( np.minimum( vertex_rank[ open_faces[:,0] ], vertex_rank[ open_faces[:,1] ] ), vertex_rank[ open_faces[:,2] ] )
+		# Keep only the faces touching the remaining edges (the other faces do not carry any rank)
+		( open_faces, face_rank ) = ( open_faces[ face_rank < len( rank ) ], face_rank[ face_rank < len( rank ) ] )
+		vertex_rank[:] = len( rank )
+		np.minimum.at( vertex_rank, open_faces.reshape( -1 ), np.repeat( face_rank, 3 ) )
+		local = ( vertex_rank[ a[ edge_index ] ] == rank[ edge_index ] ) & ( vertex_rank[ b[ edge_index ] ] == rank[ edge_index ] )
+		( chosen, edge_index ) = ( edge_index[ local ], edge_index[ ~local ] )
+		# Discard the invalid edges
+		if check is not None : chosen = chosen[ check( chosen ) ]
+		selected.append( chosen )
+		# Block the vertices of the faces around the selected edges
+		around = mtk.GetRows( vertex_faces[0], vertex_faces[1], np.concatenate( ( a[ chosen ], b[ chosen ] ) ) )[1]
+		blocked[ faces[ around ] ] = True
+		# Keep the edges not touching the faces around the selected edges
+		edge_index = edge_index[ ~( blocked[ a[ edge_index ] ] | blocked[ b[ edge_index ] ] ) ]
+	# Return the selected edges
+	return np.concatenate( selected ) if len( selected ) else np.zeros( 0, dtype=np.intp )
+
+# Compute the collapse positions and costs of the edges (infinite cost for the edges having two locked vertices)
+def GetEdgeCosts( edges, quadrics, vertices, locked ) :
+	( a, b ) = ( edges[:,0], edges[:,1] )
+	( positions, costs ) = GetCollapsePositions( quadrics[ a ] + quadrics[ b ], vertices[ a ], vertices[ b ], locked[ a ], locked[ b ] )
+	costs[ locked[ a ] & locked[ b ] ] = np.inf
+	return ( positions, costs )
+
+# Update the edges sorted by cost after a round of collapses
+# (index of the new vertex of each vertex, and the two vertices opposite to the collapsed edge of each kept vertex)
+# The edges touching the collapsed vertices are renamed, merged, and get a new cost,
+# then they are merged back into the other edges, still sorted by cost
+# Return the new edges, and their collapse positions and costs
+def UpdateEdgeCosts( edges, positions, costs, touched, index, opposites, quadrics, vertices, locked ) :
+	# Extract the edges touching the collapsed vertices
+	changed = touched[ edges[:,0] ] | touched[ edges[:,1] ]
+	( updated, edges, positions, costs ) = ( edges[ changed ], edges[ ~changed ], positions[ ~changed ], costs[ ~changed ] )
+	# Rename the removed vertices (at most one vertex per edge, the collapses are independent)
+	renamed = index[ updated ] != updated
+	updated = index[ updated ]
+	# Remove the collapsed edges, and the edges from the removed vertices to the opposite vertices (merged with the kept edges)
+	( kept, other ) = ( np.where( renamed[:,1], updated[:,1], updated[:,0] ), np.where( renamed[:,1], updated[:,0], updated[:,1] ) )
+	duplicated = renamed.any( axis=1 ) & ( ( opposites[ kept, 0 ] == other ) | ( opposites[ kept, 1 ] == other ) )
+	updated = updated[ ( updated[:,0] != updated[:,1] ) & ~duplicated ]
+	updated = np.vstack( ( np.minimum( updated[:,0], updated[:,1] ), np.maximum( updated[:,0], updated[:,1] ) ) ).T
+	# Compute their collapse positions and costs, and sort them by cost
+	( updated_positions, updated_costs ) = GetEdgeCosts( updated, quadrics, vertices, locked )
+	order = np.argsort( updated_costs, kind='stable' )
+	# Insert the updated edges among the other edges sorted by cost
+	inserted = np.zeros( len( edges ) + len( updated ), dtype=bool )
+	inserted[ np.searchsorted( costs, updated_costs[ order ], side='right' ) + np.arange( len( order ) ) ] = True
+	merged = []
+	for ( old, new ) in ( ( edges, updated ), ( positions, updated_positions ), ( costs, updated_costs ) ) :
+		array = np.empty( ( len( inserted ), ) + old.shape[ 1: ], dtype=old.dtype )
+		array[ inserted ] = new[ order ]
+		array[ ~inserted ] = old
+		merged.append( array )
+	# Return the updated edges
+	return tuple( merged )
+
+# Compute the quadric of every vertex (sum of the area-weighted quadrics of the face planes)
+# The symmetric 4x4 quadrics are stored with their 10 upper coefficients
+def GetVertexQuadrics( vertices, faces ) :
+	# Create an indexed view of the triangles
+	tris = vertices[ faces ]
+	# Compute the face planes
+	normals = np.cross( tris[:,1] - tris[:,0], tris[:,2] - tris[:,0] )
+	areas = np.sqrt( ( normals ** 2 ).sum( axis=1 ) )
+	with np.errstate( divide='ignore', invalid='ignore' ) :
+		normals /= areas.reshape( -1, 1 )
+	normals[ ~np.isfinite( normals ) ] = 0
+	planes = np.hstack( ( normals, -mtk.Dot( normals, tris[:,0] ).reshape( -1, 1 ) ) )
+	# Compute the face quadrics weighted by the face areas
+	( i, j ) = np.triu_indices( 4 )
+	face_quadrics = planes[:,i] * planes[:,j] * ( areas / 2 ).reshape( -1, 1 )
+	# Add the face quadrics to their vertices
+	quadrics = np.zeros( ( len( vertices ), 10 ) )
+	for k in range( 10 ) :
+		quadrics[:,k] += np.bincount( faces[:,0], face_quadrics[:,k], minlength=len( vertices ) )
+		quadrics[:,k] += np.bincount( faces[:,1], face_quadrics[:,k], minlength=len( vertices ) )
+		quadrics[:,k] += np.bincount( faces[:,2], face_quadrics[:,k], minlength=len( vertices ) )
+	# Return the vertex quadrics
+	return quadrics
+
+# Evaluate the quadric errors of the given positions
+# The quadrics are given by their coefficient rows (10 rows)
+def GetQuadricErrors( q, positions ) :
+	( x, y, z ) = np.ascontiguousarray( positions.T )
+	return x * ( q[0] * x + 2 * ( q[1] * y + q[2] * z + q[3] ) ) + y * ( q[4] * y + 2 * ( q[5] * z + q[6] ) ) + z * ( q[7] * z + 2 * q[8] ) + q[9]
+
+# Compute the collapse position and cost of the edges (a, b) given their quadrics
+# The position minimizes the quadric error, or is the best edge vertex or midpoint if the quadric is singular
+# The locked edge vertices keep their position
+def GetCollapsePositions( quadrics, a, b, locked_a, locked_b ) :
+	# Solve the quadric minimization system with the cofactor matrix
+	q = np.ascontiguousarray( quadrics.T )
+	c00 = q[4] * q[7] - q[5] * q[5]
+	c01 = q[2] * q[5] - q[1] * q[7]
+	c02 = q[1] * q[5] - q[2] * q[4]
+	c11 = q[0] * q[7] - q[2] * q[2]
+	c12 = q[1] * q[2] - q[0] * q[5]
+	c22 = q[0] * q[4] - q[1] * q[1]
+	determinant = q[0] * c00 + q[1] * c01 + q[2] * c02
+	with np.errstate( divide='ignore', invalid='ignore' ) :
+		optimal = -np.vstack( ( c00 * q[3] + c01 * q[6] + c02 * q[8],
+			c01 * q[3] + c11 * q[6] + c12 * q[8],
+			c02 * q[3] + c12 * q[6] + c22 * q[8] ) ).T / determinant.reshape( -1, 1 )
+	# Keep the optimal positions close to their edge
+	middle = ( a + b ) / 2
+	length = mtk.Dot( b - a, b - a )
+	valid = np.isfinite( optimal ).all( axis=1 ) & ( mtk.Dot( optimal - middle, optimal - middle ) <= length )
+	optimal[ ~valid ] = middle[ ~valid ]
+	# The quadrics are positive semi-definite : a valid optimal position has the lowest error of the candidate positions
+	# The other candidate positions are evaluated only for the invalid optimal positions and the locked vertices
+	other = np.flatnonzero( ~valid | locked_a | locked_b )
+	( q_other, a, b, middle ) = ( q[ :, other ], a[ other ], b[ other ], middle[ other ] )
+	# Choose the candidate position with the lowest error
+	candidates = np.array( [ optimal[ other ], a, b, middle ] )
+	errors = np.array( [ GetQuadricErrors( q_other, p ) for p in candidates ] )
+	errors[ 0, ~valid[ other ] ] = np.inf
+	# Force the position of the locked vertices
+	errors[ :, locked_a[ other ] ] = [ [ np.inf ], [ 0 ], [ np.inf ], [ np.inf ] ]
+	errors[ :, locked_b[ other ] ] = [ [ np.inf ], [ np.inf ], [ 0 ], [ np.inf ] ]
+	optimal[ other ] = candidates[ np.argmin( errors, axis=0 ), np.arange( len( other ) ) ]
+	# Return the collapse positions and their cost
+	return ( optimal, GetQuadricErrors( q, optimal ) )
+
+# Check the validity of the collapses of the edges (a, b) to the given positions
+# The collapses must satisfy the link condition (the vertices a and b share exactly two neighbors),
+# and must not flip the faces around the edges
+def CheckCollapses( faces, neighbors, vertex_faces, vertices, a, b, positions ) :
+	# Get the neighbors of both edge vertices
+	vertex_number = len( vertices )
+	( owner_a, neighbor_a ) = mtk.GetRows( neighbors[0], neighbors[1], a )
+	( owner_b, neighbor_b ) = mtk.GetRows( neighbors[0], neighbors[1], b )
+	# Count the common neighbors
+	keys = np.sort( np.concatenate( ( owner_a * vertex_number + neighbor_a, owner_b * vertex_number + neighbor_b ) ) )
+	common = np.bincount( keys[ 1: ][ keys[ 1: ] == keys[ :-1 ] ] // vertex_number, minlength=len( a ) )
+	valid = common == 2
+	# Get the faces around both edge vertices
+	( owner_a, faces_a ) = mtk.GetRows( vertex_faces[0], vertex_faces[1], a )
+	( owner_b, faces_b ) = mtk.GetRows( vertex_faces[0], vertex_faces[1], b )
+	owner = np.concatenate( ( owner_a, owner_b ) )
+	around = faces[ np.concatenate( ( faces_a, faces_b ) ) ]
+	# Discard the faces removed by the collapses
+	moved = ( around == a[ owner ].reshape( -1, 1 ) ) | ( around == b[ owner ].reshape( -1, 1 ) )
+	kept = moved.sum( axis=1 ) == 1
+	( owner, around, moved ) = ( owner[ kept ], around[ kept ], moved[ kept ] )
+	# Compare the face normals before and after the collapses
+	before = vertices[ around ]
+	after = before.copy()
+	after[ moved ] = positions[ owner ]
+	normal_before = np.cross( before[:,1] - before[:,0], before[:,2] - before[:,0] )
+	normal_after = np.cross( after[:,1] - after[:,0], after[:,2] - after[:,0] )
+	flipped = mtk.Dot( normal_before, normal_after ) <= 0
+	valid[ np.unique( owner[ flipped ] ) ] = False
+	# Return the valid collapses
+	return valid
@@ -1,32 +1,79 @@
-# -*- coding:utf-8 -*- 
-
+# -*- coding:utf-8 -*-
 
 #
-# External dependencies
+# Provide discrete differential operators on a triangular mesh
+# (gradient, divergence, Laplace-Beltrami operator, mass matrix)
 #
-from numpy import array
 
+# The operators are assembled once as sparse matrices from the face array,
+# so that applying them to a field is a single sparse matrix-vector product.
+# The scalar fields are given per vertex, the vector fields per face.
+# Based on :
+#   Discrete Differential-Geometry Operators for Triangulated 2-Manifolds
+#     Mark Meyer, Mathieu Desbrun, Peter Schröder, Alan H. Barr
+#     VisMath '02, Berlin (Germany)
 
-#
-# Define a class representing partial differences on triangular mesh
-#
-class Difference :
-
+# External dependencies
+import numpy as np
+import scipy.sparse as sp
 
-	#
+# Define a class representing partial differences on triangular mesh
+class Difference( object ) :
 	# Initialisation
-	#
 	def __init__( self, mesh ) :
-		
 		# Base mesh
 		self.mesh = mesh
-		
-	#
-	# Gradient
-	#
-	def Gradient( self ) :
-		
-		for u in range(len( self.vertices )) :
-			for v in self.mesh.neighbor_vertices[ u ] :
-				
-	
+		# Create an indexed view of the triangles
+		faces = mesh.faces
+		tris = mesh.vertices[ faces ]
+		# Edge vectors opposite to each face vertex
+		edges = tris[ :, [ 2, 0, 1 ] ] - tris[ :, [ 1, 2, 0 ] ]
+		# Face normals (with a norm of twice the face area)
+		normals = np.cross( tris[:,1] - tris[:,0], tris[:,2] - tris[:,0] )
+		double_areas = np.sqrt( ( normals ** 2 ).sum( axis=1 ) )
+		with np.errstate( divide='ignore', invalid='ignore' ) :
+			normals /= double_areas.reshape( -1, 1 )
+		normals[ ~np.isfinite( normals ) ] = 0
+		# Face areas
+		self.face_areas = double_areas / 2.0
+		# Gradient of the hat function of each face vertex ( N x e / 2A )
+		with np.errstate( divide='ignore', invalid='ignore' ) :
+			hat_gradients = np.cross( normals.reshape( -1, 1, 3 ), edges ) / double_areas.reshape( -1, 1, 1 )
+		hat_gradients[ ~np.isfinite( hat_gradients ) ] = 0
+		# Gradient operator (3 rows per face for the x, y and z components, 3 values per row for the face vertices)
+		values = hat_gradients.transpose( 0, 2, 1 ).reshape( -1 )
+		columns = np.repeat( faces, 3, axis=0 ).reshape( -1 )
+		offsets = np.arange( 0, 9 * mesh.face_number + 1, 3 )
+		self.gradient = sp.csr_matrix( ( values, columns, offsets ), shape=( 3 * mesh.face_number, mesh.vertex_number ) )
+		# Divergence operator (integrated over the vertex areas, adjoint of the gradient)
+		values = -values * np.repeat( self.face_areas, 9 )
+		self.divergence = sp.csr_matrix( ( values, columns, offsets ), shape=( 3 * mesh.face_number, mesh.vertex_number ) ).T.tocsr()
+		# Cotangent of the face angles ( u . v / | u x v | )
+		cotangents = ( -edges[ :, [ 1, 2, 0 ] ] * edges[ :, [ 2, 0, 1 ] ] ).sum( axis=2 )
+		with np.errstate( divide='ignore', invalid='ignore' ) :
+			cotangents /= double_areas.reshape( -1, 1 )
+		cotangents[ ~np.isfinite( cotangents ) ] = 0
+		# Laplace-Beltrami operator (integrated cotangent weights, negative semi-definite)
+		( a, b ) = ( faces[ :, [ 1, 2, 0 ] ].reshape( -1 ), faces[ :, [ 2, 0, 1 ] ].reshape( -1 ) )
+		weights = cotangents.reshape( -1 ) / 2.0
+		self.laplacian = sp.csr_matrix( ( np.concatenate( ( weights, weights ) ), ( np.concatenate( ( a, b ) ), np.concatenate( ( b, a ) ) ) ),
+			shape=( mesh.vertex_number, mesh.vertex_number ) )
+		self.laplacian -= sp.diags( np.bincount( np.concatenate( ( a, b ) ), np.concatenate( ( weights, weights ) ), minlength=mesh.vertex_number ) )
+		# Lumped mass matrix (a third of the area of the faces around each vertex)
+		self.vertex_areas = np.bincount( faces.reshape( -1 ), np.repeat( self.face_areas / 3.0, 3 ), minlength=mesh.vertex_number )
+		self.mass = sp.diags( self.vertex_areas ).tocsr()
+	# Gradient of a scalar field given per vertex
+	# Return a vector per face
+	def Gradient( self, values ) :
+		return ( self.gradient @ values ).reshape( self.mesh.face_number, 3, *np.shape( values )[ 1: ] )
+	# Divergence of a vector field given per face
+	# Return a scalar per vertex (integrated over the vertex area)
+	def Divergence( self, vectors ) :
+		return self.divergence @ np.asarray( vectors ).reshape( 3 * self.mesh.face_number, *np.shape( vectors )[ 2: ] )
+	# Laplacian of a scalar or vector field given per vertex
+	# Return a scalar or a vector per vertex (divided by the vertex area if normalized is True)
+	def Laplacian( self, values, normalized = True ) :
+		values = self.laplacian @ values
+		if not normalized : return values
+		with np.errstate( divide='ignore', invalid='ignore' ) :
+			return values / self.vertex_areas.reshape( -1, *[ 1 ] * ( np.ndim( values ) - 1 ) )
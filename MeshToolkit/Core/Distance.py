@@ -0,0 +1,88 @@
+# -*- coding:utf-8 -*-
+
+#
+# Compute the distances between two meshes
+# (per-vertex signed / unsigned distances, Hausdorff distance, mean and RMS errors)
+#
+
+# The closest points are found with a bounding volume hierarchy of the reference mesh.
+# The signs are given by the angle-weighted pseudo-normals of the closest face, edge or vertex.
+# Based on :
+#   Signed Distance Computation Using the Angle Weighted Pseudonormal
+#     J. Andreas Bærentzen, Henrik Aanæs, IEEE TVCG, 11(3), 243-253, 2005
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# Compute the distance from every vertex of a mesh to a reference mesh
+# The signed distance is positive outside the reference mesh (in the direction of its normals)
+def GetVertexDistances( mesh, reference, signed = False, bvh = None ) :
+	# Initialisation
+	if bvh is None : bvh = mtk.Bvh( reference )
+	# Find the closest points on the reference mesh
+	( faces, barycentrics, distances ) = bvh.ClosestPoint( mesh.vertices )
+	# Return the unsigned distances
+	if not signed : return distances
+	# Get the pseudo-normals of the closest features
+	normals = GetClosestPseudoNormals( reference, faces, barycentrics )
+	# Orient the distances
+	sign = np.sign( mtk.Dot( mesh.vertices - bvh.GetPoints( faces, barycentrics ), normals ) )
+	# Return the signed distances
+	return sign * distances
+
+# Compute the distance errors between a mesh and a reference mesh
+# The distances are measured at the vertices in both directions
+# The distances from the mesh to the reference (signed or not) can be given if they are already computed,
+# otherwise they are computed with the given bounding volume hierarchy of the reference, if any
+# Return a dictionary with the one-sided and symmetric Hausdorff distances, and the mean and RMS errors from the mesh to the reference
+def GetDistanceErrors( mesh, reference, distances = None, bvh = None ) :
+	# Distances from the mesh to the reference, and from the reference to the mesh
+	forward = GetVertexDistances( mesh, reference, bvh=bvh ) if distances is None else np.abs( distances )
+	backward = GetVertexDistances( reference, mesh )
+	# Compute the errors
+	errors = dict()
+	errors[ 'Forward Hausdorff' ] = forward.max()
+	errors[ 'Backward Hausdorff' ] = backward.max()
+	errors[ 'Hausdorff' ] = max( forward.max(), backward.max() )
+	errors[ 'Mean' ] = forward.mean()
+	errors[ 'RMS' ] = np.sqrt( ( forward ** 2 ).mean() )
+	# Return the errors
+	return errors
+
+# Get the angle-weighted pseudo-normals of closest points given by their face and barycentric coordinates
+def GetClosestPseudoNormals( mesh, faces, barycentrics ) :
+	# Create an indexed view of the triangles
+	tris = mesh.vertices[ mesh.faces ]
+	# Compute the unit face normals
+	face_normals = np.cross( tris[:,1] - tris[:,0], tris[:,2] - tris[:,0] )
+	with np.errstate( divide='ignore', invalid='ignore' ) :
+		face_normals /= np.sqrt( ( face_normals ** 2 ).sum( axis=1 ) ).reshape( -1, 1 )
+	face_normals[ ~np.isfinite( face_normals ) ] = 0
+	# Compute the vertex pseudo-normals (sum of the face normals weighted by the face angles)
+	vertex_normals = np.zeros( mesh.vertices.shape )
+	for i in range( 3 ) :
+		u = tris[:,(i+1)%3] - tris[:,i]
+		v = tris[:,(i+2)%3] - tris[:,i]
+		angle = np.arctan2( np.sqrt( ( np.cross( u, v ) ** 2 ).sum( axis=1 ) ), mtk.Dot( u, v ) )
+		for j in range( 3 ) :
+			vertex_normals[:,j] += np.bincount( mesh.faces[:,i], angle * face_normals[:,j], minlength=mesh.vertex_number )
+	# Label the edges opposite to each face vertex
+	edges = np.sort( mesh.faces[ :, [ [1, 2], [2, 0], [0, 1] ] ], axis=2 ).reshape( -1, 2 )
+	( keys, first, labels, mode ) = mtk.UniqueRows( edges )
+	labels = labels.reshape( -1, 3 )
+	# Compute the edge pseudo-normals (sum of the adjacent face normals)
+	edge_normals = np.zeros( ( len( first ), 3 ) )
+	for j in range( 3 ) :
+		edge_normals[:,j] = np.bincount( labels.reshape( -1 ), np.repeat( face_normals[:,j], 3 ), minlength=len( first ) )
+	# Use the face normals by default
+	normals = face_normals[ faces ]
+	# Closest points on an edge (one null barycentric coordinate)
+	zeros = barycentrics == 0
+	on_edge = zeros.sum( axis=1 ) == 1
+	normals[ on_edge ] = edge_normals[ labels[ faces[ on_edge ], np.argmax( zeros[ on_edge ], axis=1 ) ] ]
+	# Closest points on a vertex (two null barycentric coordinates)
+	on_vertex = zeros.sum( axis=1 ) == 2
+	normals[ on_vertex ] = vertex_normals[ mesh.faces[ faces[ on_vertex ], np.argmax( ~zeros[ on_vertex ], axis=1 ) ] ]
+	# Return the pseudo-normals
+	return normals
@@ -0,0 +1,60 @@
+# -*- coding:utf-8 -*-
+
+#
+# Compute geodesic distances on a triangular mesh with the heat method
+#
+
+# The two sparse systems (heat diffusion and Poisson equation) are factorized once per mesh,
+# so that each new set of sources costs only two back-substitutions.
+# Based on :
+#   Geodesics in Heat: A New Approach to Computing Distance Based on Heat Flow
+#     Keenan Crane, Clarisse Weischedel, Max Wardetzky, ACM TOG, 32(5), 2013
+
+# External dependencies
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+import MeshToolkit as mtk
+
+# Class to compute geodesic distances from sets of source vertices
+class HeatGeodesic( object ) :
+	# Initialisation
+	# The time step is a factor of the squared mean edge length
+	# (a larger factor smooths the distances, but avoids the underflow of the heat far from the sources on large meshes)
+	def __init__( self, mesh, time_factor = 1.0 ) :
+		# Base mesh
+		self.mesh = mesh
+		# Differential operators
+		self.difference = mtk.Difference( mesh )
+		# Time step
+		edges = mesh.vertices[ mesh.faces[ :, [ 1, 2, 0 ] ] ] - mesh.vertices[ mesh.faces ]
+		time = time_factor * ( np.sqrt( ( edges ** 2 ).sum( axis=2 ) ).mean() ) ** 2
+		# Factorize the heat diffusion system ( M - t L )
+		laplacian = self.difference.laplacian
+		mass = self.difference.mass
+		self.heat_solver = spla.splu( ( mass - time * laplacian ).tocsc(), permc_spec='MMD_AT_PLUS_A' )
+		# Factorize the Poisson system ( - L ), regularized to remove the constant null space
+		epsilon = 1e-8 * self.difference.vertex_areas.mean()
+		self.poisson_solver = spla.splu( ( epsilon * mass - laplacian ).tocsc(), permc_spec='MMD_AT_PLUS_A' )
+	# Compute the geodesic distance of every vertex to the given source vertices
+	def GetDistances( self, sources ) :
+		# Heat diffusion from the sources
+		heat = np.zeros( self.mesh.vertex_number )
+		heat[ sources ] = 1.0
+		heat = self.heat_solver.solve( heat )
+		# Normalized opposite gradient of the heat
+		gradients = self.difference.Gradient( heat )
+		with np.errstate( divide='ignore', invalid='ignore' ) :
+			gradients /= -np.sqrt( ( gradients ** 2 ).sum( axis=1 ) ).reshape( -1, 1 )
+		gradients[ ~np.isfinite( gradients ) ] = 0
+		# Find the distance whose gradient is the closest to the normalized gradient
+		distances = self.poisson_solver.solve( -self.difference.Divergence( gradients ) )
+		# Set the sources at a null distance
+		return distances - distances[ sources ].min()
+
+# Compute the geodesic distance of every vertex of a mesh to the given source vertices
+def GetGeodesicDistances( mesh, sources, geodesic = None ) :
+	# Initialisation
+	if geodesic is None : geodesic = HeatGeodesic( mesh )
+	# Return the distances
+	return geodesic.GetDistances( sources )
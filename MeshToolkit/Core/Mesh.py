@@ -7,6 +7,7 @@
 
 # External dependencies
 import numpy as np
+import MeshToolkit as mtk
 
 # Define a class representing a triangular mesh
 # The data are encapsulated into numpy arrays
@@ -147,15 +148,12 @@ class Mesh( object ) :
 
 	# Tell which vertex is on a border
 	def GetBorderVertices( self ) :
+		# Get the edges with only one face
+		( edges, labels, counts, twins ) = mtk.GetHalfEdges( self.faces, self.vertex_number )
 		# Initialize border vertex list
-		border_vertices = np.zeros( self.vertex_number, dtype=np.bool )
-		# Loop through the neighbor vertices
-		for va, vn in enumerate( self.neighbor_vertices ) :
-			for vb in vn :
-				# Check the number of faces in common between the initial vertex and the neighbor
-				if len( self.neighbor_faces[va] & self.neighbor_faces[vb] ) < 2 :
-					border_vertices[ va ] = True
-					break
+		border_vertices = np.zeros( self.vertex_number, dtype=bool )
+		# Mark the vertices of the border edges
+		border_vertices[ edges[ counts == 1 ] ] = True
 		# Return the border vertex list
 		return border_vertices
 
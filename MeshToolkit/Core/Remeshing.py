@@ -0,0 +1,245 @@
+# -*- coding:utf-8 -*-
+
+#
+# Remesh a triangular mesh with edges of uniform length
+#
+
+# Based on :
+#   A Remeshing Approach to Multiresolution Modeling
+#     Mario Botsch, Leif Kobbelt, Eurographics Symposium on Geometry Processing 2004
+
+# Each iteration splits the long edges, collapses the short edges, flips the edges to improve
+# the vertex valences, moves the vertices tangentially to the centroid of their neighbors,
+# and projects them back onto the original surface.
+# Every operation is applied at once on a set of edges not sharing any face, computed
+# from the array-based half-edge table, so that it is applied on the arrays without any loop.
+# The half-edge table is passed from an operation to the next one when the topology is unchanged
+# (the last split round to the collapses, the flips to the relaxation).
+# The border vertices, and the vertices of the non-manifold edges, are not moved.
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# Remesh a mesh with the given target edge length (default: mean edge length)
+# The vertices are projected onto the original mesh with its bounding volume hierarchy (built if not given)
+# The colors and the texture coordinates are interpolated from the original mesh
+def IsotropicRemeshing( mesh, target_length = None, iterations = 5, bvh = None ) :
+	# Initialisation
+	vertices = np.array( mesh.vertices, dtype=np.float64 )
+	faces = np.array( mesh.faces, dtype=np.intp )
+	# Bounding volume hierarchy of the original mesh
+	if bvh is None : bvh = mtk.Bvh( mesh )
+	# Mean edge length
+	if target_length is None :
+		edges = mtk.GetHalfEdges( faces, len( vertices ) )[0]
+		target_length = np.sqrt( mtk.SquaredNorm( vertices[ edges[:,1] ] - vertices[ edges[:,0] ] ) ).mean()
+	# Edge length bounds
+	( min_length, max_length ) = ( 4.0 / 5.0 * target_length, 4.0 / 3.0 * target_length )
+	# Remeshing iterations
+	for i in range( iterations ) :
+		# Split the edges longer than the maximum length
+		( vertices, faces, topology ) = SplitLongEdges( vertices, faces, max_length )
+		# Collapse the edges shorter than the minimum length
+		( vertices, faces ) = CollapseShortEdges( vertices, faces, min_length, max_length, topology )
+		# Flip the edges to improve the vertex valences
+		( faces, edges, locked ) = FlipEdges( vertices, faces )
+		# Move the vertices tangentially to the centroid of their neighbors
+		( vertices, moving ) = RelaxVertices( vertices, faces, edges, locked )
+		# Project the moved vertices onto the original mesh
+		( closest_faces, barycentrics, distances ) = bvh.ClosestPoint( vertices[ moving ] )
+		vertices[ moving ] = bvh.GetPoints( closest_faces, barycentrics )
+	# Interpolate the vertex attributes of the original mesh at the closest points
+	colors = textures = []
+	if len( mesh.colors ) == mesh.vertex_number or len( mesh.textures ) == mesh.vertex_number :
+		( closest_faces, barycentrics, distances ) = bvh.ClosestPoint( vertices )
+		corners = bvh.faces[ closest_faces ]
+		if len( mesh.colors ) == mesh.vertex_number :
+			colors = np.einsum( 'ij,ijk->ik', barycentrics, np.asarray( mesh.colors, dtype=np.float64 )[ corners ] )
+			if np.issubdtype( mesh.colors.dtype, np.integer ) : colors = np.round( colors ).astype( mesh.colors.dtype )
+		if len( mesh.textures ) == mesh.vertex_number :
+			textures = np.einsum( 'ij,ijk->ik', barycentrics, np.asarray( mesh.textures, dtype=np.float64 )[ corners ] )
+	# Update the mesh
+	mesh.vertices = vertices
+	mesh.faces = faces
+	mesh.colors = np.array( colors )
+	mesh.textures = np.array( textures )
+	mesh.UpdateNormals()
+
+# Get the vertices of the border and non-manifold edges
+def GetLockedVertices( faces, twins, vertex_number ) :
+	locked = np.zeros( vertex_number, dtype=bool )
+	locked[ faces.reshape( -1 )[ twins < 0 ] ] = True
+	locked[ faces[ :, [ 1, 2, 0 ] ].reshape( -1 )[ twins < 0 ] ] = True
+	return locked
+
+# Split the edges longer than the given length at their midpoint, until every edge is shorter
+# At each round, every face chooses its longest edge, and the edges chosen by all their faces are split
+# Return the new vertices and faces, and the half-edge table of the new faces
+def SplitLongEdges( vertices, faces, max_length, max_rounds = 100 ) :
+	for i in range( max_rounds + 1 ) :
+		# Get the mesh edges and their length
+		topology = mtk.GetHalfEdges( faces, len( vertices ) )
+		( edges, labels, counts, twins ) = topology
+		lengths = mtk.SquaredNorm( vertices[ edges[:,1] ] - vertices[ edges[:,0] ] )
+		long_edges = lengths > max_length ** 2
+		if not long_edges.any() or i == max_rounds : break
+		# Longest long edge of each face
+		face_lengths = np.where( long_edges[ labels ], lengths[ labels ], -1.0 ).reshape( -1, 3 )
+		corners = np.argmax( face_lengths, axis=1 )
+		split_faces = np.flatnonzero( face_lengths[ np.arange( len( faces ) ), corners ] > 0 )
+		corners = corners[ split_faces ]
+		chosen = labels[ 3 * split_faces + corners ]
+		# Split the edges chosen by all their faces
+		selected = np.bincount( chosen, minlength=len( edges ) ) == counts
+		selected &= long_edges
+		keep = selected[ chosen ]
+		( split_faces, corners, chosen ) = ( split_faces[ keep ], corners[ keep ], chosen[ keep ] )
+		# Create the edge midpoints
+		index = np.full( len( edges ), -1, dtype=np.intp )
+		index[ selected ] = len( vertices ) + np.arange( np.count_nonzero( selected ) )
+		vertices = np.vstack( ( vertices, ( vertices[ edges[ selected, 0 ] ] + vertices[ edges[ selected, 1 ] ] ) / 2 ) )
+		# Split each face (a, b, c) of the edge (a, b) into the faces (a, m, c) and (m, b, c)
+		a = faces[ split_faces, corners ]
+		b = faces[ split_faces, ( corners + 1 ) % 3 ]
+		c = faces[ split_faces, ( corners + 2 ) % 3 ]
+		m = index[ chosen ]
+		faces[ split_faces ] = np.vstack( ( a, m, c ) ).T
+		faces = np.vstack( ( faces, np.vstack( ( m, b, c ) ).T ) )
+	# Return the new mesh arrays, and their half-edge table
+	return ( vertices, faces, topology )
+
+# Collapse the edges shorter than the given length at their midpoint (or at their locked vertex)
+# The collapses must not create edges longer than the maximum length
+# The half-edge table of the faces is computed if not given
+# Return the new vertices and faces (without the removed vertices)
+def CollapseShortEdges( vertices, faces, min_length, max_length, topology = None ) :
+	# Get the mesh edges
+	vertex_number = len( vertices )
+	if topology is None : topology = mtk.GetHalfEdges( faces, vertex_number )
+	( edges, labels, counts, twins ) = topology
+	locked = GetLockedVertices( faces, twins, vertex_number )
+	# Get the short edges having at least one free vertex
+	lengths = mtk.SquaredNorm( vertices[ edges[:,1] ] - vertices[ edges[:,0] ] )
+	candidates = np.flatnonzero( ( lengths < min_length ** 2 ) & ~( locked[ edges[:,0] ] & locked[ edges[:,1] ] ) )
+	( a, b ) = ( edges[ candidates, 0 ], edges[ candidates, 1 ] )
+	# Collapse positions (the midpoint, or the locked vertex)
+	positions = ( vertices[ a ] + vertices[ b ] ) / 2
+	positions[ locked[ a ] ] = vertices[ a[ locked[ a ] ] ]
+	positions[ locked[ b ] ] = vertices[ b[ locked[ b ] ] ]
+	# Get the neighborhoods of the vertices
+	neighbors = mtk.GetVertexNeighbors( edges, vertex_number )
+	vertex_faces = mtk.GetVertexFaces( faces, vertex_number )
+	# Select independent collapses, from the shortest edge
+	rank = np.empty( len( candidates ), dtype=np.intp )
+	rank[ np.argsort( lengths[ candidates ], kind='stable' ) ] = np.arange( len( candidates ) )
+	selected = mtk.SelectIndependentEdges( faces, vertex_faces, a, b, rank, np.arange( len( candidates ) ),
+		lambda chosen : CheckShortEdgeCollapses( faces, neighbors, vertex_faces, vertices, a[ chosen ], b[ chosen ], positions[ chosen ], max_length ) )
+	( a, b, positions ) = ( a[ selected ], b[ selected ], positions[ selected ] )
+	# Keep the locked vertex of each edge, or the first one
+	keep = np.where( locked[ b ], b, a )
+	remove = np.where( locked[ b ], a, b )
+	vertices = vertices.copy()
+	vertices[ keep ] = positions
+	# Replace the removed vertices in the faces, and remove the collapsed faces
+	index = np.arange( vertex_number )
+	index[ remove ] = keep
+	faces = index[ faces ]
+	faces = faces[ ( faces[:,0] != faces[:,1] ) & ( faces[:,1] != faces[:,2] ) & ( faces[:,2] != faces[:,0] ) ]
+	# Remove the unreferenced vertices
+	referenced = np.zeros( vertex_number, dtype=bool )
+	referenced[ faces ] = True
+	index = np.cumsum( referenced ) - 1
+	# Return the new mesh arrays
+	return ( vertices[ referenced ], index[ faces ] )
+
+# Check the validity of the collapses of the edges (a, b) to the given positions
+# The collapses must not change the topology, flip faces, or create edges longer than the maximum length
+def CheckShortEdgeCollapses( faces, neighbors, vertex_faces, vertices, a, b, positions, max_length ) :
+	# Farthest neighbor of the collapse positions
+	farthest = np.zeros( len( a ) )
+	for v in ( a, b ) :
+		( owner, items ) = mtk.GetRows( neighbors[0], neighbors[1], v )
+		np.maximum.at( farthest, owner, mtk.SquaredNorm( vertices[ items ] - positions[ owner ] ) )
+	# Return the valid collapses
+	return ( farthest < max_length ** 2 ) & mtk.CheckCollapses( faces, neighbors, vertex_faces, vertices, a, b, positions )
+
+# Flip the edges reducing the deviation of the vertex valences from their optimal value
+# (6 for the inner vertices, 4 for the border vertices)
+# Return the new faces, their edges, and the locked vertices (unchanged by the flips)
+def FlipEdges( vertices, faces ) :
+	# Get the mesh edges
+	vertex_number = len( vertices )
+	( edges, labels, counts, twins ) = mtk.GetHalfEdges( faces, vertex_number )
+	locked = GetLockedVertices( faces, twins, vertex_number )
+	# Vertex valences, and their optimal value
+	valence = np.bincount( edges.reshape( -1 ), minlength=vertex_number )
+	optimal = np.where( locked, 4, 6 )
+	# Inner edges, given by the half-edge (a, b) of the face (a, b, c) and its twin (b, a, d)
+	h = np.flatnonzero( twins > np.arange( len( twins ) ) )
+	t = twins[ h ]
+	( f, g ) = ( h // 3, t // 3 )
+	a = faces[ f, h % 3 ]
+	b = faces[ f, ( h + 1 ) % 3 ]
+	c = faces[ f, ( h + 2 ) % 3 ]
+	d = faces[ g, ( t + 2 ) % 3 ]
+	# Valence deviation before and after the flips
+	before = np.abs( valence[ a ] - optimal[ a ] ) + np.abs( valence[ b ] - optimal[ b ] ) + np.abs( valence[ c ] - optimal[ c ] ) + np.abs( valence[ d ] - optimal[ d ] )
+	after = np.abs( valence[ a ] - 1 - optimal[ a ] ) + np.abs( valence[ b ] - 1 - optimal[ b ] ) + np.abs( valence[ c ] + 1 - optimal[ c ] ) + np.abs( valence[ d ] + 1 - optimal[ d ] )
+	valid = ( after < before ) & ( valence[ a ] > 3 ) & ( valence[ b ] > 3 ) & ( c != d )
+	# Discard the flips creating an existing edge
+	keys = edges[:,0] * vertex_number + edges[:,1]
+	new_keys = np.minimum( c, d ) * vertex_number + np.maximum( c, d )
+	position = np.minimum( np.searchsorted( keys, new_keys ), len( keys ) - 1 )
+	valid &= keys[ position ] != new_keys
+	# Discard the flips folding the new faces (a, d, c) and (d, b, c) over the old ones
+	( pa, pb, pc, pd ) = ( vertices[ a ], vertices[ b ], vertices[ c ], vertices[ d ] )
+	normals = np.cross( pb - pa, pc - pa ) + np.cross( pa - pb, pd - pb )
+	valid &= ( mtk.Dot( np.cross( pd - pa, pc - pa ), normals ) > 0 ) & ( mtk.Dot( np.cross( pb - pd, pc - pd ), normals ) > 0 )
+	# Select independent flips, from the largest deviation decrease
+	candidates = np.flatnonzero( valid )
+	rank = np.empty( len( candidates ), dtype=np.intp )
+	rank[ np.argsort( after[ candidates ] - before[ candidates ], kind='stable' ) ] = np.arange( len( candidates ) )
+	vertex_faces = mtk.GetVertexFaces( faces, vertex_number )
+	selected = candidates[ mtk.SelectIndependentEdges( faces, vertex_faces, a[ candidates ], b[ candidates ], rank, np.arange( len( candidates ) ) ) ]
+	# Keep a single flip creating each new edge
+	selected = selected[ np.unique( new_keys[ selected ], return_index=True )[1] ]
+	# Flip the edges
+	faces = faces.copy()
+	faces[ f[ selected ] ] = np.vstack( ( a[ selected ], d[ selected ], c[ selected ] ) ).T
+	faces[ g[ selected ] ] = np.vstack( ( d[ selected ], b[ selected ], c[ selected ] ) ).T
+	# Replace the flipped edges (a, b) by the new edges (c, d)
+	edges = edges.copy()
+	edges[ labels[ h[ selected ] ] ] = np.vstack( ( np.minimum( c[ selected ], d[ selected ] ), np.maximum( c[ selected ], d[ selected ] ) ) ).T
+	# Return the new faces, their edges, and the locked vertices
+	return ( faces, edges, locked )
+
+# Move the free vertices to the centroid of their neighbors, in their tangent plane
+# The edges and the locked vertices of the faces are given by the flips
+# Return the new vertices, and the moved vertices
+def RelaxVertices( vertices, faces, edges, locked ) :
+	vertex_number = len( vertices )
+	# Both directions of each edge
+	source = np.concatenate( ( edges[:,0], edges[:,1] ) )
+	destination = np.concatenate( ( edges[:,1], edges[:,0] ) )
+	# Move the free vertices having neighbors
+	neighbor_number = np.bincount( source, minlength=vertex_number )
+	moving = np.flatnonzero( ~locked & ( neighbor_number > 0 ) )
+	# Area-weighted vertex normals
+	tris = vertices[ faces ]
+	face_normals = np.cross( tris[:,1] - tris[:,0], tris[:,2] - tris[:,0] )
+	normals = np.empty( ( len( moving ), 3 ) )
+	displacement = np.empty( ( len( moving ), 3 ) )
+	for j in range( 3 ) :
+		normals[:,j] = np.bincount( faces.reshape( -1 ), np.repeat( face_normals[:,j], 3 ), minlength=vertex_number )[ moving ]
+		displacement[:,j] = np.bincount( source, vertices[ destination, j ], minlength=vertex_number )[ moving ]
+	with np.errstate( divide='ignore', invalid='ignore' ) :
+		normals /= np.sqrt( mtk.SquaredNorm( normals ) ).reshape( -1, 1 )
+	normals[ ~np.isfinite( normals ) ] = 0
+	# Displacement to the centroid of the neighbors, in the tangent plane
+	displacement = displacement / neighbor_number[ moving ].reshape( -1, 1 ) - vertices[ moving ]
+	displacement -= mtk.Dot( displacement, normals ).reshape( -1, 1 ) * normals
+	vertices = vertices.copy()
+	vertices[ moving ] += displacement
+	# Return the new vertices, and the moved vertices
+	return ( vertices, moving )
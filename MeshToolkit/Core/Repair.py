@@ -6,6 +6,7 @@
 
 # External dependencies
 import numpy as np
+import MeshToolkit as mtk
 
 # Check several parameters of a given mesh
 def Check( mesh ) :
@@ -33,7 +34,8 @@ def Check( mesh ) :
 	if mesh.texture_number and not mesh.texture_name :
 		log_message += 'Empty texture filename\n'
 	# Face indices
-	if ( mesh.faces < 0 ).any() or ( mesh.faces >= mesh.vertex_number ).any() :
+	bad_indices = ( mesh.faces < 0 ).any() or ( mesh.faces >= mesh.vertex_number ).any()
+	if bad_indices :
 		log_message += 'Bad face indices\n'
 	# Vertex coordinates
 	if not np.isfinite( mesh.vertices ).all() :
@@ -44,57 +46,408 @@ def Check( mesh ) :
 	# Vertex normals
 	if not np.isfinite( mesh.vertex_normals ).all() :
 		log_message += 'Bad vertex normals\n'
-	# Colors
-	if (mesh.colors < 0).any() or (mesh.colors > 1).any() :
+	# Colors (floating point colors in range [0, 1], or 8-bit colors)
+	if ( mesh.colors.dtype != np.uint8 ) and ( (mesh.colors < 0).any() or (mesh.colors > 1).any() ) :
 		log_message += 'Bad color values\n'
 	# Texture coordinates
 	if (mesh.textures < 0).any() or (mesh.textures > 1).any() :
 		log_message += 'Bad texture coordinates\n'
-	# Check isolated vertices
-	if (np.array([len(neighbor) for neighbor in mesh.neighbor_faces]) == 0).any() :
-		log_message += 'Isolated vertices\n'
-	# Check degenerated faces
-	tris = mesh.vertices[ mesh.faces ]
-	face_normals = np.cross( tris[::,1] - tris[::,0]  , tris[::,2] - tris[::,0] )
-	if ( np.sqrt( (face_normals ** 2).sum(axis=1) ) == 0 ).any() :
-		log_message += 'Degenerated faces\n'
+	# Stop if the faces cannot be checked
+	if bad_indices : return log_message
+	# Check the topology
+	report = GetCheckReport( mesh )
+	for name in ( 'Isolated vertices', 'Duplicated vertices', 'Degenerated faces', 'Non-manifold edges',
+		'Non-manifold vertices', 'Inconsistent edges' ) :
+		if len( report[ name ] ) :
+			log_message += '{} : {}\n'.format( name, len( report[ name ] ) )
+	if report[ 'Border loops' ] :
+		log_message += 'Border loops : {}\n'.format( report[ 'Border loops' ] )
 	# Return the log message
 	return log_message
 
+# Compute a topological report of a given mesh
+# Return a dictionary with :
+#   - the vertex, edge, face, border loop and connected component numbers,
+#   - the Euler characteristic, and the genus (None if the mesh is not manifold),
+#   - the indices of the isolated, duplicated and non-manifold vertices (more than one fan of faces),
+#   - the indices of the degenerated faces,
+#   - the vertex indices of the non-manifold edges (more than two faces) and of the inconsistent edges
+#     (two faces with opposite orientations)
+def GetCheckReport( mesh ) :
+	# Initialisation
+	report = dict()
+	faces = mesh.faces
+	report[ 'Vertex number' ] = mesh.vertex_number
+	report[ 'Face number' ] = mesh.face_number
+	# Isolated vertices
+	used = np.bincount( faces.reshape( -1 ), minlength=mesh.vertex_number ) > 0
+	report[ 'Isolated vertices' ] = np.flatnonzero( ~used )
+	# Duplicated vertices (same position as a previous vertex)
+	( keys, first, labels, mode ) = UniqueRows( mesh.vertices + 0.0 )
+	report[ 'Duplicated vertices' ] = np.flatnonzero( first[ labels ] != np.arange( mesh.vertex_number ) )
+	# Degenerated faces
+	report[ 'Degenerated faces' ] = np.flatnonzero( GetDegeneratedFaces( mesh ) )
+	# Half-edge table
+	( edges, labels, counts, twins ) = mtk.GetHalfEdges( faces, mesh.vertex_number )
+	report[ 'Edge number' ] = len( edges )
+	# Non-manifold edges
+	report[ 'Non-manifold edges' ] = edges[ counts > 2 ]
+	# Manifold edges with two half-edges in the same direction
+	inconsistent = np.flatnonzero( ( counts[ labels ] == 2 ) & ( twins < 0 ) )
+	inconsistent = inconsistent[ np.argsort( labels[ inconsistent ], kind='stable' ) ]
+	report[ 'Inconsistent edges' ] = edges[ labels[ inconsistent[ 0::2 ] ] ]
+	# Pairs of half-edges of the manifold edges, in opposite directions (h1, h2) or in the same direction (h3, h4)
+	h1 = np.flatnonzero( twins > np.arange( len( twins ) ) )
+	h2 = twins[ h1 ]
+	( h3, h4 ) = ( inconsistent[ 0::2 ], inconsistent[ 1::2 ] )
+	# Link the face corners of each vertex across the manifold edges
+	# (the corner i is the vertex faces[i//3, i%3], the half-edge i goes from the corner i to the next corner)
+	following = np.arange( 3 * mesh.face_number )
+	following += 1 - 3 * ( following % 3 == 2 )
+	corners = UnionFind( 3 * mesh.face_number, np.concatenate( ( h1, following[ h1 ], h3, following[ h3 ] ) ),
+		np.concatenate( ( following[ h2 ], h2, h4, following[ h4 ] ) ) )
+	# Count the fans of faces around each vertex
+	fan_vertices = np.empty( corners.max() + 1 if len( corners ) else 0, dtype=np.intp )
+	fan_vertices[ corners ] = faces.reshape( -1 )
+	report[ 'Non-manifold vertices' ] = np.flatnonzero( np.bincount( fan_vertices, minlength=mesh.vertex_number ) > 1 )
+	# Border loops (connected border edges)
+	border = edges[ counts == 1 ]
+	( border_vertices, border ) = np.unique( border, return_inverse=True )
+	border = border.reshape( -1, 2 )
+	loops = UnionFind( len( border_vertices ), border[:,0], border[:,1] )
+	report[ 'Border loops' ] = int( loops.max() + 1 ) if len( loops ) else 0
+	# Connected components with faces
+	report[ 'Components' ] = int( np.count_nonzero( np.bincount( GetConnectedComponents( mesh )[0] ) ) )
+	# Euler characteristic of the surface (without the isolated vertices)
+	characteristic = int( np.count_nonzero( used ) ) - len( edges ) + mesh.face_number
+	report[ 'Euler characteristic' ] = characteristic
+	# Genus of a manifold surface ( 2 * ( components - genus ) - border loops = Euler characteristic )
+	report[ 'Genus' ] = None
+	if not len( report[ 'Non-manifold edges' ] ) and not len( report[ 'Non-manifold vertices' ] ) :
+		report[ 'Genus' ] = ( 2 * report[ 'Components' ] - report[ 'Border loops' ] - characteristic ) // 2
+	# Return the report
+	return report
+
 # Remove the isolated vertices in a given mesh
-# TODO : process colors and texture coordinates
 def RemoveIsolatedVertices( mesh ) :
 	# Register isolated vertices
-	isolated_vertices = (np.array([len(neighbor) for neighbor in mesh.neighbor_faces]) == 0)
-	# Pouet
-#	isolated_vertices = zeros( len(self.vertices) )
-#	isolated_vertices[ self.faces[:,0] ] += 1
-#	isolated_vertices[ self.faces[:,1] ] += 1
-#	isolated_vertices[ self.faces[:,2] ] += 1
-#	if any( isolated_vertices == 0 ) : print( "Isolated vertices" )
+	isolated_vertices = np.bincount( mesh.faces.reshape( -1 ), minlength=mesh.vertex_number ) == 0
 	# Do nothing if there is no isolated vertex
 	if not isolated_vertices.any() : return
-	# Create the new vertex array and a lookup table
-	new_vertices = []
-	index = 0
-	lut = np.zeros( mesh.vertex_number, dtype=int )
-	for ( v, isolated ) in enumerate( isolated_vertices ) :
-		if isolated : continue
-		new_vertices.append( mesh.vertices[v] )
-		lut[v] = index
-		index += 1
-	# Create a new face array
-	new_faces = lut[mesh.faces].reshape( len(mesh.faces), 3 )
-	# Update the mesh
-	mesh.vertices = np.array( new_vertices )
-	mesh.faces = new_faces
-	mesh.UpdateNormals()
+	# Remove the isolated vertices
+	CompactVertices( mesh, ~isolated_vertices )
+
+# Keep only the selected vertices of a given mesh
+# The faces using a removed vertex are removed
+# Return the lookup table from the old vertex indices to the new ones (-1 for the removed vertices)
+def CompactVertices( mesh, keep_mask ) :
+	# Create the lookup table
+	keep_mask = np.asarray( keep_mask, dtype=bool )
+	lut = np.cumsum( keep_mask ) - 1
+	lut[ ~keep_mask ] = -1
+	# Remove the faces using a removed vertex
+	if mesh.face_number :
+		kept = keep_mask[ mesh.faces ]
+		CompactFaces( mesh, kept[:,0] & kept[:,1] & kept[:,2] )
+	# Remap the face indices
+	mesh.faces = lut[ mesh.faces ]
+	# Remove the vertices and their attributes (compress is faster than a boolean index on the rows)
+	if mesh.color_number == mesh.vertex_number : mesh.colors = np.compress( keep_mask, mesh.colors, axis=0 )
+	if mesh.texture_number == mesh.vertex_number : mesh.textures = np.compress( keep_mask, mesh.textures, axis=0 )
+	if mesh.vertex_normal_number == mesh.vertex_number : mesh.vertex_normals = np.compress( keep_mask, mesh.vertex_normals, axis=0 )
+	mesh.vertices = np.compress( keep_mask, mesh.vertices, axis=0 )
+	# Return the lookup table
+	return lut
+
+# Keep only the selected faces of a given mesh
+def CompactFaces( mesh, keep_mask ) :
+	# Do nothing if every face is kept
+	keep_mask = np.asarray( keep_mask, dtype=bool )
+	if keep_mask.all() : return
+	# Remove the faces and their normals
+	if mesh.face_normal_number == mesh.face_number : mesh.face_normals = np.compress( keep_mask, mesh.face_normals, axis=0 )
+	mesh.faces = np.compress( keep_mask, mesh.faces, axis=0 )
 
 # Remove the degenerated faces of a given mesh
+# (faces with a repeated vertex index, or a null area)
 def RemoveDegeneratedFaces( mesh ) :
-	tris = mesh.vertices[ mesh.faces ]
-	face_normals = np.cross( tris[::,1] - tris[::,0]  , tris[::,2] - tris[::,0] )
-	print (np.sqrt((face_normals**2).sum(axis=1))>0).all()
+	# Remove the degenerated faces
+	CompactFaces( mesh, ~GetDegeneratedFaces( mesh ) )
+
+# Find the degenerated faces of a given mesh
+# (faces with a repeated vertex index, or a null area)
+def GetDegeneratedFaces( mesh ) :
+	# Faces with a repeated vertex index
+	faces = mesh.faces
+	degenerated = ( faces[:,0] == faces[:,1] ) | ( faces[:,1] == faces[:,2] ) | ( faces[:,2] == faces[:,0] )
+	# Faces with a null area (null cross product of two face edges)
+	u = mesh.vertices[ faces[:,1] ] - mesh.vertices[ faces[:,0] ]
+	v = mesh.vertices[ faces[:,2] ] - mesh.vertices[ faces[:,0] ]
+	degenerated |= ( u[:,1] * v[:,2] == u[:,2] * v[:,1] ) & ( u[:,2] * v[:,0] == u[:,0] * v[:,2] ) & ( u[:,0] * v[:,1] == u[:,1] * v[:,0] )
+	# Return the degenerated face mask
+	return degenerated
+
+# Remove the duplicated faces of a given mesh
+# (faces with the same vertices in any order, the first face is kept)
+def RemoveDuplicatedFaces( mesh ) :
+	# Do nothing if there is no face
+	if not mesh.face_number : return
+	# Sort the vertex indices of each face
+	faces = np.sort( mesh.faces, axis=1 )
+	# Find the unique faces (pack the indices in a 64-bit integer if possible)
+	grid_size = [ mesh.vertex_number ] * 3
+	( keys, first, labels, mode ) = UniqueRows( faces, 'pack' if mesh.vertex_number ** 3 < 2 ** 63 else 'hash', grid_size )
+	# Keep the first face of each set of duplicated faces
+	keep_mask = np.zeros( mesh.face_number, dtype=bool )
+	keep_mask[ first ] = True
+	CompactFaces( mesh, keep_mask )
+
+# Label the connected components of a given mesh (faces linked by their vertices)
+# Return the component label of every face and every vertex, and the component number
+# Each isolated vertex is a component without face
+def GetConnectedComponents( mesh ) :
+	# Link the vertices of every face
+	vertex_labels = UnionFind( mesh.vertex_number, *mesh.faces.T )
+	# Label the faces with the component of their first vertex
+	face_labels = vertex_labels[ mesh.faces[:,0] ]
+	# Return the component labels
+	return ( face_labels, vertex_labels, vertex_labels.max() + 1 if mesh.vertex_number else 0 )
+
+# Remove the connected components with less than a given number of faces, or a smaller area than a given area
+def RemoveSmallComponents( mesh, min_faces = 0, min_area = 0.0 ) :
+	# Label the connected components
+	( face_labels, vertex_labels, number ) = GetConnectedComponents( mesh )
+	# Select the components with enough faces
+	keep = np.bincount( face_labels, minlength=number ) >= min_faces
+	# Select the components with a large enough area
+	if min_area > 0 :
+		keep &= np.bincount( face_labels, GetFaceAreas( mesh.vertices, mesh.faces ), minlength=number ) >= min_area
+	# Do nothing if every component is kept
+	if keep.all() : return
+	# Remove the small components
+	CompactVertices( mesh, keep[ vertex_labels ] )
+
+# Compute the area of the given faces
+def GetFaceAreas( vertices, faces ) :
+	# Half the norm of the cross product of two face edges
+	tris = vertices[ faces ]
+	return np.sqrt( ( np.cross( tris[:,1] - tris[:,0], tris[:,2] - tris[:,0] ) ** 2 ).sum( axis=1 ) ) / 2
+
+# Merge the vertices of a given mesh closer than a given tolerance
+# (e.g. triangle soups with vertices duplicated in every face)
+# The vertices closer than the tolerance are merged transitively (chains of close vertices are merged together)
+def WeldVertices( mesh, tolerance = 0.0 ) :
+	# Find the unique vertex positions (adding zero removes negative zeros)
+	( keys, first, labels, mode ) = UniqueRows( mesh.vertices + 0.0 )
+	# Merge the unique positions closer than the given tolerance
+	if tolerance > 0 and len( first ) :
+		( close_first, close_second ) = GetClosePairs( mesh.vertices[ first ], tolerance )
+		labels = UnionFind( len( first ), close_first, close_second )[ labels ]
+	# Number of vertices after the merge
+	vertex_number = labels.max() + 1 if len( labels ) else 0
+	# Do nothing if there is no vertex to merge
+	if vertex_number == mesh.vertex_number : return
+	# Merge the vertex positions (exact duplicates are kept as is, close vertices are averaged)
+	if tolerance <= 0 : mesh.vertices = mesh.vertices[ first ]
+	else : mesh.vertices = MergeRows( mesh.vertices, labels, vertex_number )
+	# Average the other vertex attributes
+	if mesh.color_number == len( labels ) :
+		mesh.colors = MergeRows( mesh.colors, labels, vertex_number )
+	if mesh.texture_number == len( labels ) :
+		mesh.textures = MergeRows( mesh.textures, labels, vertex_number )
+	if mesh.vertex_normal_number == len( labels ) :
+		normals = MergeRows( mesh.vertex_normals, labels, vertex_number )
+		lengths = np.sqrt( ( normals ** 2 ).sum( axis=1 ) )
+		# The opposite normals cancel out : use the normal of one of the merged vertices instead
+		cancelled = lengths < 1e-9
+		if cancelled.any() :
+			source = np.empty( vertex_number, dtype=np.intp )
+			source[ labels ] = np.arange( len( labels ) )
+			normals[ cancelled ] = mesh.vertex_normals[ source[ cancelled ] ]
+			lengths[ cancelled ] = np.sqrt( ( normals[ cancelled ] ** 2 ).sum( axis=1 ) )
+		# Normalize the merged normals (the null normals stay null)
+		lengths[ lengths == 0 ] = 1
+		mesh.vertex_normals = normals / lengths.reshape( -1, 1 )
+	# Remap the face indices
+	mesh.faces = labels[ mesh.faces ]
+
+# Find the pairs of points closer than a given tolerance
+# The points are sorted into the cells of a grid with a cell size of the tolerance,
+# and the points of each cell are compared to the points of the same cell and of the neighbor cells
+# Return the indices of the two points of each pair
+def GetClosePairs( points, tolerance ) :
+	# Quantize the point positions onto the grid
+	# (shifted by one cell so that the neighbor cells have positive coordinates)
+	cells = np.floor( ( points - points.min( axis=0 ) ) / tolerance ).astype( np.int64 ) + 1
+	# Grid size (including the neighbor cells)
+	grid_size = cells.max( axis=0 ) + 2
+	# Find the occupied cells (packed cell coordinates if the grid is small enough, hashed otherwise)
+	mode = 'pack' if np.prod( grid_size.astype( float ) ) < 2 ** 63 else 'hash'
+	( keys, first, cell_labels, mode ) = UniqueRows( cells, mode, grid_size )
+	cell_coordinates = cells[ first ]
+	# Sort the points by cell
+	order = np.argsort( cell_labels, kind='stable' )
+	sorted_points = points[ order ]
+	counts = np.bincount( cell_labels, minlength=len( keys ) )
+	starts = np.cumsum( counts ) - counts
+	# Compare the points of each cell with the points of the same cell and of half of the neighbor cells (the other half is symmetric)
+	first_points = []
+	second_points = []
+	for offset in np.array( np.meshgrid( [-1, 0, 1], [-1, 0, 1], [-1, 0, 1], indexing='ij' ) ).reshape( 3, -1 ).T[ 13: ] :
+		# Look for the neighbor cell among the occupied cells
+		# (the packed keys of the neighbor cells are shifted by a constant)
+		if mode == 'pack' :
+			neighbor_keys = keys + int( ( offset[0] * grid_size[1] + offset[1] ) * grid_size[2] + offset[2] )
+			neighbors = np.minimum( np.searchsorted( keys, neighbor_keys ), len( keys ) - 1 )
+			found = keys[ neighbors ] == neighbor_keys
+		else :
+			neighbor_coordinates = cell_coordinates + offset
+			neighbors = np.searchsorted( keys, GetRowKeys( neighbor_coordinates, mode, grid_size ) )
+			neighbors[ neighbors == len( keys ) ] = 0
+			found = ( cell_coordinates[ neighbors ] == neighbor_coordinates ).all( axis=1 )
+		( a, b ) = ( np.flatnonzero( found ), neighbors[ found ] )
+		# Every pair of points between the two cells
+		pair_numbers = counts[ a ] * counts[ b ]
+		pair_cells = np.repeat( np.arange( len( a ) ), pair_numbers )
+		local_index = np.arange( pair_numbers.sum() ) - np.repeat( np.cumsum( pair_numbers ) - pair_numbers, pair_numbers )
+		( a, b ) = ( a[ pair_cells ], b[ pair_cells ] )
+		( row, column ) = np.divmod( local_index, counts[ b ] )
+		# Count each pair of the same cell once
+		if not offset.any() :
+			( a, b, row, column ) = ( a[ row < column ], b[ row < column ], row[ row < column ], column[ row < column ] )
+		# Keep the pairs closer than the tolerance (indices in the sorted points)
+		( i, j ) = ( starts[ a ] + row, starts[ b ] + column )
+		close = ( ( sorted_points[ i ] - sorted_points[ j ] ) ** 2 ).sum( axis=1 ) <= tolerance ** 2
+		first_points.append( order[ i[ close ] ] )
+		second_points.append( order[ j[ close ] ] )
+	# Return the close pairs
+	return ( np.concatenate( first_points ), np.concatenate( second_points ) )
+
+# Average the rows of an array that share the same label
+def MergeRows( rows, labels, number ) :
+	# Number of rows per label
+	count = np.bincount( labels, minlength=number ).reshape( -1, 1 )
+	# Sum each column per label
+	merged = np.array( [ np.bincount( labels, rows[:, i], minlength=number ) for i in range( rows.shape[1] ) ] ).T
+	# Return the average of the rows
+	return merged / count
+
+# Find the unique rows of a 2D array
+# Return the sorted row keys, the first row of each key, the key label of every row, and the key mode
+def UniqueRows( rows, mode = 'hash', grid_size = None ) :
+	# Compute the row keys
+	keys = GetRowKeys( rows, mode, grid_size )
+	# Sort the keys
+	order = np.argsort( keys, kind='stable' ) if mode == 'bytes' else ArgsortKeys( keys )
+	sorted_keys = keys[ order ]
+	# Find where each new key begins in the sorted keys
+	start = np.ones( len( keys ), dtype=bool )
+	start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+	# Label the rows with the index of their key
+	labels = np.empty( len( keys ), dtype=np.intp )
+	labels[ order ] = np.cumsum( start ) - 1
+	first = order[ start ]
+	# Hash collision (very unlikely, different rows sharing a key), use the raw row bytes instead
+	# (the rows sharing a key are consecutive once sorted, each one is compared with the previous one)
+	if mode == 'hash' :
+		same = np.flatnonzero( ~start )
+		if ( rows[ order[ same ] ] != rows[ order[ same - 1 ] ] ).any() : return UniqueRows( rows, 'bytes' )
+	# Return the unique row informations
+	return ( sorted_keys[ start ], first, labels, mode )
+
+# Convert each row of a 2D array into a single sortable key
+#   'pack'  : positive integer coordinates lower than the grid size packed into a 64-bit integer
+#   'hash'  : 64-bit hash of the row values (may collide)
+#   'bytes' : raw bytes of the row
+def GetRowKeys( rows, mode = 'hash', grid_size = None ) :
+	# Pack the coordinates
+	if mode == 'pack' :
+		keys = np.zeros( len( rows ), dtype=np.int64 )
+		for i in range( rows.shape[1] ) :
+			keys = keys * int( grid_size[i] ) + rows[:, i]
+		return keys
+	# Get the raw row data
+	rows = np.ascontiguousarray( rows )
+	# Hash the row values (SplitMix64 mixing of each 32-bit or 64-bit value)
+	# The collisions are detected by UniqueRows
+	if mode == 'hash' and rows.dtype.itemsize in ( 4, 8 ) :
+		words = rows.view( np.uint32 if rows.dtype.itemsize == 4 else np.uint64 )
+		keys = np.zeros( len( rows ), dtype=np.uint64 )
+		for i in range( words.shape[1] ) :
+			keys ^= words[:, i] + np.uint64( 0x9e3779b97f4a7c15 )
+			keys ^= keys >> np.uint64( 30 )
+			keys *= np.uint64( 0xbf58476d1ce4e5b9 )
+			keys ^= keys >> np.uint64( 27 )
+			keys *= np.uint64( 0x94d049bb133111eb )
+			keys ^= keys >> np.uint64( 31 )
+		return keys
+	# View each row as a raw byte string
+	return rows.view( np.dtype( ( np.void, rows.dtype.itemsize * rows.shape[1] ) ) ).reshape( -1 )
+
+# Stable argsort of positive integer keys
+# Faster than the default argsort by sorting the keys packed with their index
+def ArgsortKeys( keys ) :
+	# Use unsigned keys
+	keys = keys.astype( np.uint64 )
+	if not len( keys ) : return np.arange( 0 )
+	# Number of bits needed to store the indices
+	bits = max( 1, int( len( keys ) - 1 ).bit_length() )
+	# Keep only the highest bits of the keys above the indices
+	shift = max( 0, int( keys.max() ).bit_length() - ( 64 - bits ) )
+	packed = np.sort( ( ( keys >> np.uint64( shift ) ) << np.uint64( bits ) ) | np.arange( len( keys ), dtype=np.uint64 ) )
+	# Extract the indices
+	order = ( packed & np.uint64( 2 ** bits - 1 ) ).astype( np.intp )
+	# Truncated keys
+	if shift :
+		# Find the groups of keys sharing the same highest bits but not the same key
+		prefix = packed >> np.uint64( bits )
+		sorted_keys = keys[ order ]
+		clash = ( prefix[1:] == prefix[:-1] ) & ( sorted_keys[1:] != sorted_keys[:-1] )
+		if clash.any() :
+			# Select every key in these groups
+			groups = np.cumsum( np.concatenate( ( [ 0 ], prefix[1:] != prefix[:-1] ) ) )
+			selected = np.zeros( groups[-1] + 1, dtype=bool )
+			selected[ groups[1:][ clash ] ] = True
+			selection = np.flatnonzero( selected[ groups ] )
+			# Sort them according to their whole key
+			order[ selection ] = order[ selection ][ np.argsort( sorted_keys[ selection ], kind='stable' ) ]
+	# Return the sorted key indices
+	return order
+
+# Label the connected components of a graph whose nodes are linked by the given index arrays
+# (the nodes links[0][i], links[1][i], ... are linked together, e.g. the edges of a graph or the faces of a mesh)
+# using a vectorized union-find (hooking and pointer jumping)
+# The nodes always point to a smaller node, so the trees are compressed by blocks of nodes in increasing order
+def UnionFind( number, *links, block_size = 4096 ) :
+	# Initially, each node is its own root
+	labels = np.arange( number )
+	while len( links[0] ) :
+		# Hook the roots of each link onto the smallest one
+		smallest = links[0]
+		for nodes in links[ 1: ] : smallest = np.minimum( smallest, nodes )
+		for nodes in links : np.minimum.at( labels, nodes, smallest )
+		# Point every node to its root (the nodes of the previous blocks already point to their root)
+		for start in range( 0, number, block_size ) :
+			block = labels[ start : start + block_size ]
+			while True :
+				parents = labels[ block ]
+				if ( parents == block ).all() : break
+				block[:] = parents
+		# Get the new roots of the linked nodes, and keep the links between different trees
+		links = [ labels[ nodes ] for nodes in links ]
+		linked = np.zeros( len( links[0] ), dtype=bool )
+		for nodes in links[ 1: ] : linked |= nodes != links[0]
+		links = [ nodes[ linked ] for nodes in links ]
+	# Number the roots consecutively (the roots are the smallest node of each component), and give their number to the other nodes
+	count = 0
+	for start in range( 0, number, block_size ) :
+		block = labels[ start : start + block_size ]
+		roots = block == np.arange( start, start + len( block ) )
+		block[ roots ] = np.arange( count, count + np.count_nonzero( roots ) )
+		count += np.count_nonzero( roots )
+		block[ ~roots ] = labels[ block[ ~roots ] ]
+	# Return the component labels
+	return labels
 
 # Invert the orientation of every face in a given mesh
 def InvertFacesOrientation( mesh ) :
@@ -102,3 +455,199 @@ def InvertFacesOrientation( mesh ) :
 	mesh.faces[ :, [0, 1, 2] ] = mesh.faces[ :, [1, 0, 2] ]
 	# Recompute face and vertex normals
 	mesh.UpdateNormals()
+
+# Orient the faces of a given mesh consistently
+# The orientation is propagated across the manifold edges of each connected component (breadth-first traversal),
+# then each component is turned outward (positive signed volume)
+def OrientFaces( mesh ) :
+	# Do nothing if there is no face
+	if not mesh.face_number : return
+	# Find the faces to flip to get a consistent orientation in each component
+	( flip, components ) = GetConsistentOrientation( mesh.faces, mesh.vertex_number )
+	component_number = components.max() + 1
+	# Compute the signed volume of every component relative to its center
+	#   det( a-c, b-c, d-c ) = det( a, b, d ) - c . ( ( b-a ) x ( d-a ) )
+	faces = mesh.faces.copy()
+	faces[ flip ] = faces[ flip ][ :, [1, 0, 2] ]
+	( a, b, d ) = ( mesh.vertices[ faces[:,0] ], mesh.vertices[ faces[:,1] ], mesh.vertices[ faces[:,2] ] )
+	normals = np.cross( b - a, d - a )
+	determinants = mtk.Dot( a, np.cross( b, d ) )
+	face_number = np.bincount( components, minlength=component_number )
+	volume = np.bincount( components, determinants, minlength=component_number )
+	for i in range( 3 ) :
+		center = np.bincount( components, a[:,i] + b[:,i] + d[:,i], minlength=component_number ) / ( 3 * face_number )
+		volume -= center * np.bincount( components, normals[:,i], minlength=component_number )
+	# Turn the components with a negative volume
+	flip ^= volume[ components ] < 0
+	# Do nothing if every face is well oriented
+	if not flip.any() : return
+	# Invert the orientation of the flipped faces
+	mesh.faces[ flip ] = mesh.faces[ flip ][ :, [1, 0, 2] ]
+	# Recompute face and vertex normals
+	mesh.UpdateNormals()
+
+# Find the faces to flip to orient consistently the faces of each connected component
+# The orientation of the first face of each component is kept
+# Return the faces to flip, and the component label of every face (faces linked by a manifold edge)
+def GetConsistentOrientation( faces, vertex_number ) :
+	# Get the half-edges grouped by edge
+	( labels, counts ) = mtk.GetHalfEdges( faces, vertex_number )[ 1 : 3 ]
+	order = ArgsortKeys( labels )
+	first = np.cumsum( counts ) - counts
+	# Link the faces of the manifold edges
+	pairs = first[ counts == 2 ]
+	( h1, h2 ) = ( order[ pairs ], order[ pairs + 1 ] )
+	# The faces must have opposite orientations if their half-edges go in the same direction
+	parity = faces.reshape( -1 )[ h1 ] == faces.reshape( -1 )[ h2 ]
+	( f1, f2 ) = ( h1 // 3, h2 // 3 )
+	# Create the face adjacency table (both directions)
+	source = np.concatenate( ( f1, f2 ) )
+	order = ArgsortKeys( source )
+	neighbors = np.concatenate( ( f2, f1 ) )[ order ]
+	parity = np.concatenate( ( parity, parity ) )[ order ]
+	offsets = np.zeros( len( faces ) + 1, dtype=np.intp )
+	offsets[ 1: ] = np.cumsum( np.bincount( source, minlength=len( faces ) ) )
+	# Label the connected components of faces, and start from the first face of each one
+	components = UnionFind( len( faces ), f1, f2 )
+	roots = np.full( components.max() + 1, len( faces ) )
+	np.minimum.at( roots, components, np.arange( len( faces ) ) )
+	# Breadth-first traversal of the faces from every root at once
+	flip = np.zeros( len( faces ), dtype=bool )
+	visited = np.zeros( len( faces ), dtype=bool )
+	visited[ roots ] = True
+	frontier = roots
+	slot = np.zeros( len( faces ), dtype=np.intp )
+	entries = np.arange( len( neighbors ) )
+	while len( frontier ) :
+		# Get the unvisited neighbors of the frontier faces
+		( owner, entry ) = mtk.GetRows( offsets, entries, frontier )
+		new = ~visited[ neighbors[ entry ] ]
+		( owner, entry ) = ( owner[ new ], entry[ new ] )
+		reached = neighbors[ entry ]
+		# Propagate the orientation
+		flip[ reached ] = flip[ frontier[ owner ] ] ^ parity[ entry ]
+		visited[ reached ] = True
+		# Create the next frontier without duplicated faces
+		slot[ reached ] = np.arange( len( reached ) )
+		frontier = reached[ slot[ reached ] == np.arange( len( reached ) ) ]
+	# Return the faces to flip and the components
+	return ( flip, components )
+
+# Fill the holes of a given mesh bounded by a border loop of at most a given number of edges
+# The holes are triangulated by ear clipping. If the fairing iteration number is not null,
+# the patches are refined and their new vertices are smoothed with uniform laplacian smoothing
+def FillHoles( mesh, max_edges, fairing = 0 ) :
+	# Get the border loops
+	( offsets, vertices ) = mtk.GetBorderLoops( mesh.faces, mesh.vertex_number )
+	# Select the small holes
+	sizes = np.diff( offsets )
+	holes = np.flatnonzero( ( sizes >= 3 ) & ( sizes <= max_edges ) )
+	# Do nothing if there is no hole to fill
+	if not len( holes ) : return
+	vertices = mtk.GetRows( offsets, vertices, holes )[1]
+	offsets = np.append( 0, np.cumsum( sizes[ holes ] ) )
+	# Triangulate the holes
+	patches = TriangulateLoops( mesh.vertices, offsets, vertices, mesh.faces )
+	# Refine and fair the patches
+	if fairing :
+		# Refine the patches until their faces are about as large as the mesh faces
+		vertex_number = mesh.vertex_number
+		target_area = GetFaceAreas( mesh.vertices, mesh.faces ).mean()
+		for i in range( 6 ) :
+			if GetFaceAreas( mesh.vertices, patches ).mean() < 2 * target_area : break
+			patches = RefinePatches( mesh, patches )
+		# Smooth the new vertices
+		mesh.faces = np.vstack( ( mesh.faces, patches ) )
+		mtk.UniformLaplacianSmoothing( mesh, fairing, 1.0, np.arange( mesh.vertex_number ) >= vertex_number )
+	# Add the patches to the mesh
+	else :
+		mesh.faces = np.vstack( ( mesh.faces, patches ) )
+	# Recompute face and vertex normals
+	mesh.UpdateNormals()
+
+# Triangulate the given loops of vertices by ear clipping
+# Every loop is processed at the same time, by cutting the ear with the smallest angle of each loop at each step
+# The ears creating a null area face, or an edge already in the given faces, are cut last
+# The loops are given in compressed rows, the faces are oriented in the opposite direction of the loops
+def TriangulateLoops( vertices, offsets, loop_vertices, faces = None ) :
+	# Initialisation
+	sizes = np.diff( offsets )
+	loops = np.repeat( np.arange( len( sizes ) ), sizes )
+	points = vertices[ loop_vertices ]
+	# Register the existing edges between the loop vertices
+	edge_keys = np.zeros( 0, dtype=np.int64 )
+	if faces is not None :
+		on_loop = np.zeros( len( vertices ), dtype=bool )
+		on_loop[ loop_vertices ] = True
+		edges = faces[ on_loop[ faces ].sum( axis=1 ) >= 2 ][ :, [ [0, 1], [1, 2], [2, 0] ] ].reshape( -1, 2 ).astype( np.int64 )
+		edge_keys = np.unique( edges.min( axis=1 ) * len( vertices ) + edges.max( axis=1 ) )
+	# Previous and next vertices in each loop
+	previous = np.arange( len( loop_vertices ) ) - 1
+	previous[ offsets[:-1] ] = offsets[1:] - 1
+	following = np.arange( len( loop_vertices ) ) + 1
+	following[ offsets[1:] - 1 ] = offsets[:-1]
+	# Normal of each loop (Newell's method, in the direction of the faces)
+	cross = np.cross( points, points[ following ] )
+	normals = np.empty( ( len( sizes ), 3 ) )
+	for j in range( 3 ) :
+		normals[:,j] = -np.bincount( loops, cross[:,j], minlength=len( sizes ) )
+	# Cut one ear of each loop with more than three vertices at each step
+	remaining = sizes.copy()
+	alive = np.ones( len( loop_vertices ), dtype=bool )
+	faces = []
+	while True :
+		# Candidate vertices
+		candidates = np.flatnonzero( alive & ( remaining[ loops ] > 3 ) )
+		if not len( candidates ) : break
+		# Compute the angle at each candidate vertex, and test its convexity
+		( a, v, b ) = ( points[ previous[ candidates ] ], points[ candidates ], points[ following[ candidates ] ] )
+		face_normals = np.cross( v - b, a - b )
+		angles = np.arctan2( np.sqrt( ( np.cross( a - v, b - v ) ** 2 ).sum( axis=1 ) ), mtk.Dot( a - v, b - v ) )
+		convex = mtk.Dot( face_normals, normals[ loops[ candidates ] ] ) > 0
+		angles[ ~convex ] = 2 * np.pi - angles[ ~convex ]
+		# Penalize the degenerated ears, and the ears creating an existing edge
+		( c, d ) = ( loop_vertices[ previous[ candidates ] ].astype( np.int64 ), loop_vertices[ following[ candidates ] ].astype( np.int64 ) )
+		keys = np.minimum( c, d ) * len( vertices ) + np.maximum( c, d )
+		found = np.minimum( np.searchsorted( edge_keys, keys ), max( 0, len( edge_keys ) - 1 ) )
+		invalid = ( ( face_normals ** 2 ).sum( axis=1 ) == 0 ) | ( c == d )
+		if len( edge_keys ) : invalid |= edge_keys[ found ] == keys
+		angles[ invalid ] += 4 * np.pi
+		# Select the vertex with the smallest angle in each loop
+		start = np.flatnonzero( np.append( True, loops[ candidates[1:] ] != loops[ candidates[:-1] ] ) )
+		smallest = np.minimum.reduceat( angles, start )
+		selected = np.flatnonzero( angles == np.repeat( smallest, np.diff( np.append( start, len( candidates ) ) ) ) )
+		selected = selected[ np.append( True, loops[ candidates[ selected[1:] ] ] != loops[ candidates[ selected[:-1] ] ] ) ]
+		ears = candidates[ selected ]
+		# Create the ear faces
+		faces.append( np.vstack( ( following[ ears ], ears, previous[ ears ] ) ).T )
+		# Remove the ear vertices from the loops
+		following[ previous[ ears ] ] = following[ ears ]
+		previous[ following[ ears ] ] = previous[ ears ]
+		alive[ ears ] = False
+		remaining[ loops[ ears ] ] -= 1
+	# Create the last face of each loop
+	last = np.flatnonzero( alive )
+	last = last[ np.append( True, loops[ last[1:] ] != loops[ last[:-1] ] ) ]
+	faces.append( np.vstack( ( following[ last ], last, previous[ last ] ) ).T )
+	# Return the faces
+	return loop_vertices[ np.vstack( faces ) ]
+
+# Refine the given patch faces of a mesh by inserting a vertex at the center of each face,
+# and flipping the inner edges of the patches (sqrt(3)-subdivision, the patch borders are kept)
+# The new vertices are added to the mesh, return the refined faces
+def RefinePatches( mesh, faces ) :
+	# Find the inner edges of the patches
+	twins = mtk.GetHalfEdges( faces, mesh.vertex_number )[3]
+	inner = twins >= 0
+	# Insert a vertex at the center of each face
+	centers = np.repeat( mesh.vertex_number + np.arange( len( faces ) ), 3 )
+	if mesh.color_number == mesh.vertex_number : mesh.colors = np.vstack( ( mesh.colors, mesh.colors[ faces ].mean( axis=1 ) ) )
+	if mesh.texture_number == mesh.vertex_number : mesh.textures = np.vstack( ( mesh.textures, mesh.textures[ faces ].mean( axis=1 ) ) )
+	mesh.vertices = np.vstack( ( mesh.vertices, mesh.vertices[ faces ].mean( axis=1 ) ) )
+	# Create a face from each half-edge of the patch borders to the face center
+	( origin, target ) = ( faces.reshape( -1 ), faces[ :, [ 1, 2, 0 ] ].reshape( -1 ) )
+	refined = np.vstack( ( origin, target, centers ) ).T
+	# Flip the inner edges (create a face from each inner half-edge origin to the centers of the two faces)
+	refined[ inner ] = np.vstack( ( origin[ inner ], centers[ twins[ inner ] ], centers[ inner ] ) ).T
+	# Return the refined faces
+	return refined
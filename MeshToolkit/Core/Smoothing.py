@@ -9,25 +9,33 @@ import numpy as np
 import MeshToolkit as mtk
 
 # Uniform laplacian
+# Only the vertices selected by the optional mask are moved
 # Based on :
 #   ...
-def UniformLaplacianSmoothing( mesh, iteration, diffusion ) :
-	# Convert neighbor list to numpy array for fancy indexing
-	neighbors =  [ np.array(list(v)) for v in mesh.neighbor_vertices ]
+def UniformLaplacianSmoothing( mesh, iteration, diffusion, mask = None ) :
+	# Get the mesh edges, and the number of faces of each edge
+	( edges, labels, counts, twins ) = mtk.GetHalfEdges( mesh.faces, mesh.vertex_number )
+	# Both directions of each edge
+	source = np.concatenate( ( edges[:,0], edges[:,1] ) )
+	destination = np.concatenate( ( edges[:,1], edges[:,0] ) )
 	# Get neighbor vertex number
-	neighbor_number = np.array( [ len(i) for i in neighbors ] ).reshape(-1,1)
-	# Get border vertices
-	border = mesh.GetBorderVertices()
-	# Iteration steps
+	neighbor_number = np.bincount( source, minlength=mesh.vertex_number )
+	# Don't change border vertices and isolated vertices
+	moving = neighbor_number > 0
+	moving[ edges[ counts == 1 ] ] = False
+	if mask is not None : moving &= mask
+	moving = np.flatnonzero( moving )
+	# Iteration steps
 	for i in range( iteration ) :
-		# Compute average position of neighbor vertices
-		displacement  = [ (mesh.vertices[neighbors[v]]).sum(axis=0) for v in range( len(mesh.vertices) ) ] / neighbor_number
+		# Compute average position of neighbor vertices
+		displacement = np.empty( ( len( moving ), 3 ) )
+		for j in range( 3 ) :
+			displacement[:,j] = np.bincount( source, mesh.vertices[ destination, j ], minlength=mesh.vertex_number )[ moving ]
+		displacement /= neighbor_number[ moving ].reshape( -1, 1 )
 		# Get the difference with the original center vertex
-		displacement -= mesh.vertices
-		# Don't change border vertices
-		displacement[ border ] = 0
-		# Update vertex position
-		mesh.vertices += diffusion * displacement
+		displacement -= mesh.vertices[ moving ]
+		# Update vertex position
+		mesh.vertices[ moving ] += diffusion * displacement
 
 # Normalized curvature flow smoothing
 # Based on :
@@ -0,0 +1,114 @@
+# -*- coding:utf-8 -*-
+
+#
+# Subdivide a triangular mesh
+# (Loop and midpoint schemes)
+#
+
+# Each face is split into four faces with a new vertex on each edge.
+# The new vertex positions are computed by applying the subdivision stencils directly on the vertex array,
+# with weighted sums over the edges (no subdivision matrix is built).
+# The colors and the texture coordinates are interpolated at the edge midpoints.
+# Based on :
+#   Smooth Subdivision Surfaces Based on Triangles
+#     Charles Loop, Master's thesis, University of Utah, 1987
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# Subdivide a given mesh several times
+#   'loop'     : Loop approximating scheme (the borders and the non-manifold edges are kept as creases)
+#   'midpoint' : linear scheme (the new vertices are at the edge midpoints)
+def Subdivide( mesh, levels = 1, scheme = 'loop' ) :
+	# Check the scheme
+	if scheme not in ( 'loop', 'midpoint' ) :
+		raise RuntimeError( 'Unknown subdivision scheme : {}'.format( scheme ) )
+	# Subdivision steps
+	for i in range( levels ) :
+		# Get the edges of the mesh, and the edge of each half-edge
+		vertex_number = mesh.vertex_number
+		( edges, labels, counts, twins ) = mtk.GetHalfEdges( mesh.faces, vertex_number )
+		# Interpolate the vertex attributes at the edge midpoints (keeping their type, e.g. 8-bit colors)
+		if mesh.color_number == vertex_number : mesh.colors = Interpolate( mesh.colors, edges )
+		if mesh.texture_number == vertex_number : mesh.textures = Interpolate( mesh.textures, edges )
+		# Compute the new vertex positions
+		if scheme == 'loop' : mesh.vertices = GetLoopVertices( mesh.vertices, mesh.faces, edges, labels, counts )
+		else : mesh.vertices = GetMidpointVertices( mesh.vertices, edges )
+		# Split each face into four faces
+		mesh.faces = SplitFaces( mesh.faces, labels, vertex_number )
+		# Free the half-edge table before the next level
+		del edges, labels, counts, twins
+	# Recompute face and vertex normals
+	mesh.UpdateNormals()
+
+# Interpolate a vertex attribute array at the edge midpoints, keeping its type
+def Interpolate( values, edges ) :
+	if np.issubdtype( values.dtype, np.integer ) : return np.round( GetMidpointVertices( values, edges ) ).astype( values.dtype )
+	return GetMidpointVertices( values, edges )
+
+# Split each face into four faces with the edge vertices
+# The vertex of the edge i is the vertex vertex_number + i
+def SplitFaces( faces, labels, vertex_number ) :
+	# Vertices of the faces
+	( a, b, c ) = ( faces[:,0], faces[:,1], faces[:,2] )
+	# Edge vertices (half-edges from a to b, b to c, and c to a)
+	( ab, bc, ca ) = ( vertex_number + labels.reshape( -1, 3 ) ).T
+	# Return the new faces (one per face corner, and the center face)
+	return np.vstack( ( np.vstack( ( a, ab, ca ) ).T, np.vstack( ( b, bc, ab ) ).T,
+		np.vstack( ( c, ca, bc ) ).T, np.vstack( ( ab, bc, ca ) ).T ) )
+
+# Compute the vertex values followed by the edge midpoint values
+def GetMidpointVertices( values, edges ) :
+	# Vertex values
+	vertex_number = len( values )
+	result = np.empty( ( vertex_number + len( edges ), ) + values.shape[1:] )
+	result[ :vertex_number ] = values
+	# Average of the two edge vertices
+	result[ vertex_number: ] = values[ edges[:,0] ]
+	result[ vertex_number: ] += values[ edges[:,1] ]
+	result[ vertex_number: ] *= 0.5
+	# Return the new values
+	return result
+
+# Compute the Loop subdivision of the vertices, followed by the new edge vertices
+def GetLoopVertices( vertices, faces, edges, labels, counts ) :
+	# Initialisation
+	vertex_number = len( vertices )
+	edge_number = len( edges )
+	result = np.empty( ( vertex_number + edge_number, 3 ) )
+	# Crease edges (borders and non-manifold edges), and number of crease edges of each vertex
+	crease = counts != 2
+	crease_number = np.bincount( edges[ crease ].reshape( -1 ), minlength=vertex_number )
+	# Valence of each vertex
+	valence = np.bincount( edges.reshape( -1 ), minlength=vertex_number )
+	# Weight of the neighbors of the inner vertices
+	with np.errstate( divide='ignore', invalid='ignore' ) :
+		beta = ( 5.0 / 8.0 - ( 3.0 / 8.0 + np.cos( 2.0 * np.pi / valence ) / 4.0 ) ** 2 ) / valence
+	beta[ ( crease_number > 0 ) | ( valence == 0 ) ] = 0
+	# Weight of the neighbors of the crease vertices (on exactly two crease edges, the other ones are kept)
+	beta[ crease_number == 2 ] = 1.0 / 8.0
+	# Vertex weights
+	weights = np.where( crease_number > 0, np.where( crease_number == 2, 3.0 / 4.0, 1.0 ), 1.0 - valence * beta )
+	# Neighbors of each vertex (only along the crease edges for the crease vertices)
+	source = []
+	destination = []
+	for ( i, j ) in ( ( 0, 1 ), ( 1, 0 ) ) :
+		neighbors = ( crease_number[ edges[:,i] ] == 0 ) | crease
+		source.append( edges[ neighbors, i ] )
+		destination.append( edges[ neighbors, j ] )
+	( source, destination ) = ( np.concatenate( source ), np.concatenate( destination ) )
+	neighbor_weights = beta[ source ]
+	# Edge vertex weights (3/8 for the inner edges, 1/2 for the crease edges)
+	edge_weights = np.where( crease, 0.5, 3.0 / 8.0 )
+	# Opposite vertex of each half-edge of the inner edges (weight 1/8)
+	inner = np.flatnonzero( ~crease[ labels ] )
+	opposite = faces.reshape( -1 )[ inner - inner % 3 + ( inner + 2 ) % 3 ]
+	inner = labels[ inner ]
+	# Apply the stencils on each coordinate
+	for j in range( 3 ) :
+		x = vertices[:,j]
+		result[ :vertex_number, j ] = weights * x + np.bincount( source, neighbor_weights * x[ destination ], minlength=vertex_number )
+		result[ vertex_number:, j ] = edge_weights * ( x[ edges[:,0] ] + x[ edges[:,1] ] ) + np.bincount( inner, x[ opposite ], minlength=edge_number ) / 8.0
+	# Return the new vertices
+	return result
@@ -0,0 +1,139 @@
+# -*- coding:utf-8 -*-
+
+#
+# Provide array-based topology tables of a triangular mesh
+# (half-edges, edges, vertex neighborhoods)
+#
+
+# The half-edge i is the edge going from the vertex faces[i//3, i%3] to the vertex faces[i//3, (i+1)%3].
+# Every table is stored in flat numpy arrays, the vertex neighborhoods are stored
+# in compressed rows (the items of the vertex v are items[ offsets[v] : offsets[v+1] ]).
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# Compute the half-edge table of the given faces
+# Return the edges (sorted vertex indices), the edge index of each half-edge,
+# the number of half-edges of each edge, and the twin of each half-edge (-1 if the edge is not manifold,
+# is on a border, or if the adjacent faces are not consistently oriented)
+def GetHalfEdges( faces, vertex_number ) :
+	# Origin and target vertices of the half-edges
+	origin = faces.reshape( -1 ).astype( np.int64 )
+	target = faces[ :, [ 1, 2, 0 ] ].reshape( -1 ).astype( np.int64 )
+	# Identify the undirected edges by a key
+	keys = np.minimum( origin, target ) * vertex_number + np.maximum( origin, target )
+	# Group the half-edges of each edge
+	order = mtk.ArgsortKeys( keys )
+	sorted_keys = keys[ order ]
+	start = np.ones( len( keys ), dtype=bool )
+	start[ 1: ] = sorted_keys[ 1: ] != sorted_keys[ :-1 ]
+	# Label the half-edges with their edge index
+	labels = np.empty( len( keys ), dtype=np.intp )
+	labels[ order ] = np.cumsum( start ) - 1
+	# Edge vertices, and half-edge number of each edge
+	first = np.flatnonzero( start )
+	edges = np.vstack( ( sorted_keys[ first ] // vertex_number, sorted_keys[ first ] % vertex_number ) ).T
+	counts = np.diff( np.append( first, len( keys ) ) )
+	# Link the half-edges of the manifold edges in opposite directions
+	twins = np.full( len( keys ), -1, dtype=np.intp )
+	pairs = first[ counts == 2 ]
+	( h1, h2 ) = ( order[ pairs ], order[ pairs + 1 ] )
+	opposite = origin[ h1 ] == target[ h2 ]
+	twins[ h1[ opposite ] ] = h2[ opposite ]
+	twins[ h2[ opposite ] ] = h1[ opposite ]
+	# Return the half-edge table
+	return ( edges, labels, counts, twins )
+
+# Compute the faces around every vertex
+# Return the compressed row offsets and the face indices
+def GetVertexFaces( faces, vertex_number ) :
+	# Sort the face corners by vertex
+	order = mtk.ArgsortKeys( faces.reshape( -1 ) )
+	offsets = np.zeros( vertex_number + 1, dtype=np.intp )
+	offsets[ 1: ] = np.cumsum( np.bincount( faces.reshape( -1 ), minlength=vertex_number ) )
+	# Return the faces around each vertex
+	return ( offsets, order // 3 )
+
+# Compute the neighbor vertices of every vertex from the edges
+# Return the compressed row offsets and the neighbor indices
+def GetVertexNeighbors( edges, vertex_number ) :
+	# Both directions of each edge
+	source = np.concatenate( ( edges[:,0], edges[:,1] ) )
+	destination = np.concatenate( ( edges[:,1], edges[:,0] ) )
+	# Sort the edges by source vertex
+	order = mtk.ArgsortKeys( source )
+	offsets = np.zeros( vertex_number + 1, dtype=np.intp )
+	offsets[ 1: ] = np.cumsum( np.bincount( source, minlength=vertex_number ) )
+	# Return the neighbors of each vertex
+	return ( offsets, destination[ order ] )
+
+# Gather the compressed rows of the given vertices
+# Return the index of the vertex owning each item, and the items
+def GetRows( offsets, items, vertices ) :
+	# Item number of each vertex
+	count = offsets[ vertices + 1 ] - offsets[ vertices ]
+	# Repeat each vertex for each of its items
+	owner = np.repeat( np.arange( len( vertices ) ), count )
+	# Position of each item in its row
+	position = np.arange( len( owner ) ) - np.repeat( np.cumsum( count ) - count, count )
+	# Return the row owner and the items
+	return ( owner, items[ offsets[ vertices ][ owner ] + position ] )
+
+# Extract the border loops of the given faces
+# Each border half-edge is chained to the outgoing border half-edge of the next fan of faces around its target vertex
+# (the fans of a vertex are taken in index order, the chains passing through a non-manifold edge are discarded)
+# Return the compressed row offsets and the vertices of each loop, in the direction of the border half-edges
+def GetBorderLoops( faces, vertex_number ) :
+	# Get the border half-edges
+	( edges, labels, counts, twins ) = GetHalfEdges( faces, vertex_number )
+	border = np.flatnonzero( counts[ labels ] == 1 )
+	origin = faces.reshape( -1 )[ border ]
+	target = faces[ :, [ 1, 2, 0 ] ].reshape( -1 )[ border ]
+	number = len( border )
+	# Turn around the target vertex of each border half-edge, from face to face,
+	# until the outgoing border half-edge of the same fan
+	half_edges = border + 1 - 3 * ( border % 3 == 2 )
+	turning = np.flatnonzero( twins[ half_edges ] >= 0 )
+	while len( turning ) :
+		following = twins[ half_edges[ turning ] ]
+		half_edges[ turning ] = following + 1 - 3 * ( following % 3 == 2 )
+		turning = turning[ twins[ half_edges[ turning ] ] >= 0 ]
+	# Index of the outgoing half-edge in the border half-edges (-1 if it is not a border)
+	lut = np.full( len( labels ), -1, dtype=np.intp )
+	lut[ border ] = np.arange( number )
+	outgoing = lut[ half_edges ]
+	# Chain each half-edge to the outgoing half-edge of the next fan around its target vertex
+	order = mtk.ArgsortKeys( target )
+	next_fan = np.arange( 1, number + 1 )
+	last = np.flatnonzero( np.append( target[ order[ 1: ] ] != target[ order[ :-1 ] ], True ) )
+	next_fan[ last ] = np.append( 0, last[ :-1 ] + 1 )
+	following = np.empty( number, dtype=np.intp )
+	following[ order ] = outgoing[ order[ next_fan ] ]
+	# Find the smallest half-edge of each chain, and the open chains, by pointer jumping
+	start = np.arange( number )
+	opened = following < 0
+	step = following.copy()
+	for i in range( max( 1, int( number ).bit_length() ) ) :
+		valid = np.flatnonzero( step >= 0 )
+		start[ valid ] = np.minimum( start[ valid ], start[ step[ valid ] ] )
+		opened[ valid ] |= opened[ step[ valid ] ]
+		step[ valid ] = step[ step[ valid ] ]
+	# Keep the closed loops
+	closed = np.flatnonzero( ~opened )
+	# Cut each loop before its starting half-edge, and compute the distance of each half-edge to the loop end
+	step = following.copy()
+	step[ closed[ following[ closed ] == start[ closed ] ] ] = -1
+	distance = ( step >= 0 ).astype( np.intp )
+	for i in range( max( 1, int( number ).bit_length() ) ) :
+		valid = np.flatnonzero( step >= 0 )
+		distance[ valid ] += distance[ step[ valid ] ]
+		step[ valid ] = step[ step[ valid ] ]
+	# Sort the half-edges by loop, then from the start to the end of the loop
+	closed = closed[ mtk.ArgsortKeys( start[ closed ] * number + ( number - 1 - distance[ closed ] ) ) ]
+	# Compressed row offsets of the loops
+	first = np.ones( len( closed ), dtype=bool )
+	first[ 1: ] = start[ closed[ 1: ] ] != start[ closed[ :-1 ] ]
+	offsets = np.append( np.flatnonzero( first ), len( closed ) )
+	# Return the loop vertices
+	return ( offsets, origin[ closed ] )
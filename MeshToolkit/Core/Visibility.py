@@ -0,0 +1,71 @@
+# -*- coding:utf-8 -*-
+
+#
+# Provide some visibility analysis functions based on ray casting
+# (ambient occlusion, thickness)
+#
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# Compute the ambient occlusion of every vertex
+# by casting rays in the hemisphere around the vertex normal (cosine-weighted directions)
+# Return the fraction of the rays not hitting the mesh within max_distance (1 for fully visible vertices)
+def GetAmbientOcclusion( mesh, ray_number = 32, max_distance = np.inf, bvh = None, seed = 0 ) :
+	# Initialisation
+	if mesh.vertex_normal_number != mesh.vertex_number : mesh.UpdateNormals()
+	if bvh is None : bvh = mtk.Bvh( mesh )
+	normals = mesh.vertex_normals
+	random = np.random.RandomState( seed )
+	# Small offset to avoid self-intersections
+	epsilon = GetRayOffset( mesh )
+	origins = mesh.vertices + epsilon * normals
+	# Tangent frame of every vertex normal
+	( tangents, bitangents ) = GetTangentFrames( normals )
+	# Number of visible rays of each vertex
+	visible = np.zeros( mesh.vertex_number )
+	# Cast one ray per vertex at a time
+	for i in range( ray_number ) :
+		# Cosine-weighted random direction in the hemisphere
+		( r1, r2 ) = ( random.random_sample( mesh.vertex_number ), random.random_sample( mesh.vertex_number ) )
+		( radius, angle ) = ( np.sqrt( r1 ), 2.0 * np.pi * r2 )
+		directions  = ( radius * np.cos( angle ) ).reshape( -1, 1 ) * tangents
+		directions += ( radius * np.sin( angle ) ).reshape( -1, 1 ) * bitangents
+		directions += np.sqrt( 1.0 - r1 ).reshape( -1, 1 ) * normals
+		# Count the rays without hit
+		visible += bvh.CastRays( origins, directions, epsilon, max_distance )[0] < 0
+	# Return the visible fraction
+	return visible / ray_number
+
+# Compute the thickness of the mesh at every vertex
+# by casting a ray in the opposite direction of the vertex normal
+# Return the distance to the first hit (0 if the ray does not hit the mesh)
+def GetThickness( mesh, bvh = None ) :
+	# Initialisation
+	if mesh.vertex_normal_number != mesh.vertex_number : mesh.UpdateNormals()
+	if bvh is None : bvh = mtk.Bvh( mesh )
+	# Small offset to avoid self-intersections
+	epsilon = GetRayOffset( mesh )
+	# Cast the rays inside the mesh
+	thickness = bvh.CastRays( mesh.vertices - epsilon * mesh.vertex_normals, -mesh.vertex_normals, epsilon )[1]
+	# Discard the rays without hit
+	thickness[ ~np.isfinite( thickness ) ] = 0
+	# Return the thickness
+	return thickness
+
+# Compute a small ray offset relative to the mesh size
+def GetRayOffset( mesh ) :
+	return 1e-6 * np.sqrt( ( ( mesh.vertices.max( axis=0 ) - mesh.vertices.min( axis=0 ) ) ** 2 ).sum() )
+
+# Compute two unit vectors orthogonal to every given unit vector
+def GetTangentFrames( normals ) :
+	# Choose the axis the least aligned with each normal
+	axis = np.zeros( normals.shape )
+	axis[ np.arange( len( normals ) ), np.argmin( np.abs( normals ), axis=1 ) ] = 1
+	# Build the tangent frames
+	tangents = np.cross( normals, axis )
+	tangents /= np.sqrt( ( tangents ** 2 ).sum( axis=1 ) ).reshape( -1, 1 )
+	bitangents = np.cross( normals, tangents )
+	# Return the tangent frames
+	return ( tangents, bitangents )
@@ -1,8 +1,26 @@
+from . import Bvh
+from .Bvh import *
 from . import Curvature
 from .Curvature import *
+from . import Decimation
+from .Decimation import *
+from . import Difference
+from .Difference import *
+from . import Distance
+from .Distance import *
+from . import Geodesic
+from .Geodesic import *
 from . import Mesh
 from .Mesh import *
+from . import Remeshing
+from .Remeshing import *
 from . import Repair
 from .Repair import *
 from . import Smoothing
 from .Smoothing import *
+from . import Subdivision
+from .Subdivision import *
+from . import Topology
+from .Topology import *
+from . import Visibility
+from .Visibility import *
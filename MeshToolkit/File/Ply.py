@@ -207,9 +207,9 @@ def WritePly( mesh, filename, binary_file = True, include_normals = False ) :
 		header += 'end_header\n'
 		# Write the header
 		ply_file.write( header.encode( 'UTF-8' ) )
-		# Convert colors to range [0, 255]
+		# Convert colors to range [0, 255] (unless they are already 8-bit colors)
 		if mesh.color_number :
-			colors = np.array( mesh.colors * 255, dtype=np.uint8 )
+			colors = mesh.colors if mesh.colors.dtype == np.uint8 else np.array( mesh.colors * 255, dtype=np.uint8 )
 		# Binary data
 		if binary_file :
 			# Write the vertex data
@@ -0,0 +1,79 @@
+# -*- coding:utf-8 -*-
+
+#
+# Import / Export STL files (binary and ASCII)
+#
+
+# External dependencies
+import os
+import re
+import numpy as np
+import MeshToolkit as mtk
+
+# Binary STL triangle record (50 bytes)
+stl_record = np.dtype( [ ( 'normal', '<f4', (3,) ), ( 'vertices', '<f4', (3, 3) ), ( 'attribute', '<u2' ) ] )
+
+# Import a mesh from a STL file
+def ReadStl( filename ) :
+	# Get the triangle number given in the binary file header
+	with open( filename, 'rb' ) as stl_file :
+		header = stl_file.read( 84 )
+	triangle_number = int( np.frombuffer( header[80:84], dtype='<u4' )[0] ) if len( header ) == 84 else -1
+	# Binary file (the file size matches the triangle number)
+	if os.path.getsize( filename ) == 84 + triangle_number * stl_record.itemsize :
+		# Read all the triangle records at once
+		vertices = np.fromfile( filename, dtype=stl_record, count=triangle_number, offset=84 )[ 'vertices' ].reshape( -1, 3 )
+	# ASCII file
+	else :
+		# Read the whole file
+		with open( filename, 'rb' ) as stl_file :
+			data = stl_file.read()
+		# Check the file signature
+		if not data.lstrip().startswith( b'solid' ) :
+			raise RuntimeError( 'Wrong file format !' )
+		# Parse every vertex coordinates
+		vertices = np.array( re.findall( br'vertex\s+(\S+)\s+(\S+)\s+(\S+)', data ) ).astype( np.float32 ).reshape( -1, 3 )
+	# Create a triangle soup (each triangle has its own vertices)
+	mesh = mtk.Mesh( os.path.splitext(os.path.basename(filename))[0], vertices, np.arange( len( vertices ) ).reshape( -1, 3 ) )
+	# Merge the duplicated vertices to get an indexed mesh
+	mtk.WeldVertices( mesh )
+	mesh.vertices = mesh.vertices.astype( np.float64 )
+	# Return the resulting mesh from the STL file data
+	return mesh
+
+# Export a mesh to a STL file
+def WriteStl( mesh, filename, binary_file = True ) :
+	# Get the face normals
+	if mesh.face_normal_number != mesh.face_number : mesh.UpdateNormals()
+	# Binary file
+	if binary_file :
+		# Create all the triangle records at once
+		records = np.zeros( mesh.face_number, dtype=stl_record )
+		records[ 'normal' ] = mesh.face_normals
+		records[ 'vertices' ] = mesh.vertices[ mesh.faces ]
+		# Write the file
+		with open( filename, 'wb' ) as stl_file :
+			# Header
+			stl_file.write( '{:<80}'.format( 'MeshToolkit {}'.format( mesh.name ) )[:80].encode( 'UTF-8' ) )
+			# Triangle number
+			stl_file.write( np.array( [ mesh.face_number ], dtype='<u4' ).tobytes() )
+			# Triangle records
+			stl_file.write( records.tobytes() )
+	# ASCII file
+	else :
+		# Triangle description
+		facet  = 'facet normal %.9g %.9g %.9g\n'
+		facet += '  outer loop\n'
+		facet += '    vertex %.9g %.9g %.9g\n' * 3
+		facet += '  endloop\n'
+		facet += 'endfacet\n'
+		# Triangle data (normal and vertices)
+		data = np.hstack( ( mesh.face_normals, mesh.vertices[ mesh.faces ].reshape( -1, 9 ) ) )
+		# Write the file
+		with open( filename, 'w' ) as stl_file :
+			stl_file.write( 'solid {}\n'.format( mesh.name ) )
+			# Format the triangles by chunks
+			for i in range( 0, len( data ), 100000 ) :
+				chunk = data[ i : i + 100000 ]
+				stl_file.write( ( facet * len( chunk ) ) % tuple( chunk.ravel() ) )
+			stl_file.write( 'endsolid {}\n'.format( mesh.name ) )
@@ -2,6 +2,8 @@ from . import Obj
 from .Obj import *
 from . import Ply
 from .Ply import *
+from . import Stl
+from .Stl import *
 from . import Vrml
 from .Vrml import *
 from . import X3d
@@ -57,3 +57,27 @@ def TestGenerateSaddleSurface( xsize = 200, ysize = 200 ) :
 	mesh = mtk.Mesh( 'Saddle', vertices, faces )
 	# Return the newly constructed triangular mesh
 	mtk.WritePly( mesh, 'saddle.ply' )
+
+# Benchmark the closest point queries of the bounding volume hierarchy on an icosphere
+# (points far outside the sphere, inside the sphere, and near the surface)
+def BenchmarkClosestPoint( subdivisions = 7 ) :
+	# Create the sphere and its bounding volume hierarchy
+	mesh = mtk.GenerateIcosphere( subdivisions )
+	start = timeit.default_timer()
+	bvh = mtk.Bvh( mesh )
+	print( 'Bvh of {} faces : {:.2f} s'.format( mesh.face_number, timeit.default_timer() - start ) )
+	# Random points at a given distance from the sphere center
+	generator = np.random.default_rng( 0 )
+	def GetPoints( number, radius ) :
+		directions = generator.normal( size=( number, 3 ) )
+		return directions / np.sqrt( ( directions ** 2 ).sum( axis=1 ) ).reshape( -1, 1 ) * radius
+	cases = [ ( 'Outside (r=3)', GetPoints( 50000, 3.0 ) ), ( 'Inside (r=0.5)', GetPoints( 20000, 0.5 ) ),
+		( 'Near surface', GetPoints( 1000000, 1.0 + generator.normal( 0.0, 0.01, ( 1000000, 1 ) ) ) ) ]
+	# Query the closest points
+	for ( name, points ) in cases :
+		start = timeit.default_timer()
+		distances = bvh.ClosestPoint( points )[2]
+		elapsed = timeit.default_timer() - start
+		# The distances differ from the distances to the unit sphere by the tessellation error only
+		error = np.abs( distances - np.abs( np.sqrt( ( points ** 2 ).sum( axis=1 ) ) - 1.0 ) ).max()
+		print( '{} : {} points in {:.2f} s ({:.0f} points/s, {:.1e} from the unit sphere)'.format( name, len( points ), elapsed, len( points ) / elapsed, error ) )
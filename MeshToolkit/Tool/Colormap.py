@@ -5,13 +5,13 @@
 #
 
 # External dependencies
-import math
 import numpy as np
 
 # Class to map values to RGB colors
+# Each palette is precomputed into a lookup table, the values are converted with a single indexing operation
 class Colormap( object ) :
 	# Initialization
-	def __init__ ( self, palette='CubeHelix' ) :
+	def __init__ ( self, palette='CubeHelix', resolution = 1024 ) :
 		if palette == 'Jet' :
 			self.colormap = self.ColormapJet
 		elif palette == 'Grayscale' :
@@ -22,49 +22,53 @@ class Colormap( object ) :
 			self.colormap = self.ColormapRainbow
 		elif palette == 'CubeHelix' :
 			self.colormap = self.ColormapCubeHelix
+		# Precompute the lookup tables (floating point and 8-bit colors)
+		self.lut = self.colormap( np.linspace( 0.0, 1.0, resolution ) )
+		self.lut_uint8 = np.round( self.lut * 255 ).astype( np.uint8 )
 	# Convert an array of values to pseudo-colors
-	def ValueArrayToColor( self, values, normalize = True ) :
+	# The colors are given in 8-bit integers if uint8 is True (e.g. for the PLY writer or the GPU upload)
+	def ValueArrayToColor( self, values, normalize = True, uint8 = False ) :
 		# Normalize the values
+		values = np.asarray( values, dtype=np.float64 )
 		if normalize :
-			values = ( values - values.min() ) / ( values.max() - values.min() )
+			( vmin, vmax ) = ( values.min(), values.max() )
+			values = ( values - vmin ) / ( vmax - vmin ) if vmax > vmin else np.zeros( values.shape )
+		# Find the closest entry of the lookup table
+		indices = np.clip( values * ( len( self.lut ) - 1 ) + 0.5, 0, len( self.lut ) - 1 ).astype( np.intp )
 		# Convert each value to a pseudo-color
-		return np.array( [ self.colormap( i ) for i in values ] )
+		return self.lut_uint8[ indices ] if uint8 else self.lut[ indices ]
 	# Convert an array of vectors to pseudo-colors
-	def VectorArrayToColor( self, vectors ) :
-		# Compute value vector lengths and convert them to colors
-		return self.ValueArrayToColor( np.sqrt( (vectors**2).sum(axis=1) ) )
+	def VectorArrayToColor( self, vectors, uint8 = False ) :
+		# Compute value vector lengths and convert them to colors
+		return self.ValueArrayToColor( np.sqrt( (vectors**2).sum(axis=1) ), uint8=uint8 )
+	# Piecewise linear colormap given by the colors at some positions
+	def Interpolate( self, values, positions, colors ) :
+		colors = np.array( colors, dtype=np.float64 )
+		return np.array( [ np.interp( values, positions, colors[:,i] ) for i in range( 3 ) ] ).T
 	# Grayscale colormap
-	def ColormapGrayscale( self, value ) :
-		return [ value, value, value ]
+	def ColormapGrayscale( self, values ) :
+		return self.Interpolate( values, [ 0.0, 1.0 ], [ [ 0.0, 0.0, 0.0 ], [ 1.0, 1.0, 1.0 ] ] )
 	# ColdToHot colormap
-	def ColormapColdToHot( self, value ) :
-		if value < 0.25 : return [ 0.0, value * 4.0, 1.0 ]
-		elif value < 0.50 : return [ 0.0, 1.0, 1.0 - (value - 0.25) * 4.0 ]
-		elif value < 0.75 : return [ (value - 0.5) * 4.0, 1.0, 0.0 ]
-		else : return [ 1.0, 1.0 - (value - 0.75) * 4.0, 0.0 ]
+	def ColormapColdToHot( self, values ) :
+		return self.Interpolate( values, [ 0.0, 0.25, 0.5, 0.75, 1.0 ],
+			[ [ 0.0, 0.0, 1.0 ], [ 0.0, 1.0, 1.0 ], [ 0.0, 1.0, 0.0 ], [ 1.0, 1.0, 0.0 ], [ 1.0, 0.0, 0.0 ] ] )
 	# Jet colormap
-	def ColormapJet( self, value ) :
-		if value < 0.125 : return [ 0.0, 0.0, 0.5 + 0.5 * value * 8.0 ]
-		elif value < 0.375 : return [ 0.0, (value - 0.125) * 4.0, 1.0 ]
-		elif value < 0.625 : return [ 4.0 * ( value - 0.375 ), 1.0, 1.0 - ( value - 0.375 ) * 4.0 ]
-		elif value < 0.875 : return [ 1.0, 1.0 - 4.0 * ( value - 0.625 ), 0.0 ]
-		else : return [ 1.0 - 4.0 * ( value - 0.875 ), 0.0, 0.0 ]
+	def ColormapJet( self, values ) :
+		return self.Interpolate( values, [ 0.0, 0.125, 0.375, 0.625, 0.875, 1.0 ],
+			[ [ 0.0, 0.0, 0.5 ], [ 0.0, 0.0, 1.0 ], [ 0.0, 1.0, 1.0 ], [ 1.0, 1.0, 0.0 ], [ 1.0, 0.0, 0.0 ], [ 0.5, 0.0, 0.0 ] ] )
 	# Rainbow colormap
-	def ColormapRainbow( self, value ) :
-		if value < 0.2  : return [ 1.0 - value * 5.0, 0.0 , 1.0 ]
-		elif value < 0.4 : return [ 0.0, (value - 0.2) * 5.0, 1.0 ]
-		elif value < 0.6 : return [ 0.0, 1.0, 1.0 - (value - 0.4) * 5.0 ]
-		elif value < 0.8 : return [ (value - 0.6) * 5.0, 1.0, 0.0 ]
-		else : return [ 1.0, 1.0 - (value - 0.8) * 5.0, 0.0 ]
+	def ColormapRainbow( self, values ) :
+		return self.Interpolate( values, [ 0.0, 0.2, 0.4, 0.6, 0.8, 1.0 ],
+			[ [ 1.0, 0.0, 1.0 ], [ 0.0, 0.0, 1.0 ], [ 0.0, 1.0, 1.0 ], [ 0.0, 1.0, 0.0 ], [ 1.0, 1.0, 0.0 ], [ 1.0, 0.0, 0.0 ] ] )
 	# Cube helix colormap
 	# A colour scheme for the display of astronomical intensity images
 	# Dave A. Green, Bulletin of the Astronomical Society of India, 39, 289, 2011
 	# https://www.mrao.cam.ac.uk/~dag/CUBEHELIX
-	def ColormapCubeHelix( self, value, start = 0.5, rots = -1.5, hue = 1.3, gamma = 0.7 ) :
-		angle = 2.0 * math.pi * ( start / 3.0 + 1.0 + rots * value )
-		value = value ** gamma
-		amp = hue * value * ( 1.0 - value ) / 2.0
-		r = value + amp * ( -0.14861 * math.cos( angle ) + 1.78277 * math.sin( angle ) )
-		g = value + amp * ( -0.29227 * math.cos( angle ) - 0.90649 * math.sin( angle ) )
-		b = value + amp * ( +1.97249 * math.cos( angle ) )
-		return np.clip( [ r, g, b ], 0.0, 1.0 )
+	def ColormapCubeHelix( self, values, start = 0.5, rots = -1.5, hue = 1.3, gamma = 0.7 ) :
+		angle = 2.0 * np.pi * ( start / 3.0 + 1.0 + rots * values )
+		values = values ** gamma
+		amp = hue * values * ( 1.0 - values ) / 2.0
+		r = values + amp * ( -0.14861 * np.cos( angle ) + 1.78277 * np.sin( angle ) )
+		g = values + amp * ( -0.29227 * np.cos( angle ) - 0.90649 * np.sin( angle ) )
+		b = values + amp * ( +1.97249 * np.cos( angle ) )
+		return np.clip( np.array( [ r, g, b ] ).T, 0.0, 1.0 )
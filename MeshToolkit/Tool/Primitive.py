@@ -16,3 +16,21 @@ def GenerateSaddleSurface( xsize = 200, ysize = 200 ) :
 	Z = ( X ** 2 - Y ** 2 ) * 0.5
 	# Return a triangular mesh from the grid above
 	return mtk.Mesh( 'Saddle' ).CreateFromGrid( X, Y, Z )
+
+# Generate a unit sphere by subdividing an icosahedron (20 * 4^subdivisions faces)
+def GenerateIcosphere( subdivisions = 4 ) :
+	# Icosahedron vertices (golden ratio rectangles)
+	t = ( 1.0 + np.sqrt( 5.0 ) ) / 2.0
+	vertices = np.array( [ [ -1, t, 0 ], [ 1, t, 0 ], [ -1, -t, 0 ], [ 1, -t, 0 ], [ 0, -1, t ], [ 0, 1, t ],
+		[ 0, -1, -t ], [ 0, 1, -t ], [ t, 0, -1 ], [ t, 0, 1 ], [ -t, 0, -1 ], [ -t, 0, 1 ] ], dtype=np.float64 )
+	# Icosahedron faces
+	faces = np.array( [ [ 0, 11, 5 ], [ 0, 5, 1 ], [ 0, 1, 7 ], [ 0, 7, 10 ], [ 0, 10, 11 ], [ 1, 5, 9 ], [ 5, 11, 4 ],
+		[ 11, 10, 2 ], [ 10, 7, 6 ], [ 7, 1, 8 ], [ 3, 9, 4 ], [ 3, 4, 2 ], [ 3, 2, 6 ], [ 3, 6, 8 ], [ 3, 8, 9 ],
+		[ 4, 9, 5 ], [ 2, 4, 11 ], [ 6, 2, 10 ], [ 8, 6, 7 ], [ 9, 8, 1 ] ] )
+	mesh = mtk.Mesh( 'Icosphere', vertices, faces )
+	# Subdivide the faces, and project the vertices on the sphere
+	mtk.Subdivide( mesh, subdivisions, 'midpoint' )
+	mesh.vertices /= np.sqrt( ( mesh.vertices ** 2 ).sum( axis=1 ) ).reshape( -1, 1 )
+	mesh.UpdateNormals()
+	# Return the sphere
+	return mesh
@@ -4,32 +4,137 @@
 # Provide functions to compute different statistics on an array of values
 #
 
+# The statistics can be accumulated chunk by chunk, and merged across processes, without keeping the values :
+#   - the minimum, maximum, mean and variance are exact (pairwise update of Welford's algorithm)
+#   - the quantiles are interpolated in a fine histogram over a fixed range
+# Based on :
+#   Updating Formulae and a Pairwise Algorithm for Computing Sample Variances
+#     T. F. Chan, G. H. Golub, R. J. LeVeque, COMPSTAT 1982
+
 # External dependencies
+import math
 import numpy as np
 
-# Print statictics of the given values
+# Class to accumulate statistics and histograms of values given chunk by chunk
+# The histogram range is given, or set by the first chunk (the later values outside of it are counted apart)
+class StatisticsAccumulator( object ) :
+	# Initialisation
+	def __init__( self, value_range = None, bins = 20, resolution = 4096 ) :
+		# Histogram range, and number of fine bins (a multiple of the histogram bin number)
+		self.value_range = None if value_range is None else ( float( value_range[0] ), float( value_range[1] ) )
+		self.bins = bins
+		self.resolution = bins * max( 1, int( math.ceil( resolution / bins ) ) )
+		# Fine histogram, and number of values below and above the histogram range
+		self.counts = np.zeros( self.resolution, dtype=np.int64 )
+		self.underflow = 0
+		self.overflow = 0
+		# Value number, extrema, mean, and sum of squared differences from the mean
+		self.number = 0
+		self.minimum = np.inf
+		self.maximum = -np.inf
+		self.mean = 0.0
+		self.m2 = 0.0
+	# Add a chunk of values (the non-finite values are ignored)
+	def Add( self, values ) :
+		# Get the finite values
+		values = np.asarray( values, dtype=np.float64 ).reshape( -1 )
+		values = values[ np.isfinite( values ) ]
+		if not len( values ) : return
+		# Set the histogram range from the first chunk
+		if self.value_range is None :
+			self.value_range = ( values.min(), values.max() if values.max() > values.min() else values.min() + 1.0 )
+		# Fill the fine histogram (the maximum of the range is in the last bin)
+		( low, high ) = self.value_range
+		indices = np.floor( ( values - low ) * ( self.resolution / ( high - low ) ) ).astype( np.int64 )
+		indices[ values == high ] = self.resolution - 1
+		inside = ( indices >= 0 ) & ( indices < self.resolution )
+		self.counts += np.bincount( indices[ inside ], minlength=self.resolution )
+		self.underflow += int( np.count_nonzero( values < low ) )
+		self.overflow += int( np.count_nonzero( values > high ) )
+		# Merge the chunk moments
+		mean = values.mean()
+		self.Combine( len( values ), values.min(), values.max(), mean, ( ( values - mean ) ** 2 ).sum() )
+	# Merge the statistics of another accumulator with the same histogram range
+	def Merge( self, other ) :
+		# Nothing to merge
+		if not other.number : return
+		# Check the histograms
+		if self.value_range is None and not self.number : self.value_range = other.value_range
+		if ( self.value_range != other.value_range ) or ( self.resolution != other.resolution ) :
+			raise RuntimeError( 'Cannot merge statistics with different histogram ranges' )
+		# Merge the histograms
+		self.counts += other.counts
+		self.underflow += other.underflow
+		self.overflow += other.overflow
+		# Merge the moments
+		self.Combine( other.number, other.minimum, other.maximum, other.mean, other.m2 )
+	# Combine the current moments with the moments of another set of values
+	def Combine( self, number, minimum, maximum, mean, m2 ) :
+		total = self.number + number
+		delta = mean - self.mean
+		self.m2 += m2 + delta ** 2 * self.number * number / total
+		self.mean += delta * number / total
+		self.number = total
+		self.minimum = min( self.minimum, minimum )
+		self.maximum = max( self.maximum, maximum )
+	# Compute approximate quantiles (interpolated in the fine histogram)
+	def GetQuantiles( self, q ) :
+		# No value
+		if not self.number : return np.full( np.shape( q ), np.nan )
+		# Counts and edges of the histogram bins, including the values outside of the range
+		( low, high ) = self.value_range
+		counts = np.concatenate( ( [ self.underflow ], self.counts, [ self.overflow ] ) )
+		edges = np.concatenate( ( [ min( self.minimum, low ) ], np.linspace( low, high, self.resolution + 1 ), [ max( self.maximum, high ) ] ) )
+		# Interpolate the value at the given ranks
+		ranks = np.asarray( q, dtype=np.float64 ) * self.number
+		return np.clip( np.interp( ranks, np.concatenate( ( [ 0 ], np.cumsum( counts ) ) ), edges ), self.minimum, self.maximum )
+	# Get the histogram (bin counts and edges, the values outside of the range are not counted)
+	def GetHistogram( self ) :
+		return ( self.counts.reshape( self.bins, -1 ).sum( axis=1 ), np.linspace( self.value_range[0], self.value_range[1], self.bins + 1 ) )
+	# Get the statistics in a dictionary
+	def GetStatistics( self ) :
+		stats = dict()
+		stats[ 'Number' ] = self.number
+		stats[ 'Minimum' ] = self.minimum
+		stats[ 'Maximum' ] = self.maximum
+		stats[ 'Mean' ] = self.mean
+		stats[ 'Median' ] = float( self.GetQuantiles( 0.5 ) )
+		stats[ 'Deviation' ] = math.sqrt( self.m2 / self.number ) if self.number else 0.0
+		stats[ 'Variance' ] = self.m2 / self.number if self.number else 0.0
+		return stats
+
+# Print statictics of the given values (or of a statistics accumulator)
+# Return the statistics in a dictionary
 def Statistics( values ) :
 	# Compute the statistics of the given values
-	stats = list()
-	stats.append( ('Minimum', np.amin( values ) ) )
-	stats.append( ('Maximum', np.amax( values ) ) )
-	stats.append( ('Mean', np.mean( values ) ) )
-	stats.append( ('Median', np.median( values ) ) )
-	stats.append( ('Deviation', np.std( values ) ) )
-	stats.append( ('Variance', np.var( values ) ) )
+	if not isinstance( values, StatisticsAccumulator ) :
+		accumulator = StatisticsAccumulator()
+		accumulator.Add( values )
+		values = accumulator
+	stats = values.GetStatistics()
 	# Print the stats
 	print( 'Statistics...' )
-	for s in stats :
-		print( '{:>14} : {:>15.5f}'.format( *s ) )
+	for s in ( 'Minimum', 'Maximum', 'Mean', 'Median', 'Deviation', 'Variance' ) :
+		print( '{:>14} : {:>15.5f}'.format( s, stats[ s ] ) )
+	# Return the stats
+	return stats
 
-# Print a histogram of the given values
+# Print a histogram of the given values (or of a statistics accumulator)
+# Return the bin counts and the bin edges
 def Histogram( values, bins = 20 ) :
 	# Compute histogram
-	hist, bin_edges = np.histogram( values, bins )
+	if not isinstance( values, StatisticsAccumulator ) :
+		accumulator = StatisticsAccumulator( bins=bins )
+		accumulator.Add( values )
+		values = accumulator
+	( hist, bin_edges ) = values.GetHistogram()
+	bins = len( hist )
 	# Get the contribution percentage of each bin
-	total = hist.astype( np.float ) / hist.sum()
+	total = hist.astype( np.float64 ) / max( 1, hist.sum() )
 	# Print the histogram in the console
 	print( 'Histogram...' )
 	for i in range( bins ) :
 		print( '{:>14.2f} | {:60} |'.format( bin_edges[i], '_' * int(total[i] * 60) ) )
 	print( '{:>14.2f} | {:60} |'.format( bin_edges[bins], '' ) )
+	# Return the histogram
+	return ( hist, bin_edges )
@@ -0,0 +1,47 @@
+# -*- coding:utf-8 -*-
+
+#
+# Camera and mesh normalization of the mesh viewer
+# (without OpenGL, shared with the software rasterizer)
+#
+
+# External dependencies
+import math
+import numpy as np
+
+# Initial Model-View transformation matrix (position of the camera)
+def GetModelViewMatrix() :
+	modelview_matrix = np.identity( 4, dtype=np.float32 )
+	modelview_matrix[3,2] = -30.0
+	return modelview_matrix
+
+# Perspective projection matrix of the viewer
+def GetProjectionMatrix( width, height ) :
+	fovy, aspect, near, far = 45.0, float(width)/height, 0.1, 100.0
+	f = math.tan( math.pi * fovy / 360.0 )
+	projection_matrix = np.identity( 4, dtype=np.float32 )
+	projection_matrix[0,0] = 1.0 / (f * aspect)
+	projection_matrix[1,1] = 1.0 / f
+	projection_matrix[2,2] = - (far + near) / (far - near)
+	projection_matrix[2,3] = - 1.0
+	projection_matrix[3,2] = - 2.0 * near * far / (far - near)
+	return projection_matrix
+
+# Prepare the data of a mesh for OpenGL (without any OpenGL call, so it can run on a background thread)
+# Return the mesh, the vertex, face, normal and color arrays, and the center and the scale of the normalization
+def PrepareMesh( mesh ) :
+	# Compute mesh normals if necessary
+	if mesh.vertex_normal_number != mesh.vertex_number : mesh.UpdateNormals()
+	# Cast input data (required for OpenGL)
+	vertices = np.array( mesh.vertices, dtype=np.float32 )
+	faces = np.array( mesh.faces, dtype=np.uint32 )
+	normals = np.array( mesh.vertex_normals, dtype=np.float32 )
+	colors = mesh.colors if mesh.colors.dtype == np.uint8 else np.array( mesh.colors, dtype=np.float32 )
+	# Normalize the model (the same normalization is applied to the updated vertices)
+	(center, radius) = mesh.GetBoundingSphere()
+	center = np.array( center, dtype=np.float32 )
+	scale = np.float32( 10.0 / radius )
+	vertices -= center
+	vertices *= scale
+	# Return the prepared data
+	return ( mesh, vertices, faces, normals, colors, center, scale )
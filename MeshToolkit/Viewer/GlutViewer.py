@@ -14,20 +14,24 @@ import MeshToolkit as mtk
 # Create an OpenGL frame with GLUT
 class GlutViewer( object ) :
 	# Initialisation
-	def __init__( self, mesh, width=1024, height=768 ) :
+	def __init__( self, mesh, width=1024, height=768, frame_log=None ) :
 		# Initialise OpenGL / GLUT
 		glut.glutInit()
 		glut.glutInitDisplayMode( glut.GLUT_DOUBLE | glut.GLUT_RGBA | glut.GLUT_DEPTH | glut.GLUT_MULTISAMPLE )
 		glut.glutInitWindowSize( width, height )
 		glut.glutInitWindowPosition( 100, 100 )
 		glut.glutCreateWindow( mesh.name )
+		# Mesh displayed
+		self.mesh = mesh
 		# Mesh viewer
 		self.meshviewer = mtk.MeshViewer()
 		self.meshviewer.InitialiseOpenGL( width, height )
 		self.meshviewer.LoadMesh( mesh )
 		self.antialiasing = True
+		# Log the frame statistics into a CSV file
+		if frame_log : self.meshviewer.statistics.StartLog( frame_log )
 		# GLUT function binding
-		glut.glutCloseFunc( self.meshviewer.Close )
+		glut.glutCloseFunc( self.meshviewer.Exit )
 		glut.glutDisplayFunc( self.Display )
 		glut.glutIdleFunc( self.Idle )
 		glut.glutKeyboardFunc( self.Keyboard )
@@ -38,7 +42,8 @@ class GlutViewer( object ) :
 	def Keyboard( self, key, mouseX, mouseY ) :
 		# Escape
 		if key == b'\x1b' :
-			# Exit
+			# Release the OpenGL objects, and exit
+			self.meshviewer.Exit()
 			sys.exit()
 		# A
 		elif key in [ b'a', b'A' ] :
@@ -52,6 +57,16 @@ class GlutViewer( object ) :
 		elif key in [ b'g', b'G' ] :
 			# Smooth shading
 			self.meshviewer.SetShader( 'Smooth' )
+		# I
+		elif key in [ b'i', b'I' ] :
+			# Frame statistics overlay
+			self.meshviewer.ToggleOverlay()
+		# L
+		elif key in [ b'l', b'L' ] :
+			# Apply a uniform laplacian smoothing step, and send only the new vertex attributes to the viewer
+			mtk.UniformLaplacianSmoothing( self.mesh, 1, 0.5 )
+			self.mesh.UpdateNormals()
+			self.meshviewer.UpdateMesh( vertices=self.mesh.vertices, normals=self.mesh.vertex_normals )
 		# R
 		elif key in [ b'r', b'R' ] :
 			# Reset model translation and rotation
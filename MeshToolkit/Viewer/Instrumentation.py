@@ -0,0 +1,205 @@
+# -*- coding:utf-8 -*-
+
+#
+# Measure the rendering cost of the mesh viewer
+# (CPU time, GPU time, draw calls, uploaded buffer bytes)
+#
+
+# The GPU time of each frame is measured with an OpenGL timer query.
+# The query results are read a few frames later, when they are available, so that the CPU never waits for the GPU.
+# The statistics can be displayed with a text overlay, and logged frame by frame into a CSV file.
+
+# External dependencies
+import collections
+import time
+import numpy as np
+import OpenGL.GL as gl
+import MeshToolkit as mtk
+
+# Record the rendering statistics of each frame
+class FrameStatistics( object ) :
+	# Initialisation
+	def __init__( self, history = 60 ) :
+		# Frame number
+		self.frame_number = 0
+		# Counters of the current frame (the buffers uploaded between two frames are counted in the next frame)
+		self.draw_calls = 0
+		self.uploaded_bytes = 0
+		# Last complete records (frame, CPU time, GPU time, draw calls, uploaded bytes)
+		self.records = collections.deque( maxlen=history )
+		# Records waiting for their GPU time, with their timer query
+		self.pending = collections.deque()
+		# Free timer queries
+		self.queries = []
+		# Query result buffer
+		self.result = np.zeros( 1, dtype=np.uint64 )
+		# CSV log file
+		self.log_file = None
+	# Start the measure of a frame
+	def BeginFrame( self ) :
+		# Start the GPU timer
+		self.query = self.queries.pop() if self.queries else int( np.ravel( gl.glGenQueries( 1 ) )[0] )
+		gl.glBeginQuery( gl.GL_TIME_ELAPSED, self.query )
+		# Start the CPU timer
+		self.start_time = time.perf_counter()
+	# End the measure of a frame
+	# Return the CPU time of the frame (in seconds)
+	def EndFrame( self ) :
+		# Stop the timers
+		cpu_time = time.perf_counter() - self.start_time
+		gl.glEndQuery( gl.GL_TIME_ELAPSED )
+		# Register the frame, waiting for the GPU time
+		self.pending.append( ( self.query, [ self.frame_number, cpu_time, 0.0, self.draw_calls, self.uploaded_bytes ] ) )
+		self.frame_number += 1
+		# Reset the frame counters
+		self.draw_calls = 0
+		self.uploaded_bytes = 0
+		# Collect the available GPU times of the previous frames
+		self.CollectQueries()
+		# Return the CPU time
+		return cpu_time
+	# Read the results of the timer queries available
+	def CollectQueries( self ) :
+		while self.pending :
+			# Stop at the first query not available (the queries finish in order)
+			( query, record ) = self.pending[0]
+			gl.glGetQueryObjectui64v( query, gl.GL_QUERY_RESULT_AVAILABLE, self.result )
+			if not self.result[0] : break
+			self.pending.popleft()
+			# Register the GPU time (in seconds), and free the query
+			gl.glGetQueryObjectui64v( query, gl.GL_QUERY_RESULT, self.result )
+			record[2] = float( self.result[0] ) * 1e-9
+			self.queries.append( query )
+			self.records.append( record )
+			# Log the record
+			if self.log_file : self.log_file.write( '{},{:.6f},{:.6f},{},{}\n'.format( *record ) )
+	# Get the average statistics of the last frames
+	# Return a dictionary (the times are given in milliseconds, the uploaded bytes are summed over the last frames)
+	def GetSummary( self ) :
+		# No complete record
+		if not self.records : return None
+		# Average the records
+		records = np.array( self.records, dtype=np.float64 )
+		summary = dict()
+		summary[ 'CPU' ] = records[:,1].mean() * 1000.0
+		summary[ 'GPU' ] = records[:,2].mean() * 1000.0
+		summary[ 'FPS' ] = 1000.0 / max( summary[ 'CPU' ], summary[ 'GPU' ], 1e-3 )
+		summary[ 'Draws' ] = records[:,3].mean()
+		summary[ 'Upload' ] = records[:,4].sum()
+		return summary
+	# Start logging the statistics of every frame into a CSV file (line buffered, nothing is lost when the viewer exits)
+	def StartLog( self, filename ) :
+		self.StopLog()
+		self.log_file = open( filename, 'w', buffering=1 )
+		self.log_file.write( 'frame,cpu_time,gpu_time,draw_calls,uploaded_bytes\n' )
+	# Stop logging the statistics
+	def StopLog( self ) :
+		if self.log_file : self.log_file.close()
+		self.log_file = None
+	# Delete the timer queries
+	def Close( self ) :
+		queries = self.queries + [ query for ( query, record ) in self.pending ]
+		if queries : gl.glDeleteQueries( len( queries ), np.array( queries ) )
+		self.queries = []
+		self.pending.clear()
+		self.StopLog()
+
+# Display lines of text over the OpenGL frame
+# The text is rendered with a small bitmap font into a texture, drawn on a quad in the top-left corner
+class TextOverlay( object ) :
+	# Initialisation (requires an OpenGL context)
+	def __init__( self, scale = 2 ) :
+		# Glyph magnification
+		self.scale = scale
+		# Load the shader program
+		self.shader = mtk.LoadShaders( mtk.CompileShader( self.overlay_shader_vertex, gl.GL_VERTEX_SHADER ),
+			mtk.CompileShader( self.overlay_shader_fragment, gl.GL_FRAGMENT_SHADER ) )
+		self.rectangle_location = gl.glGetUniformLocation( self.shader, b'Rectangle' )
+		# Vertex array object (the quad corners are generated in the vertex shader)
+		self.vertex_array_id = gl.glGenVertexArrays( 1 )
+		# Text texture
+		self.texture_id = gl.glGenTextures( 1 )
+		self.texture_size = ( 0, 0 )
+	# Set the text to display
+	def SetText( self, lines ) :
+		# Render the text into an image
+		image = RenderText( lines, self.scale )
+		self.texture_size = ( image.shape[1], image.shape[0] )
+		# Upload the image into the texture
+		gl.glBindTexture( gl.GL_TEXTURE_2D, self.texture_id )
+		gl.glPixelStorei( gl.GL_UNPACK_ALIGNMENT, 1 )
+		gl.glTexImage2D( gl.GL_TEXTURE_2D, 0, gl.GL_R8, image.shape[1], image.shape[0], 0, gl.GL_RED, gl.GL_UNSIGNED_BYTE, image )
+		gl.glTexParameteri( gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_NEAREST )
+		gl.glTexParameteri( gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST )
+		gl.glBindTexture( gl.GL_TEXTURE_2D, 0 )
+	# Draw the text in the top-left corner of a frame of the given size
+	def Draw( self, width, height ) :
+		# No text
+		if not self.texture_size[0] : return
+		# Draw over the scene, with transparency
+		gl.glDisable( gl.GL_DEPTH_TEST )
+		gl.glEnable( gl.GL_BLEND )
+		gl.glBlendFunc( gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA )
+		gl.glUseProgram( self.shader )
+		# Text rectangle in normalized device coordinates (left, top, right, bottom)
+		( w, h ) = self.texture_size
+		gl.glUniform4f( self.rectangle_location, -1.0 + 8.0 / width, 1.0 - 8.0 / height,
+			-1.0 + 2.0 * ( w + 4 ) / width, 1.0 - 2.0 * ( h + 4 ) / height )
+		# Draw the quad
+		gl.glBindTexture( gl.GL_TEXTURE_2D, self.texture_id )
+		gl.glBindVertexArray( self.vertex_array_id )
+		gl.glDrawArrays( gl.GL_TRIANGLE_STRIP, 0, 4 )
+		# Release the objects
+		gl.glBindVertexArray( 0 )
+		gl.glBindTexture( gl.GL_TEXTURE_2D, 0 )
+		gl.glUseProgram( 0 )
+		gl.glEnable( gl.GL_DEPTH_TEST )
+	# Delete the OpenGL objects
+	def Close( self ) :
+		gl.glDeleteTextures( 1, np.array([ self.texture_id ]) )
+		gl.glDeleteVertexArrays( 1, np.array([ self.vertex_array_id ]) )
+		gl.glDeleteProgram( self.shader )
+	# Overlay - Vertex shader
+	overlay_shader_vertex = '''#version 330 core
+	uniform vec4 Rectangle;
+	out vec2 TexCoord;
+	void main( void ) {
+		TexCoord = vec2( gl_VertexID % 2, gl_VertexID / 2 );
+		gl_Position = vec4( mix( Rectangle.x, Rectangle.z, TexCoord.x ), mix( Rectangle.y, Rectangle.w, TexCoord.y ), 0.0, 1.0 );
+	}'''
+	# Overlay - Fragment shader
+	overlay_shader_fragment = '''#version 330 core
+	uniform sampler2D Text;
+	in vec2 TexCoord;
+	out vec4 Color;
+	void main( void ) {
+		Color = mix( vec4( 0.0, 0.0, 0.0, 0.6 ), vec4( 1.0, 1.0, 1.0, 1.0 ), texture( Text, TexCoord ).r );
+	}'''
+
+# Render lines of text into an 8-bit image with the bitmap font (the unknown characters are left blank)
+def RenderText( lines, scale = 1 ) :
+	# Image size (glyphs of 3x5 pixels, with a pixel of spacing)
+	columns = max( len( line ) for line in lines ) if lines else 0
+	image = np.zeros( ( 6 * len( lines ) + 1, 4 * columns + 1 ), dtype=np.uint8 )
+	# Copy the glyph of each character
+	for ( i, line ) in enumerate( lines ) :
+		for ( j, character ) in enumerate( line.upper() ) :
+			if character in FONT :
+				image[ 6 * i + 1 : 6 * i + 6, 4 * j + 1 : 4 * j + 4 ] = FONT[ character ]
+	# Return the magnified image
+	return np.kron( image, np.ones( ( scale, scale ), dtype=np.uint8 ) )
+
+# Bitmap font of 3x5 pixels (uppercase letters, digits, and some punctuation)
+FONT = { character : 255 * ( np.array( [ list( row ) for row in glyph.split() ] ) == '#' ).astype( np.uint8 ) for ( character, glyph ) in {
+	'A' : '.#. #.# ### #.# #.#', 'B' : '##. #.# ##. #.# ##.', 'C' : '.## #.. #.. #.. .##', 'D' : '##. #.# #.# #.# ##.',
+	'E' : '### #.. ##. #.. ###', 'F' : '### #.. ##. #.. #..', 'G' : '.## #.. #.# #.# .##', 'H' : '#.# #.# ### #.# #.#',
+	'I' : '### .#. .#. .#. ###', 'J' : '..# ..# ..# #.# .#.', 'K' : '#.# #.# ##. #.# #.#', 'L' : '#.. #.. #.. #.. ###',
+	'M' : '#.# ### ### #.# #.#', 'N' : '##. #.# #.# #.# #.#', 'O' : '.#. #.# #.# #.# .#.', 'P' : '##. #.# ##. #.. #..',
+	'Q' : '.#. #.# #.# ##. .##', 'R' : '##. #.# ##. #.# #.#', 'S' : '.## #.. .#. ..# ##.', 'T' : '### .#. .#. .#. .#.',
+	'U' : '#.# #.# #.# #.# ###', 'V' : '#.# #.# #.# #.# .#.', 'W' : '#.# #.# ### ### #.#', 'X' : '#.# #.# .#. #.# #.#',
+	'Y' : '#.# #.# .#. .#. .#.', 'Z' : '### ..# .#. #.. ###',
+	'0' : '### #.# #.# #.# ###', '1' : '.#. ##. .#. .#. ###', '2' : '##. ..# .#. #.. ###', '3' : '##. ..# .#. ..# ##.',
+	'4' : '#.# #.# ### ..# ..#', '5' : '### #.. ##. ..# ##.', '6' : '.## #.. ### #.# ###', '7' : '### ..# .#. .#. .#.',
+	'8' : '### #.# ### #.# ###', '9' : '### #.# ### ..# ##.',
+	'.' : '... ... ... ... .#.', ':' : '... .#. ... .#. ...', '-' : '... ... ### ... ...', '/' : '..# ..# .#. #.. #..',
+	'%' : '#.# ..# .#. #.. #.#', '(' : '.#. #.. #.. #.. .#.', ')' : '.#. ..# ..# ..# .#.', ' ' : '... ... ... ... ...' }.items() }
@@ -5,7 +5,7 @@
 #
 
 # External dependencies
-import math
+import threading
 import numpy as np
 import OpenGL.GL as gl
 import MeshToolkit as mtk
@@ -30,10 +30,10 @@ class MeshViewer( object ) :
 		gl.glEnable( gl.GL_MULTISAMPLE )
 		# Initialise the projection transformation matrix
 		self.SetProjectionMatrix( width, height )
+		# Trackball revision of the current transformation matrices (None to force their update)
+		self.matrix_revision = None
 		# Initialise Model-View transformation matrix
-		self.modelview_matrix = np.identity( 4, dtype=np.float32 )
-		# Position the scene (camera)
-		self.modelview_matrix[3,2] = -30.0
+		self.modelview_matrix = mtk.GetModelViewMatrix()
 		# Load the shaders
 		self.flat_shader = mtk.FlatShader()
 		self.smooth_shader = mtk.SmoothShader()
@@ -43,58 +43,219 @@ class MeshViewer( object ) :
 		self.element_number = 0
 		self.color_enabled = False
 		self.antialiasing = True
+		# Frame counter, and CPU time spent in the last frame (in seconds)
+		self.frame_number = 0
+		self.frame_cpu_time = 0.0
+		# Frame statistics (CPU and GPU times, draw calls, uploaded bytes), and their text overlay
+		self.statistics = mtk.FrameStatistics()
+		self.overlay = None
+		self.overlay_enabled = False
+		# Viewport size
+		self.width = width
+		self.height = height
+		# Level of detail : a proxy mesh is displayed during the trackball motions
+		# for the meshes with more faces than the given number (vertex clustering resolution of the proxy)
+		self.lod_face_number = 1000000
+		self.lod_resolution = 256
+		self.proxy_element_number = 0
+		self.proxy_data = None
+		# Revision number of the loaded mesh (to discard the proxy meshes of the previous meshes)
+		self.mesh_revision = 0
+		# Copy of the loaded mesh for the proxy, and the next mesh to simplify by the background thread
+		self.proxy_mesh = None
+		self.proxy_source = None
+		self.proxy_building = False
+		self.proxy_lock = threading.Lock()
 	# Load the mesh for display
 	def LoadMesh( self, mesh ) :
+		# Prepare the mesh data, and send them to OpenGL
+		self.UploadMesh( mtk.PrepareMesh( mesh ) )
+	# Send the mesh data prepared by PrepareMesh to OpenGL
+	def UploadMesh( self, mesh_data ) :
 		# Close previous mesh
 		self.Close()
-		# Compute mesh normals if necessary
-		if mesh.vertex_normal_number != mesh.vertex_number : mesh.UpdateNormals()
-		# Cast input data (required for OpenGL)
-		vertices = np.array( mesh.vertices, dtype=np.float32 )
-		faces = np.array( mesh.faces, dtype=np.uint32 )
-		normals = np.array( mesh.vertex_normals, dtype=np.float32 )
-		colors = np.array( mesh.colors, dtype=np.float32 )
-		# Normalize the model
-		(center, radius) = mesh.GetBoundingSphere()
-		vertices -= center
-		vertices *= 10.0 / radius
-		# Vertex array object
+		# Get the prepared data
+		( mesh, vertices, faces, normals, colors, self.center, self.scale ) = mesh_data
+		# Vertex array object
 		self.vertex_array_id = gl.glGenVertexArrays( 1 )
 		gl.glBindVertexArray( self.vertex_array_id )
 		# Face buffer object
 		self.face_buffer_id = gl.glGenBuffers( 1 )
 		gl.glBindBuffer( gl.GL_ELEMENT_ARRAY_BUFFER, self.face_buffer_id )
-		gl.glBufferData( gl.GL_ELEMENT_ARRAY_BUFFER, faces.nbytes, faces, gl.GL_STATIC_DRAW )
-		# Vertex buffer object
+		self.SendBuffer( gl.GL_ELEMENT_ARRAY_BUFFER, faces, gl.GL_STATIC_DRAW )
+		# Vertex buffer object (the vertex attributes can be updated)
 		self.vertex_buffer_id = gl.glGenBuffers( 1 )
 		gl.glBindBuffer( gl.GL_ARRAY_BUFFER, self.vertex_buffer_id )
-		gl.glBufferData( gl.GL_ARRAY_BUFFER, vertices.nbytes, vertices, gl.GL_STATIC_DRAW )
+		self.SendBuffer( gl.GL_ARRAY_BUFFER, vertices, gl.GL_DYNAMIC_DRAW )
 		gl.glEnableVertexAttribArray( 0 )
 		gl.glVertexAttribPointer( 0, 3, gl.GL_FLOAT, gl.GL_FALSE, 0, None )
 		# Normal buffer object
 		self.normal_buffer_id = gl.glGenBuffers( 1 )
 		gl.glBindBuffer( gl.GL_ARRAY_BUFFER, self.normal_buffer_id )
-		gl.glBufferData( gl.GL_ARRAY_BUFFER, normals.nbytes, normals, gl.GL_STATIC_DRAW )
+		self.SendBuffer( gl.GL_ARRAY_BUFFER, normals, gl.GL_DYNAMIC_DRAW )
 		gl.glEnableVertexAttribArray( 1 )
 		gl.glVertexAttribPointer( 1, 3, gl.GL_FLOAT, gl.GL_FALSE, 0, None )
 		# Color buffer object
-		if len( colors ) :
-			self.color_enabled = True
-			self.color_buffer_id = gl.glGenBuffers( 1 )
-			gl.glBindBuffer( gl.GL_ARRAY_BUFFER, self.color_buffer_id )
-			gl.glBufferData( gl.GL_ARRAY_BUFFER, colors.nbytes, colors, gl.GL_STATIC_DRAW )
-			gl.glEnableVertexAttribArray( 2 )
-			gl.glVertexAttribPointer( 2, 3, gl.GL_FLOAT, gl.GL_FALSE, 0, None )
+		if len( colors ) : self.SetColorBuffer( colors )
+		# Release the vertex array object first, so that it keeps the face buffer binding
+		gl.glBindVertexArray( 0 )
 		# Release the buffers
 		gl.glBindBuffer( gl.GL_ARRAY_BUFFER, 0 )
 		gl.glBindBuffer( gl.GL_ELEMENT_ARRAY_BUFFER, 0 )
-		gl.glBindVertexArray( 0 )
-		# Setup model element number
+		# Setup model element and vertex numbers
 		self.element_number = len(faces) * 3
+		self.vertex_number = len(vertices)
 		# Reset the trackball
 		self.trackball.Reset()
+		# Build the proxy mesh of a large mesh on a background thread,
+		# from a copy of the mesh (the caller can modify the mesh arrays in the meantime)
+		if len(faces) > self.lod_face_number :
+			self.proxy_mesh = mtk.Mesh( name=mesh.name, vertices=mesh.vertices, faces=mesh.faces, colors=mesh.colors )
+			self.StartProxy()
+	# Send the copy of the mesh to the background thread building the proxy mesh
+	def StartProxy( self ) :
+		with self.proxy_lock :
+			# Replace the mesh waiting to be simplified
+			self.proxy_source = ( self.mesh_revision, self.proxy_mesh, self.center, self.scale )
+			# Start the thread if it is not running (otherwise it simplifies the new mesh after the current one)
+			if self.proxy_building : return
+			self.proxy_building = True
+		threading.Thread( target=self.BuildProxy, daemon=True ).start()
+	# Build the proxy meshes of the meshes sent by StartProxy (on a background thread, the OpenGL upload is done by the display)
+	def BuildProxy( self ) :
+		while True :
+			# Get the last mesh sent, or stop the thread
+			with self.proxy_lock :
+				source = self.proxy_source
+				self.proxy_source = None
+				if source is None :
+					self.proxy_building = False
+					return
+			( revision, mesh, center, scale ) = source
+			# Simplify the mesh
+			proxy = mtk.ClusterVertices( mesh, self.lod_resolution )
+			# Prepare the OpenGL data with the normalization of the mesh
+			vertices = np.array( proxy.vertices, dtype=np.float32 )
+			vertices -= center
+			vertices *= scale
+			faces = np.array( proxy.faces, dtype=np.uint32 )
+			normals = np.array( proxy.vertex_normals, dtype=np.float32 )
+			colors = proxy.colors if proxy.colors.dtype == np.uint8 else np.array( proxy.colors, dtype=np.float32 )
+			# Register the proxy data (checked again before the upload)
+			if revision == self.mesh_revision : self.proxy_data = ( revision, vertices, faces, normals, colors )
+	# Upload the proxy mesh built in the background
+	def UploadProxy( self ) :
+		# Get the proxy data, and discard the proxy of a previous mesh
+		( revision, vertices, faces, normals, colors ) = self.proxy_data
+		self.proxy_data = None
+		if revision != self.mesh_revision : return
+		# Vertex array object
+		self.proxy_array_id = gl.glGenVertexArrays( 1 )
+		gl.glBindVertexArray( self.proxy_array_id )
+		# Face buffer object
+		self.proxy_buffer_ids = [ gl.glGenBuffers( 1 ) ]
+		gl.glBindBuffer( gl.GL_ELEMENT_ARRAY_BUFFER, self.proxy_buffer_ids[0] )
+		self.SendBuffer( gl.GL_ELEMENT_ARRAY_BUFFER, faces, gl.GL_STATIC_DRAW )
+		# Vertex, normal and color buffer objects
+		for ( location, values ) in enumerate( ( vertices, normals, colors ) ) :
+			if not len( values ) : continue
+			self.proxy_buffer_ids.append( gl.glGenBuffers( 1 ) )
+			gl.glBindBuffer( gl.GL_ARRAY_BUFFER, self.proxy_buffer_ids[-1] )
+			self.SendBuffer( gl.GL_ARRAY_BUFFER, values, gl.GL_STATIC_DRAW )
+			gl.glEnableVertexAttribArray( location )
+			if values.dtype == np.uint8 : gl.glVertexAttribPointer( location, 3, gl.GL_UNSIGNED_BYTE, gl.GL_TRUE, 0, None )
+			else : gl.glVertexAttribPointer( location, 3, gl.GL_FLOAT, gl.GL_FALSE, 0, None )
+		# Release the vertex array object, and the buffers
+		gl.glBindVertexArray( 0 )
+		gl.glBindBuffer( gl.GL_ARRAY_BUFFER, 0 )
+		gl.glBindBuffer( gl.GL_ELEMENT_ARRAY_BUFFER, 0 )
+		# Setup proxy element number
+		self.proxy_element_number = len(faces) * 3
+	# Close the proxy mesh
+	def CloseProxy( self ) :
+		# Discard the proxy being built, and the mesh waiting to be simplified
+		self.mesh_revision += 1
+		self.proxy_data = None
+		with self.proxy_lock : self.proxy_source = None
+		# Nothing to delete
+		if not self.proxy_element_number : return
+		# Delete buffer objects and vertex array
+		gl.glDeleteBuffers( len( self.proxy_buffer_ids ), np.array( self.proxy_buffer_ids ) )
+		gl.glDeleteVertexArrays( 1, np.array([ self.proxy_array_id ]) )
+		self.proxy_element_number = 0
+	# Create the color buffer object (the vertex array object must be bound)
+	def SetColorBuffer( self, colors ) :
+		self.color_enabled = True
+		self.color_dtype = colors.dtype
+		self.color_buffer_id = gl.glGenBuffers( 1 )
+		gl.glBindBuffer( gl.GL_ARRAY_BUFFER, self.color_buffer_id )
+		self.SendBuffer( gl.GL_ARRAY_BUFFER, colors, gl.GL_DYNAMIC_DRAW )
+		gl.glEnableVertexAttribArray( 2 )
+		if colors.dtype == np.uint8 : gl.glVertexAttribPointer( 2, 3, gl.GL_UNSIGNED_BYTE, gl.GL_TRUE, 0, None )
+		else : gl.glVertexAttribPointer( 2, 3, gl.GL_FLOAT, gl.GL_FALSE, 0, None )
+	# Update the vertex attributes of the loaded mesh (e.g. during an iterative smoothing)
+	# The face buffer stays on the GPU, and only the given attributes are sent
+	def UpdateMesh( self, vertices = None, normals = None, colors = None ) :
+		# No mesh loaded
+		if not self.element_number : return
+		# The proxy mesh is not up to date anymore
+		self.CloseProxy()
+		# Rebuild the proxy mesh with a copy of the updated attributes (the copied faces are shared)
+		if self.proxy_mesh is not None :
+			proxy_mesh = mtk.Mesh( name=self.proxy_mesh.name )
+			proxy_mesh.faces = self.proxy_mesh.faces
+			proxy_mesh.vertices = self.proxy_mesh.vertices if vertices is None else np.array( vertices )
+			proxy_mesh.colors = self.proxy_mesh.colors if colors is None else np.array( colors )
+			self.proxy_mesh = proxy_mesh
+			self.StartProxy()
+		# Update the vertex positions (with the normalization of the loaded mesh)
+		if vertices is not None :
+			vertices = np.asarray( vertices, dtype=np.float32 ) - self.center
+			vertices *= self.scale
+			self.UpdateBuffer( self.vertex_buffer_id, vertices )
+		# Update the vertex normals
+		if normals is not None :
+			self.UpdateBuffer( self.normal_buffer_id, np.asarray( normals, dtype=np.float32 ) )
+		# Update the vertex colors
+		if colors is not None :
+			colors = colors if colors.dtype == np.uint8 else np.asarray( colors, dtype=np.float32 )
+			# Same color type, update the buffer
+			if self.color_enabled and colors.dtype == self.color_dtype :
+				self.UpdateBuffer( self.color_buffer_id, colors )
+			# Create a new color buffer
+			else :
+				if self.color_enabled : gl.glDeleteBuffers( 1, np.array([ self.color_buffer_id ]) )
+				self.CheckVertexNumber( colors )
+				gl.glBindVertexArray( self.vertex_array_id )
+				self.SetColorBuffer( colors )
+				gl.glBindVertexArray( 0 )
+				gl.glBindBuffer( gl.GL_ARRAY_BUFFER, 0 )
+	# Replace the content of a vertex attribute buffer
+	def UpdateBuffer( self, buffer_id, values ) :
+		# Check the attribute size
+		self.CheckVertexNumber( values )
+		values = np.ascontiguousarray( values )
+		# Orphan the previous buffer storage, to avoid waiting for the draw calls still using it, and send the new values
+		gl.glBindBuffer( gl.GL_ARRAY_BUFFER, buffer_id )
+		gl.glBufferData( gl.GL_ARRAY_BUFFER, values.nbytes, None, gl.GL_DYNAMIC_DRAW )
+		gl.glBufferSubData( gl.GL_ARRAY_BUFFER, 0, values.nbytes, values )
+		gl.glBindBuffer( gl.GL_ARRAY_BUFFER, 0 )
+		# Count the uploaded bytes
+		self.statistics.uploaded_bytes += values.nbytes
+	# Create the storage of the bound buffer object with the given values
+	def SendBuffer( self, target, values, usage ) :
+		gl.glBufferData( target, values.nbytes, values, usage )
+		# Count the uploaded bytes
+		self.statistics.uploaded_bytes += values.nbytes
+	# Check the size of vertex attributes
+	def CheckVertexNumber( self, values ) :
+		if len( values ) != self.vertex_number :
+			raise RuntimeError( 'The updated attributes must have one value per vertex of the loaded mesh' )
 	# Close the mesh
 	def Close( self ) :
+		# Close the proxy mesh
+		self.CloseProxy()
+		self.proxy_mesh = None
 		# Need to initialise ?
 		if not self.element_number : return
 		# Delete buffer objects
@@ -107,6 +268,15 @@ class MeshViewer( object ) :
 		# Initialise the model parameters
 		self.element_number = 0
 		self.color_enabled = False
+	# Close the mesh, and release the OpenGL objects of the viewer (when the window closes)
+	def Exit( self ) :
+		# Close the mesh
+		self.Close()
+		# Delete the timer queries, and stop the statistics log
+		self.statistics.Close()
+		# Delete the text overlay
+		if self.overlay is not None : self.overlay.Close()
+		self.overlay = None
 	# Set the shader
 	def SetShader( self, shader ) :
 		# Setup the shader program
@@ -118,78 +288,116 @@ class MeshViewer( object ) :
 		self.antialiasing = not self.antialiasing
 		if self.antialiasing : gl.glEnable( gl.GL_MULTISAMPLE )
 		else : gl.glDisable( gl.GL_MULTISAMPLE )
+	# Enable / Disable the frame statistics overlay
+	def ToggleOverlay( self ) :
+		self.overlay_enabled = not self.overlay_enabled
 	# Display
 	def Display( self ) :
+		# Start the frame timers
+		self.statistics.BeginFrame()
 		# Clear all pixels and depth buffer
 		gl.glClear( gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT )
-		# Nothing to display
-		if not self.element_number : return
-		# Display the mesh with solid rendering
-		if self.wireframe_mode == 0 :
-			# Display the mesh
-			self.DisplayMesh()
-		# Display the mesh with wireframe rendering
-		elif self.wireframe_mode == 1 :
-			# 1st pass : wireframe model
-			gl.glPolygonMode( gl.GL_FRONT_AND_BACK, gl.GL_LINE )
-			self.DisplayMesh( self.wireframe_mode )
-			# 2nd pass : solid model
-			gl.glPolygonMode( gl.GL_FRONT_AND_BACK, gl.GL_FILL )
-			gl.glEnable( gl.GL_POLYGON_OFFSET_FILL )
-			gl.glPolygonOffset( 1.0, 1.0 )
-			self.DisplayMesh()
-			gl.glDisable( gl.GL_POLYGON_OFFSET_FILL )
-		# Display the mesh with hidden line removal rendering
-		elif self.wireframe_mode == 2 :
-			# 1st pass : wireframe model
-			gl.glPolygonMode( gl.GL_FRONT_AND_BACK, gl.GL_LINE )
-			self.DisplayMesh()
-			# 2nd pass : hidden line removal
-			gl.glPolygonMode( gl.GL_FRONT_AND_BACK, gl.GL_FILL )
-			gl.glEnable( gl.GL_POLYGON_OFFSET_FILL )
-			gl.glPolygonOffset( 1.0, 1.0 )
-			self.DisplayMesh( self.wireframe_mode )
-			gl.glDisable( gl.GL_POLYGON_OFFSET_FILL )
-	# Display the mesh
-	def DisplayMesh( self, wireframe_mode = 0 ) :
-		# Use the shader program
-		gl.glUseProgram( self.shader )
+		# Upload the proxy mesh built in the background
+		if self.proxy_data is not None : self.UploadProxy()
+		# Display the mesh
+		if self.element_number :
+			# Display the proxy mesh during the trackball motions, or the full resolution mesh
+			if self.trackball.button and self.proxy_element_number :
+				( vertex_array_id, element_number ) = ( self.proxy_array_id, self.proxy_element_number )
+			else :
+				( vertex_array_id, element_number ) = ( self.vertex_array_id, self.element_number )
+			# Use the shader program
+			gl.glUseProgram( self.shader )
+			# Send the transformation matrices to the shader
+			self.UpdateMatrices()
+			gl.glUniformMatrix3fv( self.shader.uniforms[ 'Normal_Matrix' ], 1, gl.GL_FALSE, self.normal_matrix )
+			gl.glUniformMatrix4fv( self.shader.uniforms[ 'MVP_Matrix' ], 1, gl.GL_FALSE, self.mvp_matrix )
+			# Activate color in the shader if necessary
+			gl.glUniform1i( self.shader.uniforms[ 'color_enabled' ], self.color_enabled )
+			# Vertex array object
+			gl.glBindVertexArray( vertex_array_id )
+			# Display the mesh with solid rendering
+			if self.wireframe_mode == 0 :
+				# Display the mesh
+				self.DisplayMesh( element_number )
+			# Display the mesh with wireframe rendering
+			elif self.wireframe_mode == 1 :
+				# 1st pass : wireframe model
+				gl.glPolygonMode( gl.GL_FRONT_AND_BACK, gl.GL_LINE )
+				self.DisplayMesh( element_number, self.wireframe_mode )
+				# 2nd pass : solid model
+				gl.glPolygonMode( gl.GL_FRONT_AND_BACK, gl.GL_FILL )
+				gl.glEnable( gl.GL_POLYGON_OFFSET_FILL )
+				gl.glPolygonOffset( 1.0, 1.0 )
+				self.DisplayMesh( element_number )
+				gl.glDisable( gl.GL_POLYGON_OFFSET_FILL )
+			# Display the mesh with hidden line removal rendering
+			elif self.wireframe_mode == 2 :
+				# 1st pass : wireframe model
+				gl.glPolygonMode( gl.GL_FRONT_AND_BACK, gl.GL_LINE )
+				self.DisplayMesh( element_number )
+				# 2nd pass : hidden line removal
+				gl.glPolygonMode( gl.GL_FRONT_AND_BACK, gl.GL_FILL )
+				gl.glEnable( gl.GL_POLYGON_OFFSET_FILL )
+				gl.glPolygonOffset( 1.0, 1.0 )
+				self.DisplayMesh( element_number, self.wireframe_mode )
+				gl.glDisable( gl.GL_POLYGON_OFFSET_FILL )
+			# Release the vertex array object
+			gl.glBindVertexArray( 0 )
+			# Release the shader program
+			gl.glUseProgram( 0 )
+		# Count the frame and its CPU time
+		self.frame_cpu_time = self.statistics.EndFrame()
+		self.frame_number = self.statistics.frame_number
+		# Display the frame statistics (outside of the measure)
+		if self.overlay_enabled : self.DisplayOverlay()
+	# Display the average statistics of the last frames over the mesh
+	def DisplayOverlay( self ) :
+		# Create the overlay in the OpenGL context
+		if self.overlay is None : self.overlay = mtk.TextOverlay()
+		# Update the text a few times per second, to keep it readable
+		if self.frame_number % 15 == 1 or not self.overlay.texture_size[0] :
+			summary = self.statistics.GetSummary()
+			if summary is None : return
+			self.overlay.SetText( [ 'FPS    {:.1f}'.format( summary[ 'FPS' ] ),
+				'CPU    {:.2f} MS'.format( summary[ 'CPU' ] ),
+				'GPU    {:.2f} MS'.format( summary[ 'GPU' ] ),
+				'DRAWS  {:.1f}'.format( summary[ 'Draws' ] ),
+				'UPLOAD {:.1f} KB'.format( summary[ 'Upload' ] / 1024.0 ) ] )
+		# Draw the text
+		self.overlay.Draw( self.width, self.height )
+	# Display the mesh (the shader program and the vertex array object are already bound)
+	def DisplayMesh( self, element_number, wireframe_mode = 0 ) :
+		# Activate hidden lines in the shader for wireframe rendering
+		gl.glUniform1i( self.shader.uniforms[ 'wireframe_mode' ], wireframe_mode )
+		# Draw the mesh
+		gl.glDrawElements( gl.GL_TRIANGLES, element_number, gl.GL_UNSIGNED_INT, None )
+		# Count the draw call
+		self.statistics.draw_calls += 1
+	# Update the transformation matrices if the trackball or the projection has changed
+	def UpdateMatrices( self ) :
+		# Matrices up to date
+		if self.matrix_revision == self.trackball.revision : return
 		# Apply trackball transformation to the initial model-view matrix
 		modelview_matrix = np.dot( self.trackball.transformation, self.modelview_matrix )
-		# Send the transformation matrix to the shader (as the normal matrix for shading)
-		gl.glUniformMatrix3fv( gl.glGetUniformLocation( self.shader, b'Normal_Matrix' ),
-			1, gl.GL_FALSE, np.array( self.trackball.transformation[ :3, :3 ] ) )
-		# Senf the MVP matrix to the shader
-		gl.glUniformMatrix4fv( gl.glGetUniformLocation( self.shader, b'MVP_Matrix' ),
-			1, gl.GL_FALSE, np.dot( modelview_matrix, self.projection_matrix ) )
-		# Activate color in the shader if necessary
-		gl.glUniform1i( gl.glGetUniformLocation( self.shader, b'color_enabled' ), self.color_enabled )
-		# Activate hidden lines in the shader for wireframe rendering
-		gl.glUniform1i( gl.glGetUniformLocation( self.shader, b'wireframe_mode' ), wireframe_mode )
-		# Vertex array object
-		gl.glBindVertexArray( self.vertex_array_id )
-		gl.glBindBuffer( gl.GL_ELEMENT_ARRAY_BUFFER, self.face_buffer_id )
-		# Draw the mesh
-		gl.glDrawElements( gl.GL_TRIANGLES, self.element_number, gl.GL_UNSIGNED_INT, None )
-		# Release the vertex array object
-		gl.glBindVertexArray( 0 )
-		# Release the shader program
-		gl.glUseProgram( 0 )
+		# Model-View-Projection matrix
+		self.mvp_matrix = np.ascontiguousarray( np.dot( modelview_matrix, self.projection_matrix ), dtype=np.float32 )
+		# Normal matrix for shading (rotation part of the trackball transformation)
+		self.normal_matrix = np.ascontiguousarray( self.trackball.transformation[ :3, :3 ], dtype=np.float32 )
+		# Register the trackball revision
+		self.matrix_revision = self.trackball.revision
 	# Resize the viewport
 	def Resize( self, width, height ) :
 		# Resize the viewport
 		gl.glViewport( 0, 0, width, height )
+		self.width = width
+		self.height = height
 		# Resize the trackball
 		self.trackball.Resize( width, height )
 		# Compute perspective projection matrix
 		self.SetProjectionMatrix( width, height )
 	# Compute a perspective matrix
 	def SetProjectionMatrix( self, width, height ) :
-		fovy, aspect, near, far = 45.0, float(width)/height, 0.1, 100.0
-		f = math.tan( math.pi * fovy / 360.0 )
-		self.projection_matrix = np.identity( 4, dtype=np.float32 )
-		self.projection_matrix[0,0] = 1.0 / (f * aspect)
-		self.projection_matrix[1,1] = 1.0 / f
-		self.projection_matrix[2,2] = - (far + near) / (far - near)
-		self.projection_matrix[2,3] = - 1.0
-		self.projection_matrix[3,2] = - 2.0 * near * far / (far - near)
+		self.projection_matrix = mtk.GetProjectionMatrix( width, height )
+		# Force the update of the transformation matrices
+		self.matrix_revision = None
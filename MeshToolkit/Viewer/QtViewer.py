@@ -5,6 +5,7 @@
 #
 
 # External dependencies
+import os
 import sys
 import PySide as qt
 import PySide.QtCore as qtcore
@@ -28,7 +29,7 @@ class QtViewer( qtgui.QApplication ) :
 # to get our mesh viewer
 class QtOpenGLWidget( qtgl.QGLWidget ) :
 	# Initialisation
-	def __init__( self, parent = None, mesh = None ) :
+	def __init__( self, parent = None, mesh = None, frame_log = None ) :
 		# Initialise QGLWidget with multisampling enabled and OpenGL 3 core only
 		super( QtOpenGLWidget, self ).__init__( qtgl.QGLFormat( qtgl.QGL.SampleBuffers | qtgl.QGL.NoDeprecatedFunctions ), parent )
 		# Track mouse events
@@ -37,12 +38,19 @@ class QtOpenGLWidget( qtgl.QGLWidget ) :
 		self.setGeometry( 100, 100, 1024, 768 )
 		# Mesh loaded at the initialisation
 		self.mesh = mesh
+		# CSV file to log the frame statistics
+		self.frame_log = frame_log
+		# Background mesh loader, and the cancelled loaders still running
+		self.loader = None
+		self.cancelled_loaders = []
 	# initializeGL
 	def initializeGL( self ) :
 		# Create the mesh viewer
 		self.meshviewer = mtk.MeshViewer()
 		# OpenGL initialization
 		self.meshviewer.InitialiseOpenGL( self.width(), self.height() )
+		# Log the frame statistics
+		if self.frame_log : self.meshviewer.statistics.StartLog( self.frame_log )
 		# Mesh during initialization ?
 		if self.mesh :
 			# Load the mesh
@@ -71,6 +79,8 @@ class QtOpenGLWidget( qtgl.QGLWidget ) :
 	def mouseReleaseEvent( self, mouseEvent ) :
 		# Update the trackball
 		self.meshviewer.trackball.MouseRelease()
+		# Refresh display (full resolution mesh)
+		self.update()
 	# mouseMoveEvent
 	def mouseMoveEvent( self, mouseEvent ) :
 		# Update the trackball
@@ -103,19 +113,27 @@ class QtOpenGLWidget( qtgl.QGLWidget ) :
 		elif event.key() == qtcore.Qt.Key_G :
 			# Smooth shading
 			self.meshviewer.SetShader( 'Smooth' )
+		# I
+		elif event.key() == qtcore.Qt.Key_I :
+			# Frame statistics overlay
+			self.meshviewer.ToggleOverlay()
+		# L
+		elif event.key() == qtcore.Qt.Key_L :
+			# Nothing to smooth
+			if not self.mesh : return
+			# Apply a uniform laplacian smoothing step, and send only the new vertex attributes to the viewer
+			mtk.UniformLaplacianSmoothing( self.mesh, 1, 0.5 )
+			self.mesh.UpdateNormals()
+			self.meshviewer.UpdateMesh( vertices=self.mesh.vertices, normals=self.mesh.vertex_normals )
 		# O
 		elif event.key() == qtcore.Qt.Key_O :
 			# Open file dialog
-			( filename, selected_filter ) = qtgui.QFileDialog.getOpenFileName( self, 'Open a Stanford PLY file...', '',
-				'Stanford PLY files (*.ply);;All files (*.*)' )
+			( filename, selected_filter ) = qtgui.QFileDialog.getOpenFileName( self, 'Open a mesh file...', '',
+				'Mesh files (*.ply *.stl);;Stanford PLY files (*.ply);;STL files (*.stl);;All files (*.*)' )
 			# Check filename
 			if not filename : return
-			# Read PLY file
-			self.mesh = mtk.ReadPly( filename )
-			# Send the mesh to the OpenGL viewer
-			self.meshviewer.LoadMesh( self.mesh )
-			# Set the window title
-			self.setWindowTitle( self.mesh.name )
+			# Read the mesh file in the background
+			self.OpenMesh( filename )
 		# R
 		elif event.key() == qtcore.Qt.Key_R :
 			# Reset model translation and rotation
@@ -133,7 +151,8 @@ class QtOpenGLWidget( qtgl.QGLWidget ) :
 			mtk.WritePly( self.mesh, filename )
 		# W
 		elif event.key() == qtcore.Qt.Key_W :
-			# Close the mesh
+			# Close the mesh, and cancel its loading
+			self.CancelLoading()
 			self.meshviewer.Close()
 			self.mesh = None
 			# Set the window title
@@ -160,3 +179,104 @@ class QtOpenGLWidget( qtgl.QGLWidget ) :
 		else : return
 		# Refresh display
 		self.update()
+	# Close event
+	def closeEvent( self, event ) :
+		# Cancel the loading
+		self.CancelLoading()
+		# Release the OpenGL objects
+		self.makeCurrent()
+		self.meshviewer.Exit()
+		# Close the widget
+		super( QtOpenGLWidget, self ).closeEvent( event )
+	# Read and prepare a mesh file on a background thread (the previous loading is cancelled)
+	def OpenMesh( self, filename ) :
+		# Cancel the previous loading
+		self.CancelLoading()
+		# Start the loader
+		self.loader = MeshLoader( filename )
+		self.loader.progress.connect( self.LoadProgress )
+		self.loader.loaded.connect( self.LoadFinished )
+		self.loader.start()
+	# Cancel the current loading
+	def CancelLoading( self ) :
+		# Forget the loaders finished
+		self.cancelled_loaders = [ loader for loader in self.cancelled_loaders if loader.isRunning() ]
+		# No loading
+		if not self.loader : return
+		# Keep the cancelled loader until its thread finishes
+		self.loader.Cancel()
+		self.cancelled_loaders.append( self.loader )
+		self.loader = None
+	# Display the loading progress in the window title
+	def LoadProgress( self, percent, message ) :
+		# Ignore the progress of a cancelled loader
+		if self.sender() is not self.loader : return
+		# Set the window title
+		self.setWindowTitle( '{} ({}%)'.format( message, percent ) )
+	# Send the mesh prepared in the background to the OpenGL viewer (on the GUI thread)
+	def LoadFinished( self, mesh_data ) :
+		# Ignore the mesh of a cancelled loader
+		if self.sender() is not self.loader : return
+		self.loader = None
+		# Invalid file, report the error and keep the current mesh
+		if mesh_data is None :
+			print( 'Cannot load {} : {}'.format( self.sender().filename, self.sender().error ) )
+			self.setWindowTitle( 'Cannot load {}'.format( os.path.basename( self.sender().filename ) ) )
+			return
+		# Upload the mesh data
+		self.makeCurrent()
+		self.meshviewer.UploadMesh( mesh_data )
+		self.mesh = mesh_data[0]
+		# Set the window title
+		self.setWindowTitle( self.mesh.name )
+		# Refresh display
+		self.update()
+
+# Thread to read a mesh file, and prepare its data for the OpenGL viewer
+class MeshLoader( qtcore.QThread ) :
+	# Loading progress (percentage, message)
+	progress = qtcore.Signal( int, str )
+	# Prepared mesh data (None for an invalid file, the error is given by the error attribute)
+	loaded = qtcore.Signal( object )
+	# Initialisation
+	def __init__( self, filename ) :
+		# Initialize parent class
+		super( MeshLoader, self ).__init__()
+		# File to load
+		self.filename = filename
+		# Cancellation flag
+		self.cancelled = False
+		# Loading error
+		self.error = None
+	# Cancel the loading (checked between the loading steps)
+	def Cancel( self ) :
+		self.cancelled = True
+	# Load the mesh
+	def run( self ) :
+		# Send an empty mesh to the GUI thread if the loading fails
+		try : mesh_data = self.Load()
+		except Exception as error :
+			( mesh_data, self.error ) = ( None, error )
+		if self.cancelled : return
+		# Send the mesh data to the GUI thread
+		self.loaded.emit( mesh_data )
+	# Read the mesh file, and prepare its data (return None if the loading is cancelled)
+	def Load( self ) :
+		# Read the mesh file
+		self.progress.emit( 0, 'Reading {}'.format( os.path.basename( self.filename ) ) )
+		if self.filename.lower().endswith( '.stl' ) : mesh = mtk.ReadStl( self.filename )
+		else : mesh = mtk.ReadPly( self.filename )
+		if self.cancelled : return
+		# Invalid file
+		if mesh is None : raise RuntimeError( 'Wrong file format !' )
+		# Compute the normals
+		self.progress.emit( 60, 'Computing the normals of {}'.format( mesh.name ) )
+		if mesh.vertex_normal_number != mesh.vertex_number : mesh.UpdateNormals()
+		if self.cancelled : return
+		# Prepare the OpenGL buffers
+		self.progress.emit( 90, 'Preparing {}'.format( mesh.name ) )
+		mesh_data = mtk.PrepareMesh( mesh )
+		if self.cancelled : return
+		# Return the mesh data
+		self.progress.emit( 100, 'Uploading {}'.format( mesh.name ) )
+		return mesh_data
@@ -0,0 +1,123 @@
+# -*- coding:utf-8 -*-
+
+#
+# Render a mesh into an image without OpenGL (e.g. thumbnails on a server without display)
+#
+
+# The rendering reproduces the mesh viewer :
+#   - same camera (normalization of the mesh, model-view and projection matrices, trackball transformation),
+#   - same back-face culling and depth test,
+#   - same flat and smooth shading models as the shaders (directional light along the view axis).
+# The triangles are rasterized in batches with NumPy : each triangle generates the pixels of its bounding box,
+# the pixels inside the triangle are kept, and the closest pixels are selected with a depth buffer.
+
+# External dependencies
+import struct
+import zlib
+import numpy as np
+import MeshToolkit as mtk
+
+# Render a mesh into an RGB image (uint8 array of shape height x width x 3)
+# The optional transformation is a trackball transformation matrix of the mesh viewer
+# The pixel number processed at once is limited by batch_size
+def RenderMesh( mesh, width = 1024, height = 1024, shader = 'Smooth', transformation = None, background = ( 1.0, 1.0, 1.0 ), batch_size = 2000000 ) :
+	# Prepare the mesh data as for the mesh viewer
+	( mesh, vertices, faces, normals, colors, center, scale ) = mtk.PrepareMesh( mesh )
+	# Trackball transformation
+	if transformation is None : transformation = np.identity( 4 )
+	transformation = np.asarray( transformation, dtype=np.float64 )
+	# Model-View-Projection matrix
+	mvp_matrix = np.dot( np.dot( transformation, mtk.GetModelViewMatrix() ), mtk.GetProjectionMatrix( width, height ) )
+	# Transform the vertices in clip coordinates
+	clip = np.dot( vertices, mvp_matrix[:3] ) + mvp_matrix[3]
+	# Vertex shading (the light is along the view axis : the intensity is the Z coordinate of the rotated normal)
+	intensity = np.maximum( 0.0, np.dot( normals, transformation[ :3, 2 ] ) )
+	if len( colors ) : vertex_colors = colors / 255.0 if colors.dtype == np.uint8 else np.asarray( colors, dtype=np.float64 )
+	else : vertex_colors = np.full( ( len( vertices ), 3 ), 0.7 )
+	vertex_colors = vertex_colors * intensity[ :, np.newaxis ]
+	# Discard the faces behind the camera
+	faces = faces[ ( clip[ faces, 3 ] > 0 ).all( axis=1 ) ]
+	# Screen coordinates (the image origin is the top-left corner)
+	w = clip[ :, 3 ]
+	x = ( clip[ :, 0 ] / w + 1.0 ) * 0.5 * width
+	y = ( 1.0 - clip[ :, 1 ] / w ) * 0.5 * height
+	z = clip[ :, 2 ] / w
+	# Signed area of the faces
+	( fx, fy ) = ( x[ faces ], y[ faces ] )
+	area = ( fx[:,1] - fx[:,0] ) * ( fy[:,2] - fy[:,0] ) - ( fx[:,2] - fx[:,0] ) * ( fy[:,1] - fy[:,0] )
+	# Cull the back faces (counter-clockwise front faces, clockwise on the screen because of the Y axis)
+	front = area < 0
+	( faces, fx, fy, area ) = ( faces[ front ], fx[ front ], fy[ front ], area[ front ] )
+	# Bounding boxes of the faces in pixels (the pixel centers are at half-integer coordinates)
+	xmin = np.maximum( np.ceil( fx.min( axis=1 ) - 0.5 ), 0 ).astype( np.int64 )
+	xmax = np.minimum( np.floor( fx.max( axis=1 ) - 0.5 ), width - 1 ).astype( np.int64 )
+	ymin = np.maximum( np.ceil( fy.min( axis=1 ) - 0.5 ), 0 ).astype( np.int64 )
+	ymax = np.minimum( np.floor( fy.max( axis=1 ) - 0.5 ), height - 1 ).astype( np.int64 )
+	# Discard the faces covering no pixel center (most of the faces of a large mesh)
+	covering = ( xmin <= xmax ) & ( ymin <= ymax )
+	( faces, fx, fy, area ) = ( faces[ covering ], fx[ covering ], fy[ covering ], area[ covering ] )
+	( xmin, xmax, ymin, ymax ) = ( xmin[ covering ], xmax[ covering ], ymin[ covering ], ymax[ covering ] )
+	# Barycentric coordinates as linear functions of the pixel coordinates (a * x + b * y + c)
+	coefficients = np.empty( ( len( faces ), 3, 3 ) )
+	for ( i, j, k ) in ( ( 0, 1, 2 ), ( 1, 2, 0 ), ( 2, 0, 1 ) ) :
+		coefficients[ :, i, 0 ] = ( fy[:,j] - fy[:,k] ) / area
+		coefficients[ :, i, 1 ] = ( fx[:,k] - fx[:,j] ) / area
+		coefficients[ :, i, 2 ] = ( fx[:,j] * fy[:,k] - fx[:,k] * fy[:,j] ) / area
+	# Initialise the depth and color buffers
+	depth_buffer = np.full( width * height, np.inf )
+	color_buffer = np.empty( ( width * height, 3 ) )
+	color_buffer[:] = background
+	# Split the faces into batches of pixels
+	box_width = xmax - xmin + 1
+	pixel_numbers = box_width * ( ymax - ymin + 1 )
+	offsets = np.concatenate( ( [ 0 ], np.cumsum( pixel_numbers ) ) )
+	boundaries = np.searchsorted( offsets, np.arange( 0, offsets[-1], batch_size ), side='right' ) - 1
+	boundaries = np.unique( np.concatenate( ( boundaries, [ len( faces ) ] ) ) )
+	# Rasterize each batch of faces
+	for ( start, stop ) in zip( boundaries[:-1], boundaries[1:] ) :
+		# Pixels of the face bounding boxes
+		face_index = np.repeat( np.arange( start, stop ), pixel_numbers[ start:stop ] )
+		local_index = np.arange( offsets[ start ], offsets[ stop ] ) - offsets[ face_index ]
+		px = xmin[ face_index ] + local_index % box_width[ face_index ]
+		py = ymin[ face_index ] + local_index // box_width[ face_index ]
+		# Barycentric coordinates of the pixel centers
+		c = coefficients[ face_index ]
+		barycentric = c[ :, :, 0 ] * ( px + 0.5 )[ :, np.newaxis ] + c[ :, :, 1 ] * ( py + 0.5 )[ :, np.newaxis ] + c[ :, :, 2 ]
+		# Keep the pixels inside the faces
+		inside = ( barycentric >= 0 ).all( axis=1 )
+		( face_index, px, py, barycentric ) = ( face_index[ inside ], px[ inside ], py[ inside ], barycentric[ inside ] )
+		# Pixel depth (linear in screen space), clipped by the near and far planes
+		depth = ( barycentric * z[ faces[ face_index ] ] ).sum( axis=1 )
+		visible = ( depth >= -1.0 ) & ( depth <= 1.0 )
+		( face_index, barycentric, depth ) = ( face_index[ visible ], barycentric[ visible ], depth[ visible ] )
+		pixel_index = ( py * width + px )[ visible ]
+		# Depth test
+		np.minimum.at( depth_buffer, pixel_index, depth )
+		closest = depth == depth_buffer[ pixel_index ]
+		( face_index, barycentric, pixel_index ) = ( face_index[ closest ], barycentric[ closest ], pixel_index[ closest ] )
+		# Flat shading : color of the last vertex of the face (OpenGL provoking vertex)
+		if shader == 'Flat' :
+			color_buffer[ pixel_index ] = vertex_colors[ faces[ face_index, 2 ] ]
+		# Smooth shading : perspective-correct interpolation of the vertex colors
+		else :
+			weights = barycentric / w[ faces[ face_index ] ]
+			weights /= weights.sum( axis=1 )[ :, np.newaxis ]
+			color_buffer[ pixel_index ] = ( weights[ :, :, np.newaxis ] * vertex_colors[ faces[ face_index ] ] ).sum( axis=1 )
+	# Return the 8-bit image
+	return np.round( np.clip( color_buffer, 0.0, 1.0 ) * 255 ).astype( np.uint8 ).reshape( height, width, 3 )
+
+# Write an RGB image (uint8 array of shape height x width x 3) to a PNG file
+def WritePng( image, filename ) :
+	# PNG chunk with its length and checksum
+	def Chunk( chunk_type, data ) :
+		return struct.pack( '>I', len( data ) ) + chunk_type + data + struct.pack( '>I', zlib.crc32( chunk_type + data ) & 0xffffffff )
+	# Image rows, each preceded by the filter type (none)
+	( height, width ) = image.shape[:2]
+	rows = np.zeros( ( height, width * 3 + 1 ), dtype=np.uint8 )
+	rows[ :, 1: ] = np.asarray( image, dtype=np.uint8 ).reshape( height, width * 3 )
+	# Write the PNG file (signature, header, compressed image data, end)
+	with open( filename, 'wb' ) as png_file :
+		png_file.write( b'\x89PNG\r\n\x1a\n' )
+		png_file.write( Chunk( b'IHDR', struct.pack( '>IIBBBBB', width, height, 8, 2, 0, 0, 0 ) ) )
+		png_file.write( Chunk( b'IDAT', zlib.compress( rows.tobytes(), 6 ) ) )
+		png_file.write( Chunk( b'IEND', b'' ) )
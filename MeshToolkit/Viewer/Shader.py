@@ -28,6 +28,11 @@ def LoadShaders( *shaders ) :
 	# Return the program ID
 	return program
 
+# Get the locations of the given uniform variables of a shader program
+# Return a dictionary of the locations (-1 for the variables not used by the program)
+def GetUniformLocations( program, names ) :
+	return { name : gl.glGetUniformLocation( program, name.encode() ) for name in names }
+
 # Compile a shader from source code
 def CompileShader( shader_source, shader_type ) :
 	# Create the shaders
@@ -50,7 +55,12 @@ class FlatShader( int ) :
 		program = LoadShaders( CompileShader( cls.flat_shader_vertex, gl.GL_VERTEX_SHADER ),
 			CompileShader( cls.flat_shader_fragment, gl.GL_FRAGMENT_SHADER ) )
 		# Register the program ID
-		return super( FlatShader, cls ).__new__( cls, program )
+		shader = super( FlatShader, cls ).__new__( cls, program )
+		# Resolve the uniform locations once
+		shader.uniforms = GetUniformLocations( program, cls.uniform_names )
+		return shader
+	# Uniform variables
+	uniform_names = ( 'MVP_Matrix', 'Normal_Matrix', 'color_enabled', 'wireframe_mode' )
 	# Flat shading - Vertex shader
 	flat_shader_vertex = '''#version 330 core
 		layout (location = 0) in vec4 Vertex;
@@ -96,7 +106,12 @@ class SmoothShader( int ) :
 		program = LoadShaders( CompileShader( cls.smooth_shader_vertex, gl.GL_VERTEX_SHADER ),
 			CompileShader( cls.smooth_shader_fragment, gl.GL_FRAGMENT_SHADER ) )
 		# Register the program ID
-		return super( SmoothShader, cls ).__new__( cls, program )
+		shader = super( SmoothShader, cls ).__new__( cls, program )
+		# Resolve the uniform locations once
+		shader.uniforms = GetUniformLocations( program, cls.uniform_names )
+		return shader
+	# Uniform variables
+	uniform_names = ( 'MVP_Matrix', 'Normal_Matrix', 'color_enabled', 'wireframe_mode' )
 	# Smooth shading - Vertex shader
 	smooth_shader_vertex = '''#version 330 core
 	layout (location = 0) in vec4 Vertex;
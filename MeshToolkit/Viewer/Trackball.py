@@ -28,10 +28,13 @@ class Trackball( object ) :
 		self.previous_mouse_position = [ 0, 0 ]
 		# Tranformation matrix
 		self.transformation = np.identity( 4, dtype=np.float32 )
+		# Revision number of the transformation matrix (incremented on every change)
+		self.revision = 0
 	# Reset the current transformation
 	def Reset( self ) :
 		# Reset the tranformation matrix
 		self.transformation = np.identity( 4, dtype=np.float32 )
+		self.revision += 1
 	# Resize the viewing parameters
 	def Resize( self, width, height ) :
 		# Change window size
@@ -57,6 +60,7 @@ class Trackball( object ) :
 		# Translate the transformation matrix
 		m = self.transformation
 		m[3] = m[0] * translation[0] + m[1] * translation[1] + m[2] * translation[2] + m[3]
+		self.revision += 1
 	# Handle when the mouse is moved
 	def MouseMove( self, mouse_x, mouse_y ) :
 		# Rotation
@@ -94,6 +98,8 @@ class Trackball( object ) :
 			m[3] = m[0] * translation[0] + m[1] * translation[1] + m[2] * translation[2] + m[3]
 		# No update
 		else : return False
+		# Register the change of the transformation
+		self.revision += 1
 		# Save the mouse position
 		self.previous_mouse_position = [ mouse_x, mouse_y ]
 		# Require a display update
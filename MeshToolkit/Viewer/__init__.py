@@ -1,10 +1,24 @@
-from . import GlutViewer
-from .GlutViewer import *
-from . import MeshViewer
-from .MeshViewer import *
-from . import QtViewer
-from .QtViewer import *
-from . import Shader
-from .Shader import *
+from . import Camera
+from .Camera import *
+from . import Rasterizer
+from .Rasterizer import *
 from . import Trackball
 from .Trackball import *
+# OpenGL viewers (optional, require PyOpenGL and GLUT)
+try :
+	from . import GlutViewer
+	from .GlutViewer import *
+	from . import Instrumentation
+	from .Instrumentation import *
+	from . import MeshViewer
+	from .MeshViewer import *
+	from . import Shader
+	from .Shader import *
+except ImportError :
+	pass
+# Qt viewer (optional, requires PySide)
+try :
+	from . import QtViewer
+	from .QtViewer import *
+except ImportError :
+	pass
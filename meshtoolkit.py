@@ -7,6 +7,7 @@
 
 # External dependencies
 import argparse
+import json
 import sys
 import numpy as np
 import MeshToolkit as mtk
@@ -15,26 +16,46 @@ import MeshToolkit as mtk
 input_mesh = None
 # Create a command line argument parser
 parser = argparse.ArgumentParser( description='Process 3D triangular meshes.', usage='%(prog)s [options] input_mesh' )
-parser.add_argument( 'input_mesh', nargs='?', default=None, help='Input mesh file in PLY format' )
+parser.add_argument( 'input_mesh', nargs='?', default=None, help='Input mesh file in PLY or STL format' )
 parser.add_argument( '-i',  action='store_true', help='Print mesh informations' )
 parser.add_argument( '-b',  action='store_true', help='Color vertices on a border' )
 parser.add_argument( '-c', action='store_true', help='Check different mesh parameters' )
+parser.add_argument( '-cr', metavar='file', action='store', help='Write a mesh check report to a JSON file' )
+parser.add_argument( '-w', nargs='?', const=0.0, type=float, metavar='T', help='Weld the vertices closer than tolerance T (default: exact duplicates)' )
+parser.add_argument( '-d', metavar='file', action='store', help='Compute the signed distance to a reference mesh file' )
+parser.add_argument( '-dec', metavar='F', type=int, help='Decimate the mesh down to F faces' )
+parser.add_argument( '-ir', nargs='?', const=0.0, type=float, metavar='L', help='Isotropic remeshing with the target edge length L (default: mean edge length)' )
+parser.add_argument( '-r', action='store_true', help='Remove degenerated and duplicated faces, and isolated vertices, and orient the faces' )
+parser.add_argument( '-rc', metavar='N', type=int, help='Remove the connected components with less than N faces' )
+parser.add_argument( '-fh', metavar='N', type=int, help='Fill the holes with at most N border edges' )
 parser.add_argument( '-gc', action='store_true', help='Compute the surface gaussian curvature' )
 parser.add_argument( '-nc', action='store_true', help='Compute the surface normal curvature' )
+parser.add_argument( '-pc', action='store_true', help='Compute the surface principal curvatures' )
+parser.add_argument( '-ao', nargs='?', const=32, type=int, metavar='N', help='Compute the ambient occlusion with N rays per vertex (default: 32)' )
+parser.add_argument( '-th', action='store_true', help='Compute the surface thickness' )
+parser.add_argument( '-gd', metavar='V', type=int, help='Compute the geodesic distance from the vertex V' )
 parser.add_argument( '-ul', nargs=2, metavar=('N', 'D'), help='Uniform laplacian smoothing with N iteration steps and D diffusion constant' )
 parser.add_argument( '-ncf', nargs=2, metavar=('N', 'D'), help='Normalized curvature flow smoothing with N iteration steps and D diffusion constant' )
-parser.add_argument( '-o', metavar='file', action='store', help='Write the resulting mesh to a PLY file' )
+parser.add_argument( '-sd', nargs='+', metavar=('N', 'S'), help='Subdivide the mesh N times with the scheme S (loop or midpoint, default: loop)' )
+parser.add_argument( '-o', metavar='file', action='store', help='Write the resulting mesh to a PLY or STL file' )
+parser.add_argument( '-png', nargs='+', metavar=('file', 'S'), help='Render the resulting mesh to a PNG image of size S (default: 1024)' )
 parser.add_argument( '-cm', default='CubeHelix', metavar='colormap', action='store', help='Colormap (default: cubehelix)' )
 parser.add_argument( '-t', action='store_true', help='Test function' )
 parser.add_argument( '-qt', action='store_true', help='Launch OpenGL viewer with Qt' )
 parser.add_argument( '-glut', action='store_true', help='Launch OpenGL viewer with GLUT' )
+parser.add_argument( '-fl', metavar='file', action='store', help='Log the frame statistics of the OpenGL viewer to a CSV file' )
 # Process command line parameters
 args = parser.parse_args()
 # Input mesh
 if args.input_mesh :
 	# Read the input mesh file
 	print( 'Read file ' + args.input_mesh + '... ' )
-	input_mesh = mtk.ReadPly( args.input_mesh )
+	if args.input_mesh.lower().endswith( '.stl' ) : input_mesh = mtk.ReadStl( args.input_mesh )
+	else : input_mesh = mtk.ReadPly( args.input_mesh )
+	# Weld duplicated vertices
+	if args.w is not None :
+		print( 'Weld vertices... ' )
+		mtk.WeldVertices( input_mesh, args.w )
 	# Compute surface normals
 	print( 'Compute normals... ' )
 	input_mesh.UpdateNormals()
@@ -44,7 +65,7 @@ if args.input_mesh :
 # Launch standalone QtViewer
 elif args.qt :
 	print( 'Launch Qt viewer... ' )
-	mtk.QtViewer()
+	mtk.QtViewer( frame_log=args.fl )
 # Launch standalone Test
 elif args.t :
 	print( 'Test... ' )
@@ -62,10 +83,45 @@ if args.i :
 if args.c :
 	print( 'Check mesh... ' )
 	print( mtk.Check( input_mesh ) )
+# Write a mesh check report
+if args.cr :
+	print( 'Write check report ' + args.cr + '... ' )
+	with open( args.cr, 'w' ) as report_file :
+		json.dump( mtk.GetCheckReport( input_mesh ), report_file, indent=1, default=lambda value : value.tolist() )
 # Color vertices on a border
 if args.b :
 	print( 'Color border vertices... ' )
 	input_mesh.colors = mtk.Colormap( args.cm ).ValueArrayToColor( input_mesh.GetBorderVertices() )
+# Repair the mesh
+if args.r :
+	print( 'Repair mesh... ' )
+	mtk.RemoveDegeneratedFaces( input_mesh )
+	mtk.RemoveDuplicatedFaces( input_mesh )
+	mtk.RemoveIsolatedVertices( input_mesh )
+	mtk.OrientFaces( input_mesh )
+	print( input_mesh )
+# Remove the small connected components
+if args.rc :
+	print( 'Remove small components... ' )
+	mtk.RemoveSmallComponents( input_mesh, args.rc )
+	print( input_mesh )
+# Fill the small holes
+if args.fh :
+	print( 'Fill holes... ' )
+	mtk.FillHoles( input_mesh, args.fh )
+	print( input_mesh )
+# Compute the distance to a reference mesh
+if args.d :
+	print( 'Read file ' + args.d + '... ' )
+	if args.d.lower().endswith( '.stl' ) : reference_mesh = mtk.ReadStl( args.d )
+	else : reference_mesh = mtk.ReadPly( args.d )
+	print( 'Compute distance... ' )
+	distance = mtk.GetVertexDistances( input_mesh, reference_mesh, signed=True )
+	mtk.Statistics( distance )
+	mtk.Histogram( distance )
+	for e in sorted( mtk.GetDistanceErrors( input_mesh, reference_mesh, distances=distance ).items() ) :
+		print( '{:>20} : {:>15.5f}'.format( *e ) )
+	input_mesh.colors = mtk.Colormap( args.cm ).ValueArrayToColor( distance )
 # Compute gaussian curvature
 if args.gc :
 	print( 'Compute gaussian curvature... ' )
@@ -79,6 +135,45 @@ if args.nc :
 	mtk.Statistics( np.sqrt( (curvature**2).sum(axis=1) ) )
 	mtk.Histogram( np.sqrt( (curvature**2).sum(axis=1) ) )
 	input_mesh.colors = mtk.Colormap( args.cm ).VectorArrayToColor( curvature )
+# Compute principal curvatures
+if args.pc :
+	print( 'Compute principal curvatures... ' )
+	( maximum_curvature, minimum_curvature ) = mtk.GetPrincipalCurvatures( input_mesh )[ :2 ]
+	mtk.Statistics( maximum_curvature )
+	mtk.Statistics( minimum_curvature )
+	curvedness = np.sqrt( ( maximum_curvature ** 2 + minimum_curvature ** 2 ) / 2 )
+	mtk.Histogram( curvedness )
+	input_mesh.colors = mtk.Colormap( args.cm ).ValueArrayToColor( curvedness )
+# Compute ambient occlusion
+if args.ao :
+	print( 'Compute ambient occlusion... ' )
+	occlusion = mtk.GetAmbientOcclusion( input_mesh, args.ao )
+	mtk.Statistics( occlusion )
+	input_mesh.colors = mtk.Colormap( args.cm ).ValueArrayToColor( occlusion )
+# Compute thickness
+if args.th :
+	print( 'Compute thickness... ' )
+	thickness = mtk.GetThickness( input_mesh )
+	mtk.Statistics( thickness )
+	mtk.Histogram( thickness )
+	input_mesh.colors = mtk.Colormap( args.cm ).ValueArrayToColor( thickness )
+# Compute geodesic distance
+if args.gd is not None :
+	print( 'Compute geodesic distance... ' )
+	distance = mtk.GetGeodesicDistances( input_mesh, [ args.gd ] )
+	mtk.Statistics( distance )
+	mtk.Histogram( distance )
+	input_mesh.colors = mtk.Colormap( args.cm ).ValueArrayToColor( distance )
+# Decimate the mesh
+if args.dec :
+	print( 'Decimate mesh... ' )
+	mtk.Decimate( input_mesh, args.dec )
+	print( input_mesh )
+# Remesh the mesh with uniform edge lengths
+if args.ir is not None :
+	print( 'Isotropic remeshing... ' )
+	mtk.IsotropicRemeshing( input_mesh, args.ir if args.ir > 0 else None )
+	print( input_mesh )
 # Apply uniform laplacian smoothing
 if args.ul :
 	print( 'Uniform laplacian smoothing... ' )
@@ -87,6 +182,11 @@ if args.ul :
 if args.ncf :
 	print( 'Normalized curvature flow smoothing... ' )
 	mtk.NormalizedCurvatureFlowSmoothing( input_mesh, int( args.ncf[0] ), float( args.ncf[1] ) )
+# Subdivide the mesh
+if args.sd :
+	print( 'Subdivision... ' )
+	mtk.Subdivide( input_mesh, int( args.sd[0] ), args.sd[1] if len( args.sd ) > 1 else 'loop' )
+	print( input_mesh )
 # Test
 if args.t and args.input_mesh :
 	print( 'Test... ' )
@@ -94,12 +194,18 @@ if args.t and args.input_mesh :
 # Write resulting mesh
 if args.o :
 	print( 'Write file ' + args.o + '... ' )
-	mtk.WritePly( input_mesh, args.o )
+	if args.o.lower().endswith( '.stl' ) : mtk.WriteStl( input_mesh, args.o )
+	else : mtk.WritePly( input_mesh, args.o )
+# Render the resulting mesh to an image
+if args.png :
+	print( 'Render image ' + args.png[0] + '... ' )
+	size = int( args.png[1] ) if len( args.png ) > 1 else 1024
+	mtk.WritePng( mtk.RenderMesh( input_mesh, size, size ), args.png[0] )
 # Launch GlutViewer
 if args.glut :
 	print( 'Launch GLUT viewer... ' )
-	mtk.GlutViewer( input_mesh ).Run()
+	mtk.GlutViewer( input_mesh, frame_log=args.fl ).Run()
 # Launch QtViewer
 if args.qt :
 	print( 'Launch Qt viewer... ' )
-	mtk.QtViewer( mesh=input_mesh )
+	mtk.QtViewer( mesh=input_mesh, frame_log=args.fl )
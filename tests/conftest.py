@@ -0,0 +1,12 @@
+# -*- coding:utf-8 -*-
+
+#
+# Test configuration : import the MeshToolkit package from the source tree
+#
+
+# External dependencies
+import os
+import sys
+
+# Add the repository root to the module path
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
@@ -0,0 +1,83 @@
+# -*- coding:utf-8 -*-
+
+#
+# Compare the bounding volume hierarchy queries with brute force computations
+#
+
+# External dependencies
+import sys
+import numpy as np
+import MeshToolkit as mtk
+
+# Bounding volume hierarchy module (the class shadows the module name in the package)
+Bvh = sys.modules[ 'MeshToolkit.Core.Bvh' ]
+
+# Test meshes : a sphere, a bumpy height field, and a triangle soup with degenerated faces
+def GetTestMeshes() :
+	generator = np.random.default_rng( 0 )
+	# Height field on a regular grid
+	( x, y ) = np.meshgrid( np.linspace( -1, 1, 15 ), np.linspace( -1, 1, 12 ) )
+	grid = np.array( [ x.ravel(), y.ravel(), generator.normal( 0.0, 0.1, x.size ) ] ).T
+	corners = ( np.arange( 11 )[ :, np.newaxis ] * 15 + np.arange( 14 ) ).ravel()
+	grid_faces = np.concatenate( ( np.array( [ corners, corners + 1, corners + 16 ] ).T, np.array( [ corners, corners + 16, corners + 15 ] ).T ) )
+	# Triangle soup
+	soup = generator.uniform( -1.0, 1.0, ( 600, 3 ) )
+	soup[ 3:6 ] = soup[ 0 ]
+	soup[ 7 ] = soup[ 6 ]
+	return [ mtk.GenerateIcosphere( 2 ), mtk.Mesh( vertices=grid, faces=grid_faces ),
+		mtk.Mesh( vertices=soup, faces=np.arange( 600 ).reshape( -1, 3 ) ) ]
+
+# Brute force closest point : test every face
+def ClosestPointBruteForce( mesh, points ) :
+	tris = mesh.vertices[ mesh.faces ]
+	distances = np.empty( ( len( points ), len( tris ) ) )
+	for ( i, p ) in enumerate( points ) :
+		p = np.tile( p, ( len( tris ), 1 ) )
+		bary = Bvh.ClosestPointOnTriangle( p, tris[:,0], tris[:,1], tris[:,2] )
+		distances[i] = np.sqrt( Bvh.SquaredNorm( np.einsum( 'ij,ijk->ik', bary, tris ) - p ) )
+	return distances.min( axis=1 )
+
+# The closest points found with the tree are the closest points on the faces
+def test_closest_point() :
+	generator = np.random.default_rng( 1 )
+	for mesh in GetTestMeshes() :
+		# Points near the surface, inside, and far away
+		near = mesh.vertices[ generator.integers( 0, mesh.vertex_number, 200 ) ] + generator.normal( 0.0, 0.05, ( 200, 3 ) )
+		points = np.concatenate( ( near, generator.uniform( -0.5, 0.5, ( 100, 3 ) ), generator.normal( 0.0, 5.0, ( 100, 3 ) ) ) )
+		# Query the tree, with small leaves and small chunks to exercise the traversal
+		bvh = mtk.Bvh( mesh, leaf_size = 2 )
+		( faces, barycentrics, distances ) = bvh.ClosestPoint( points, chunk_size = 128 )
+		assert np.allclose( distances, ClosestPointBruteForce( mesh, points ), rtol=0, atol=1e-12 )
+		# The closest points lie on the returned faces, at the returned distances
+		assert np.allclose( barycentrics.sum( axis=1 ), 1.0 )
+		assert ( barycentrics >= -1e-12 ).all()
+		assert np.allclose( np.sqrt( Bvh.SquaredNorm( bvh.GetPoints( faces, barycentrics ) - points ) ), distances, rtol=0, atol=1e-12 )
+
+# The closest point on a triangle is closer than any point sampled on the triangle
+def test_closest_point_on_triangle() :
+	generator = np.random.default_rng( 2 )
+	# Barycentric coordinates of the samples
+	( u, v ) = np.meshgrid( np.linspace( 0, 1, 41 ), np.linspace( 0, 1, 41 ) )
+	samples = np.array( [ 1 - u - v, u, v ] ).reshape( 3, -1 ).T
+	samples = samples[ samples[:,0] >= -1e-12 ]
+	for i in range( 200 ) :
+		( tri, p ) = ( generator.normal( size=( 3, 3 ) ), generator.normal( size=3 ) * 2.0 )
+		bary = Bvh.ClosestPointOnTriangle( p[ np.newaxis ], tri[ np.newaxis, 0 ], tri[ np.newaxis, 1 ], tri[ np.newaxis, 2 ] )[0]
+		distance = np.linalg.norm( np.dot( bary, tri ) - p )
+		assert distance <= np.linalg.norm( np.dot( samples, tri ) - p, axis=1 ).min() + 1e-12
+
+# The first hits found with the tree are the first hits on the faces
+def test_cast_rays() :
+	generator = np.random.default_rng( 3 )
+	for mesh in GetTestMeshes() :
+		origins = generator.normal( 0.0, 2.0, ( 300, 3 ) )
+		directions = generator.normal( size=( 300, 3 ) )
+		# Brute force : intersect every ray with every face
+		tris = mesh.vertices[ mesh.faces ]
+		reference = np.array( [ Bvh.RayTriangleIntersection( np.tile( o, ( len( tris ), 1 ) ), np.tile( d, ( len( tris ), 1 ) ),
+			tris[:,0], tris[:,1], tris[:,2] )[0] for ( o, d ) in zip( origins, directions ) ] )
+		reference[ reference < 0 ] = np.inf
+		# Query the tree
+		( faces, distances, barycentrics ) = mtk.Bvh( mesh, leaf_size = 2 ).CastRays( origins, directions, chunk_size = 128 )
+		assert np.allclose( distances, reference.min( axis=1 ), rtol=0, atol=1e-12 )
+		assert ( ( faces >= 0 ) == np.isfinite( distances ) ).all()
@@ -0,0 +1,50 @@
+# -*- coding:utf-8 -*-
+
+#
+# Compare the principal curvatures with the exact curvatures of an ellipsoid and a cylinder
+#
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# The principal curvatures of an ellipsoid are given by its gaussian and mean curvatures
+def test_ellipsoid_curvatures() :
+	# Ellipsoid with the semi-axes (a, b, c)
+	( a, b, c ) = ( 1.0, 0.8, 0.6 )
+	ellipsoid = mtk.GenerateIcosphere( 4 )
+	ellipsoid.vertices = ellipsoid.vertices * [ a, b, c ]
+	ellipsoid.UpdateNormals()
+	( maximum, minimum, maximum_direction, minimum_direction ) = mtk.GetPrincipalCurvatures( ellipsoid )
+	# Exact curvatures
+	( x, y, z ) = ellipsoid.vertices.T
+	h = np.sqrt( x ** 2 / a ** 4 + y ** 2 / b ** 4 + z ** 2 / c ** 4 )
+	gaussian = 1.0 / ( a * b * c * h ** 2 ) ** 2
+	mean = ( a ** 2 + b ** 2 + c ** 2 - x ** 2 - y ** 2 - z ** 2 ) / ( 2.0 * ( a * b * c ) ** 2 * h ** 3 )
+	deviation = np.sqrt( np.maximum( mean ** 2 - gaussian, 0.0 ) )
+	errors = np.abs( np.concatenate( ( maximum / ( mean + deviation ), minimum / ( mean - deviation ) ) ) - 1.0 )
+	assert np.median( errors ) < 0.01
+	assert errors.max() < 0.06
+	# Orthonormal tangent directions
+	assert np.allclose( mtk.Dot( maximum_direction, minimum_direction ), 0.0 )
+	assert np.allclose( mtk.Dot( maximum_direction, ellipsoid.vertex_normals ), 0.0 )
+	assert np.allclose( mtk.SquaredNorm( maximum_direction ), 1.0 )
+	assert np.allclose( mtk.SquaredNorm( minimum_direction ), 1.0 )
+
+# The curvatures of a cylinder of radius 1 are 1 around the axis and 0 along the axis
+def test_cylinder_curvatures() :
+	# Cylinder along the Z axis (64 vertices around, 21 rows)
+	( angles, heights ) = np.meshgrid( np.linspace( 0.0, 2.0 * np.pi, 65 )[:-1], np.linspace( 0.0, 2.0, 21 ) )
+	vertices = np.array( [ np.cos( angles.ravel() ), np.sin( angles.ravel() ), heights.ravel() ] ).T
+	corners = np.arange( 20 * 64 )
+	next_corners = corners - corners % 64 + ( corners + 1 ) % 64
+	faces = np.concatenate( ( np.array( [ corners, next_corners, next_corners + 64 ] ).T, np.array( [ corners, next_corners + 64, corners + 64 ] ).T ) )
+	cylinder = mtk.Mesh( vertices=vertices, faces=faces )
+	( maximum, minimum, maximum_direction, minimum_direction ) = mtk.GetPrincipalCurvatures( cylinder )
+	# Compare the inner vertices (not on the borders)
+	inner = ( heights.ravel() > 0.05 ) & ( heights.ravel() < 1.95 )
+	assert np.abs( maximum[ inner ] - 1.0 ).max() < 0.03
+	assert np.abs( minimum[ inner ] ).max() < 0.03
+	# The maximum curvature is around the axis, the minimum curvature along the axis
+	assert np.abs( maximum_direction[ inner, 2 ] ).max() < 0.06
+	assert np.abs( np.abs( minimum_direction[ inner, 2 ] ) - 1.0 ).max() < 0.01
@@ -0,0 +1,75 @@
+# -*- coding:utf-8 -*-
+
+#
+# Check the meshes simplified by edge collapses and by vertex clustering
+#
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# Bumpy height field on the square [-1, 1]x[-1, 1], with colors and texture coordinates given by the (x, y) position
+def GetBumpyGrid( size = 60 ) :
+	( x, y ) = np.meshgrid( np.linspace( -1, 1, size + 1 ), np.linspace( -1, 1, size + 1 ) )
+	vertices = np.array( [ x.ravel(), y.ravel(), 0.2 * np.sin( 3 * x.ravel() ) * np.cos( 2 * y.ravel() ) ] ).T
+	corners = ( np.arange( size )[ :, np.newaxis ] * ( size + 1 ) + np.arange( size ) ).ravel()
+	faces = np.concatenate( ( np.array( [ corners, corners + 1, corners + size + 2 ] ).T, np.array( [ corners, corners + size + 2, corners + size + 1 ] ).T ) )
+	colors = np.array( [ ( x.ravel() + 1 ) / 2, ( y.ravel() + 1 ) / 2, np.full( x.size, 0.5 ) ] ).T
+	textures = np.array( [ ( x.ravel() + 1 ) / 2, ( y.ravel() + 1 ) / 2 ] ).T
+	return mtk.Mesh( vertices=vertices, faces=faces, colors=colors, textures=textures )
+
+# Check that every edge has one (border) or two faces with opposite orientations
+def CheckManifold( mesh ) :
+	( edges, labels, counts, twins ) = mtk.GetHalfEdges( mesh.faces, mesh.vertex_number )
+	assert counts.max() <= 2
+	assert ( ( twins >= 0 ) == ( counts[ labels ] == 2 ) ).all()
+	return ( edges, counts )
+
+# Border vertices of a mesh
+def GetBorderVertices( mesh ) :
+	( edges, labels, counts, twins ) = mtk.GetHalfEdges( mesh.faces, mesh.vertex_number )
+	return np.unique( edges[ counts == 1 ] )
+
+# The decimation of a closed mesh reaches the target, and keeps it closed and manifold
+def test_decimate_closed() :
+	sphere = mtk.GenerateIcosphere( 4 )
+	sphere.vertices = sphere.vertices * [ 1.0, 0.7, 0.5 ]
+	mtk.Decimate( sphere, 500 )
+	assert sphere.face_number == 500
+	( edges, counts ) = CheckManifold( sphere )
+	assert ( counts == 2 ).all()
+	assert sphere.vertex_number - len( edges ) + sphere.face_number == 2
+	# The vertices stay close to the ellipsoid
+	( x, y, z ) = sphere.vertices.T
+	assert np.abs( np.sqrt( x ** 2 + ( y / 0.7 ) ** 2 + ( z / 0.5 ) ** 2 ) - 1.0 ).max() < 0.02
+
+# The decimation of an open mesh keeps its border vertices, and carries the vertex attributes
+def test_decimate_open() :
+	grid = GetBumpyGrid()
+	border = grid.vertices[ GetBorderVertices( grid ) ]
+	mtk.Decimate( grid, 1000 )
+	assert grid.face_number == 1000
+	CheckManifold( grid )
+	# Same border vertices at the same positions
+	assert np.array_equal( np.unique( grid.vertices[ GetBorderVertices( grid ) ], axis=0 ), np.unique( border, axis=0 ) )
+	# The interpolated attributes still follow the vertex positions
+	assert grid.color_number == grid.vertex_number
+	assert grid.texture_number == grid.vertex_number
+	assert np.abs( grid.colors[ :, :2 ] - ( grid.vertices[ :, :2 ] + 1 ) / 2 ).max() < 0.03
+	assert np.allclose( grid.colors[:,2], 0.5 )
+	assert np.abs( grid.textures - ( grid.vertices[ :, :2 ] + 1 ) / 2 ).max() < 0.03
+
+# The vertex clustering does not create collapsed or duplicated faces
+def test_cluster_vertices() :
+	sphere = mtk.GenerateIcosphere( 5 )
+	sphere.colors = np.round( ( sphere.vertices + 1 ) * 127.5 ).astype( np.uint8 )
+	proxy = mtk.ClusterVertices( sphere, 16 )
+	assert 0 < proxy.face_number < sphere.face_number
+	faces = proxy.faces
+	assert ( ( faces[:,0] != faces[:,1] ) & ( faces[:,1] != faces[:,2] ) & ( faces[:,2] != faces[:,0] ) ).all()
+	assert len( np.unique( np.sort( faces, axis=1 ), axis=0 ) ) == len( faces )
+	# The averaged colors keep their type
+	assert proxy.colors.dtype == np.uint8
+	assert proxy.color_number == proxy.vertex_number
+	# The averaged vertices stay close to the sphere
+	assert np.abs( np.sqrt( ( proxy.vertices ** 2 ).sum( axis=1 ) ) - 1.0 ).max() < 0.02
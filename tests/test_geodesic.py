@@ -0,0 +1,50 @@
+# -*- coding:utf-8 -*-
+
+#
+# Compare the heat method geodesic distances with the exact distances on a sphere and a plane
+#
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# Great circle distances on the unit sphere
+def SphereDistances( vertices, source ) :
+	return np.arccos( np.clip( vertices @ vertices[ source ], -1.0, 1.0 ) )
+
+# On the unit sphere, the geodesic distances are the great circle distances
+def test_sphere_distances() :
+	sphere = mtk.GenerateIcosphere( 4 )
+	vertices = sphere.vertices / np.sqrt( ( sphere.vertices ** 2 ).sum( axis=1 ) ).reshape( -1, 1 )
+	geodesic = mtk.HeatGeodesic( sphere )
+	# Single source
+	distances = mtk.GetGeodesicDistances( sphere, [ 0 ], geodesic )
+	exact = SphereDistances( vertices, 0 )
+	assert distances[0] == 0
+	assert np.abs( distances - exact ).max() < 0.04
+	assert np.abs( distances - exact ).mean() < 0.02
+	# Several sources (distance to the closest source), with the factorization of the first query
+	distances = geodesic.GetDistances( [ 0, 5, 100 ] )
+	exact = np.minimum( np.minimum( exact, SphereDistances( vertices, 5 ) ), SphereDistances( vertices, 100 ) )
+	assert distances[ [ 0, 5, 100 ] ].min() == 0
+	assert distances[ [ 0, 5, 100 ] ].max() < 0.05
+	assert np.abs( distances - exact ).max() < 0.1
+	# Same distances without the precomputed factorization
+	assert np.allclose( mtk.GetGeodesicDistances( sphere, [ 0, 5, 100 ] ), distances )
+
+# On a plane, the geodesic distances are the euclidean distances
+def test_plane_distances() :
+	# Regular grid on the square [-1, 1]x[-1, 1]
+	( x, y ) = np.meshgrid( np.linspace( -1, 1, 41 ), np.linspace( -1, 1, 41 ) )
+	vertices = np.array( [ x.ravel(), y.ravel(), np.zeros( x.size ) ] ).T
+	corners = ( np.arange( 40 )[ :, np.newaxis ] * 41 + np.arange( 40 ) ).ravel()
+	faces = np.concatenate( ( np.array( [ corners, corners + 1, corners + 42 ] ).T, np.array( [ corners, corners + 42, corners + 41 ] ).T ) )
+	plane = mtk.Mesh( vertices=vertices, faces=faces )
+	# Distances from the center
+	source = len( vertices ) // 2
+	distances = mtk.GetGeodesicDistances( plane, [ source ] )
+	exact = np.sqrt( ( ( vertices - vertices[ source ] ) ** 2 ).sum( axis=1 ) )
+	assert np.abs( distances - exact ).max() < 0.06
+	assert np.abs( distances - exact ).mean() < 0.02
+	# Smaller errors far from the border
+	assert np.abs( distances - exact )[ exact < 0.8 ].max() < 0.04
@@ -0,0 +1,95 @@
+# -*- coding:utf-8 -*-
+
+#
+# Check the border loops and the hole filling on meshes with holes of known sizes
+#
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# Regular grid on the square [0, size]x[0, size], with the given squares removed
+def GetGrid( size, removed ) :
+	( x, y ) = np.meshgrid( np.arange( size + 1.0 ), np.arange( size + 1.0 ) )
+	vertices = np.array( [ x.ravel(), y.ravel(), np.zeros( x.size ) ] ).T
+	corners = ( np.arange( size )[ :, np.newaxis ] * ( size + 1 ) + np.arange( size ) ).ravel()
+	corners = corners[ ~np.isin( corners, removed ) ]
+	faces = np.concatenate( ( np.array( [ corners, corners + 1, corners + size + 2 ] ).T, np.array( [ corners, corners + size + 2, corners + size + 1 ] ).T ) )
+	return mtk.Mesh( vertices=vertices, faces=faces )
+
+# Sphere with two triangular holes touching at the first vertex, and a cap hole of 15 edges
+def GetHoledSphere() :
+	sphere = mtk.GenerateIcosphere( 3 )
+	# Two faces around the first vertex sharing only this vertex
+	around = np.flatnonzero( ( sphere.faces == 0 ).any( axis=1 ) )
+	shared = np.array( [ len( np.intersect1d( sphere.faces[ around[0] ], sphere.faces[ face ] ) ) for face in around ] )
+	touching = [ around[0], around[ np.flatnonzero( shared == 1 )[0] ] ]
+	# Faces around the pole opposite to the first vertex
+	centers = sphere.vertices[ sphere.faces ].mean( axis=1 )
+	cap = np.flatnonzero( centers @ -sphere.vertices[0] > 0.95 )
+	removed = np.zeros( sphere.face_number, dtype=bool )
+	removed[ touching ] = True
+	removed[ cap ] = True
+	sphere.faces = sphere.faces[ ~removed ]
+	mtk.RemoveIsolatedVertices( sphere )
+	return sphere
+
+# Sizes of the border loops, and check that each loop is a cycle of border edges
+def GetLoopSizes( mesh ) :
+	( offsets, vertices ) = mtk.GetBorderLoops( mesh.faces, mesh.vertex_number )
+	( edges, labels, counts, twins ) = mtk.GetHalfEdges( mesh.faces, mesh.vertex_number )
+	border = set( map( tuple, np.sort( edges[ counts == 1 ], axis=1 ) ) )
+	for ( start, end ) in zip( offsets[:-1], offsets[1:] ) :
+		loop = vertices[ start : end ]
+		assert set( map( tuple, np.sort( np.array( [ loop, np.roll( loop, -1 ) ] ).T, axis=1 ) ) ) <= border
+	assert offsets[-1] == len( border )
+	return np.sort( np.diff( offsets ) )
+
+# Two square holes touching at one vertex are two separate loops
+def test_touching_loops() :
+	for removed in ( [ 16, 24 ], [ 17, 23 ] ) :
+		grid = GetGrid( 6, removed )
+		assert np.array_equal( GetLoopSizes( grid ), [ 4, 4, 24 ] )
+		# Fill the two holes but not the outer border
+		mtk.FillHoles( grid, 8 )
+		assert np.array_equal( GetLoopSizes( grid ), [ 24 ] )
+		report = mtk.GetCheckReport( grid )
+		assert not len( report[ 'Non-manifold vertices' ] )
+		assert not len( report[ 'Non-manifold edges' ] )
+		assert report[ 'Genus' ] == 0
+
+# Only the holes up to the given size are filled, and the filled sphere is closed and manifold
+def test_fill_holes() :
+	sphere = GetHoledSphere()
+	assert np.array_equal( GetLoopSizes( sphere ), [ 3, 3, 15 ] )
+	assert len( mtk.GetCheckReport( sphere )[ 'Non-manifold vertices' ] ) == 1
+	# Skip the large hole
+	vertices = sphere.vertices.copy()
+	mtk.FillHoles( sphere, 10 )
+	assert np.array_equal( GetLoopSizes( sphere ), [ 15 ] )
+	assert not len( mtk.GetCheckReport( sphere )[ 'Non-manifold vertices' ] )
+	# Fill every hole without new vertices
+	mtk.FillHoles( sphere, 15 )
+	assert np.array_equal( sphere.vertices, vertices )
+	report = mtk.GetCheckReport( sphere )
+	assert report[ 'Border loops' ] == 0
+	assert report[ 'Euler characteristic' ] == 2
+	assert not len( report[ 'Non-manifold vertices' ] ) and not len( report[ 'Non-manifold edges' ] ) and not len( report[ 'Inconsistent edges' ] )
+
+# The faired patches are refined and smoothed, but their borders are kept in place
+def test_fill_holes_fairing() :
+	sphere = GetHoledSphere()
+	vertices = sphere.vertices.copy()
+	mtk.FillHoles( sphere, 15, fairing=10 )
+	# New vertices in the patches, the previous vertices are not moved
+	assert sphere.vertex_number > len( vertices )
+	assert np.array_equal( sphere.vertices[ : len( vertices ) ], vertices )
+	# The new vertices stay inside the sphere, close to the planes of the holes
+	new_vertices = sphere.vertices[ len( vertices ) : ]
+	assert ( np.sqrt( ( new_vertices ** 2 ).sum( axis=1 ) ) < 1.0 ).all()
+	assert ( np.abs( new_vertices @ vertices[0] ) > 0.9 ).all()
+	# Closed manifold surface
+	report = mtk.GetCheckReport( sphere )
+	assert report[ 'Border loops' ] == 0
+	assert report[ 'Genus' ] == 0
+	assert not len( report[ 'Degenerated faces' ] )
@@ -0,0 +1,82 @@
+# -*- coding:utf-8 -*-
+
+#
+# Check the isotropic remeshing of non-uniform meshes
+#
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# Coefficient of variation of the edge lengths
+def GetLengthVariation( mesh ) :
+	edges = mtk.GetHalfEdges( mesh.faces, mesh.vertex_number )[0]
+	lengths = np.sqrt( mtk.SquaredNorm( mesh.vertices[ edges[:,1] ] - mesh.vertices[ edges[:,0] ] ) )
+	return lengths.std() / lengths.mean()
+
+# Check that the mesh is a manifold surface, and return its topological report
+def CheckManifold( mesh ) :
+	report = mtk.GetCheckReport( mesh )
+	for name in ( 'Isolated vertices', 'Degenerated faces', 'Non-manifold edges', 'Non-manifold vertices', 'Inconsistent edges' ) :
+		assert not len( report[ name ] )
+	return report
+
+# Unit sphere with the vertices gathered on one side
+def GetSphere() :
+	sphere = mtk.GenerateIcosphere( 3 )
+	vertices = sphere.vertices + [ 0.6, 0.0, 0.0 ]
+	sphere.vertices = vertices / np.sqrt( mtk.SquaredNorm( vertices ) ).reshape( -1, 1 )
+	return sphere
+
+# Torus around the Z axis, with the vertices unevenly spaced around the axis
+def GetTorus( major = 60, minor = 20 ) :
+	( u, v ) = np.meshgrid( 2.0 * np.pi * ( np.arange( major ) / major ) ** 1.3, np.linspace( 0.0, 2.0 * np.pi, minor + 1 )[:-1], indexing='ij' )
+	( u, v ) = ( u.ravel(), v.ravel() )
+	vertices = np.array( [ ( 1.0 + 0.4 * np.cos( v ) ) * np.cos( u ), ( 1.0 + 0.4 * np.cos( v ) ) * np.sin( u ), 0.4 * np.sin( v ) ] ).T
+	( i, j ) = ( np.arange( major * minor ) // minor, np.arange( major * minor ) % minor )
+	index = lambda i, j : ( i % major ) * minor + j % minor
+	faces = np.concatenate( ( np.array( [ index( i, j ), index( i + 1, j ), index( i + 1, j + 1 ) ] ).T, np.array( [ index( i, j ), index( i + 1, j + 1 ), index( i, j + 1 ) ] ).T ) )
+	return mtk.Mesh( vertices=vertices, faces=faces )
+
+# Bumpy height field on the square [-1, 1]x[-1, 1], denser near the center
+def GetBumpyGrid( size = 30 ) :
+	( x, y ) = np.meshgrid( np.sign( np.linspace( -1, 1, size + 1 ) ) * np.linspace( -1, 1, size + 1 ) ** 2, np.linspace( -1, 1, size + 1 ) )
+	vertices = np.array( [ x.ravel(), y.ravel(), 0.2 * np.sin( 3 * x.ravel() ) * np.cos( 2 * y.ravel() ) ] ).T
+	corners = ( np.arange( size )[ :, np.newaxis ] * ( size + 1 ) + np.arange( size ) ).ravel()
+	faces = np.concatenate( ( np.array( [ corners, corners + 1, corners + size + 2 ] ).T, np.array( [ corners, corners + size + 2, corners + size + 1 ] ).T ) )
+	return mtk.Mesh( vertices=vertices, faces=faces )
+
+# The remeshed sphere has regular edge lengths, stays on the sphere, and keeps its topology
+def test_remeshing_sphere() :
+	sphere = GetSphere()
+	assert GetLengthVariation( sphere ) > 0.3
+	mtk.IsotropicRemeshing( sphere )
+	assert GetLengthVariation( sphere ) < 0.15
+	report = CheckManifold( sphere )
+	assert ( report[ 'Genus' ], report[ 'Border loops' ], report[ 'Components' ] ) == ( 0, 0, 1 )
+	assert np.abs( np.sqrt( mtk.SquaredNorm( sphere.vertices ) ) - 1.0 ).max() < 0.03
+
+# The remeshed torus keeps its genus
+def test_remeshing_torus() :
+	torus = GetTorus()
+	assert GetLengthVariation( torus ) > 0.25
+	mtk.IsotropicRemeshing( torus )
+	assert GetLengthVariation( torus ) < 0.2
+	report = CheckManifold( torus )
+	assert ( report[ 'Genus' ], report[ 'Border loops' ], report[ 'Components' ] ) == ( 1, 0, 1 )
+
+# The border vertices of an open mesh are not moved, and the new border vertices are on the original border
+def test_remeshing_border() :
+	grid = GetBumpyGrid()
+	( edges, labels, counts, twins ) = mtk.GetHalfEdges( grid.faces, grid.vertex_number )
+	border = grid.vertices[ np.unique( edges[ counts == 1 ] ) ]
+	mtk.IsotropicRemeshing( grid )
+	report = CheckManifold( grid )
+	assert ( report[ 'Genus' ], report[ 'Border loops' ], report[ 'Components' ] ) == ( 0, 1, 1 )
+	# The original border vertices are kept
+	( edges, labels, counts, twins ) = mtk.GetHalfEdges( grid.faces, grid.vertex_number )
+	new_border = grid.vertices[ np.unique( edges[ counts == 1 ] ) ]
+	assert len( np.unique( np.concatenate( ( border, new_border ) ), axis=0 ) ) == len( new_border )
+	# The new border vertices are on the sides of the square, at the height of the field
+	assert np.allclose( np.abs( new_border[ :, :2 ] ).max( axis=1 ), 1.0 )
+	assert np.allclose( new_border[:,2], 0.2 * np.sin( 3 * new_border[:,0] ) * np.cos( 2 * new_border[:,1] ), atol=0.01 )
@@ -0,0 +1,167 @@
+# -*- coding:utf-8 -*-
+
+#
+# Compare the mesh repair functions with brute force computations
+#
+
+# External dependencies
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.csgraph as csgraph
+import scipy.spatial.distance as distance
+import MeshToolkit as mtk
+
+# Check that two labelings define the same partition
+def SamePartition( labels1, labels2 ) :
+	# Each label of one partition matches exactly one label of the other partition
+	pairs = np.unique( np.array( [ labels1, labels2 ] ).T, axis=0 )
+	return len( pairs ) == len( np.unique( labels1 ) ) == len( np.unique( labels2 ) )
+
+# Weld a triangle soup, and return the new index of every original vertex
+def WeldSoup( vertices, tolerance ) :
+	mesh = mtk.Mesh( vertices=vertices, faces=np.arange( len( vertices ) ).reshape( -1, 3 ) )
+	mtk.WeldVertices( mesh, tolerance )
+	return ( mesh, mesh.faces.reshape( -1 ) )
+
+# Welding with a tolerance merges the vertex pairs closer than the tolerance (transitively)
+def test_weld_vertices_tolerance() :
+	# Clusters of close points, with exact duplicates
+	generator = np.random.default_rng( 0 )
+	centers = generator.uniform( -1.0, 1.0, ( 200, 3 ) )
+	vertices = centers[ generator.integers( 0, 200, 3000 ) ] + generator.normal( 0.0, 0.002, ( 3000, 3 ) )
+	vertices[ 1::7 ] = vertices[ ::7 ][ :len( vertices[ 1::7 ] ) ]
+	for tolerance in ( 0.001, 0.003, 0.01 ) :
+		# Brute force : connected components of the graph of the close pairs
+		close = distance.squareform( distance.pdist( vertices ) ) <= tolerance
+		( number, reference ) = csgraph.connected_components( sp.csr_matrix( close ), directed=False )
+		# Weld the vertices
+		( mesh, labels ) = WeldSoup( vertices, tolerance )
+		assert mesh.vertex_number == number
+		assert SamePartition( labels, reference )
+
+# Close vertices in different grid cells are merged, distant vertices in the same cell are not
+def test_weld_vertices_grid_alignment() :
+	vertices = np.array( [ [ 0.000999, 0.0, 0.0 ], [ 0.0010005, 0.0, 0.0 ], [ 0.5, 0.5, 0.5 ],
+		[ 0.0, 0.0, 0.0 ], [ 0.0009, 0.0009, 0.0009 ], [ 0.5, 0.5, 0.5 ] ] )
+	( mesh, labels ) = WeldSoup( vertices, 1e-3 )
+	# The first two vertices are merged (distance 1.5e-6)
+	assert labels[0] == labels[1]
+	# The vertices (0,0,0) and (0.0009,0.0009,0.0009) are 1.56e-3 apart
+	assert labels[3] != labels[4]
+	# The exact duplicates are merged
+	assert labels[2] == labels[5]
+
+# Exact welding merges the identical positions only
+def test_weld_vertices_exact() :
+	generator = np.random.default_rng( 1 )
+	points = generator.normal( size=( 500, 3 ) )
+	vertices = points[ generator.integers( 0, 500, 3000 ) ]
+	( mesh, labels ) = WeldSoup( vertices, 0.0 )
+	assert mesh.vertex_number == len( np.unique( vertices, axis=0 ) )
+	assert np.array_equal( mesh.vertices[ labels ], vertices )
+
+# The unique rows match NumPy on a structured integer grid, and on random rows with duplicates
+def test_unique_rows() :
+	grid = np.array( np.meshgrid( np.arange( 60 ), np.arange( 60 ), np.arange( 60 ), indexing='ij' ) ).reshape( 3, -1 ).T
+	rows = np.concatenate( ( grid, grid[ ::3 ] ) ).astype( np.int64 )
+	generator = np.random.default_rng( 2 )
+	for rows in ( rows, rows.astype( np.float32 ), generator.normal( size=( 1000, 3 ) )[ generator.integers( 0, 1000, 5000 ) ] ) :
+		( keys, first, labels, mode ) = mtk.Core.Repair.UniqueRows( rows )
+		assert len( first ) == len( np.unique( rows, axis=0 ) )
+		assert np.array_equal( rows[ first ][ labels ], rows )
+
+# A hash collision falls back to the comparison of the raw rows
+def test_unique_rows_collision( monkeypatch ) :
+	rows = np.arange( 30, dtype=np.int64 ).reshape( 10, 3 )
+	get_row_keys = mtk.Core.Repair.GetRowKeys
+	# Every row gets the same hash key
+	monkeypatch.setattr( mtk.Core.Repair, 'GetRowKeys', lambda rows, mode = 'hash', grid_size = None :
+		np.zeros( len( rows ), dtype=np.uint64 ) if mode == 'hash' else get_row_keys( rows, mode, grid_size ) )
+	( keys, first, labels, mode ) = mtk.Core.Repair.UniqueRows( rows )
+	assert mode == 'bytes'
+	assert len( first ) == 10
+
+# Several components with shuffled vertices : two spheres, a small sphere, a triangle and an isolated vertex
+# The colors and the texture coordinates are copies of the vertex positions
+def GetComponents() :
+	parts = [ mtk.GenerateIcosphere( 2 ), mtk.GenerateIcosphere( 1 ), mtk.GenerateIcosphere( 0 ) ]
+	parts[1].vertices = parts[1].vertices * 3.0 + 10.0
+	parts[2].vertices = parts[2].vertices * 0.1 - 10.0
+	parts.append( mtk.Mesh( vertices=[ [ 5.0, 0.0, 0.0 ], [ 6.0, 0.0, 0.0 ], [ 5.0, 1.0, 0.0 ], [ -5.0, -5.0, -5.0 ] ], faces=[ [ 0, 1, 2 ] ] ) )
+	# Merge the parts, and label their vertices
+	offsets = np.cumsum( [ 0 ] + [ part.vertex_number for part in parts ] )
+	vertices = np.concatenate( [ part.vertices for part in parts ] )
+	faces = np.concatenate( [ part.faces + offset for ( part, offset ) in zip( parts, offsets ) ] )
+	labels = np.repeat( np.arange( len( parts ) ), np.diff( offsets ) )
+	labels[-1] = len( parts )
+	# Shuffle the vertices
+	order = np.random.default_rng( 3 ).permutation( len( vertices ) )
+	inverse = np.argsort( order )
+	mesh = mtk.Mesh( vertices=vertices[ order ], faces=inverse[ faces ], colors=vertices[ order ], textures=vertices[ order, :2 ] )
+	return ( mesh, labels[ order ] )
+
+# The faces of a mesh, given by their vertex positions
+def GetFacePositions( mesh ) :
+	return np.unique( np.sort( mesh.vertices[ mesh.faces ].reshape( len( mesh.faces ), -1 ), axis=1 ), axis=0 )
+
+# The components are labeled like the parts, and the small ones are removed with their attributes
+def test_components() :
+	( mesh, labels ) = GetComponents()
+	( face_labels, vertex_labels, number ) = mtk.GetConnectedComponents( mesh )
+	assert number == 5
+	assert SamePartition( vertex_labels, labels )
+	assert np.array_equal( face_labels, vertex_labels[ mesh.faces[:,1] ] )
+	assert np.array_equal( face_labels, vertex_labels[ mesh.faces[:,2] ] )
+	# Same labels as the graph components
+	graph = sp.coo_matrix( ( np.ones( 3 * mesh.face_number ), ( mesh.faces.reshape( -1 ), mesh.faces[ :, [ 1, 2, 0 ] ].reshape( -1 ) ) ), shape=( mesh.vertex_number, ) * 2 )
+	assert SamePartition( vertex_labels, csgraph.connected_components( graph, directed=False )[1] )
+	# Remove the components with less than 50 faces, then with an area smaller than 20
+	for ( min_faces, min_area, kept ) in ( ( 0, 0.0, [ 0, 1, 2, 3, 4 ] ), ( 50, 0.0, [ 0, 1 ] ), ( 1, 0.0, [ 0, 1, 2, 3 ] ), ( 0, 20.0, [ 1 ] ), ( 30, 0.3, [ 0, 1 ] ) ) :
+		( compacted, labels ) = GetComponents()
+		mtk.RemoveSmallComponents( compacted, min_faces, min_area )
+		# Same vertices, faces and attributes as the kept parts
+		keep = np.isin( labels, kept )
+		assert compacted.vertex_number == np.count_nonzero( keep )
+		assert np.array_equal( np.unique( compacted.vertices, axis=0 ), np.unique( mesh.vertices[ keep ], axis=0 ) )
+		assert np.array_equal( compacted.colors, compacted.vertices )
+		assert np.array_equal( compacted.textures, compacted.vertices[ :, :2 ] )
+		reference = mtk.Mesh( vertices=mesh.vertices, faces=mesh.faces[ np.isin( face_labels, np.unique( vertex_labels[ keep ] ) ) ] )
+		assert np.array_equal( GetFacePositions( compacted ), GetFacePositions( reference ) )
+
+# Welding coincident vertices with opposite normals keeps a valid normal
+def test_weld_vertices_opposite_normals() :
+	# Two triangles sharing their vertices, with opposite normals, and a third triangle with normals along X
+	vertices = np.array( [ [ 0.0, 0.0, 0.0 ], [ 1.0, 0.0, 0.0 ], [ 0.0, 1.0, 0.0 ] ] * 2 + [ [ 0.0, 0.0, 0.0 ], [ 0.0, 1.0, 0.0 ], [ 0.0, 0.0, 1.0 ] ] )
+	normals = np.array( [ [ 0.0, 0.0, 1.0 ] ] * 3 + [ [ 0.0, 0.0, -1.0 ] ] * 3 + [ [ 1.0, 0.0, 0.0 ] ] * 3 )
+	for tolerance in ( 0.0, 1e-3 ) :
+		mesh = mtk.Mesh( vertices=vertices, faces=np.arange( 9 ).reshape( -1, 3 ), vertex_normals=normals )
+		mtk.WeldVertices( mesh, tolerance )
+		assert mesh.vertex_number == 4
+		assert 'Bad vertex normals' not in mtk.Check( mesh )
+		assert np.allclose( np.sqrt( ( mesh.vertex_normals ** 2 ).sum( axis=1 ) ), 1.0 )
+		# The vertex (1,0,0) keeps one of its normals, the vertices shared with the third triangle get its normal
+		assert np.allclose( np.abs( mesh.vertex_normals[ np.all( mesh.vertices == [ 1.0, 0.0, 0.0 ], axis=1 ) ] ), [ 0.0, 0.0, 1.0 ] )
+		assert np.allclose( mesh.vertex_normals[ mesh.vertices[:,1] == 1.0 ], [ 1.0, 0.0, 0.0 ] )
+
+# Randomly flipped faces of two disjoint spheres, the second one inside out, are oriented outward
+def test_orient_faces() :
+	generator = np.random.default_rng( 4 )
+	( first, second ) = ( mtk.GenerateIcosphere( 3 ), mtk.GenerateIcosphere( 2 ) )
+	centers = np.array( [ [ 0.0, 0.0, 0.0 ], [ 5.0, 1.0, 0.0 ] ] )
+	vertices = np.concatenate( ( first.vertices * [ 1.0, 0.7, 0.5 ], second.vertices * 2.0 + centers[1] ) )
+	faces = np.concatenate( ( first.faces, second.faces[ :, [ 1, 0, 2 ] ] + first.vertex_number ) )
+	sides = np.repeat( [ 0, 1 ], [ first.face_number, second.face_number ] )
+	# Flip a third of the faces, and shuffle them
+	flipped = generator.random( len( faces ) ) < 0.3
+	faces[ flipped ] = faces[ flipped ][ :, [ 1, 0, 2 ] ]
+	order = generator.permutation( len( faces ) )
+	mesh = mtk.Mesh( vertices=vertices, faces=faces[ order ] )
+	mtk.OrientFaces( mesh )
+	# Every face normal points away from the center of its sphere
+	tris = mesh.vertices[ mesh.faces ]
+	normals = np.cross( tris[:,1] - tris[:,0], tris[:,2] - tris[:,0] )
+	assert ( mtk.Dot( normals, tris.mean( axis=1 ) - centers[ sides[ order ] ] ) > 0 ).all()
+	# Consistent orientation
+	assert not len( mtk.GetCheckReport( mesh )[ 'Inconsistent edges' ] )
+	# Same faces up to their orientation
+	assert np.array_equal( np.sort( mesh.faces, axis=1 ), np.sort( faces[ order ], axis=1 ) )
@@ -0,0 +1,76 @@
+# -*- coding:utf-8 -*-
+
+#
+# Check the topological report on meshes of known topology
+#
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# Torus around the Z axis
+def GetTorus( major = 24, minor = 12 ) :
+	( u, v ) = np.meshgrid( np.linspace( 0.0, 2.0 * np.pi, major + 1 )[:-1], np.linspace( 0.0, 2.0 * np.pi, minor + 1 )[:-1], indexing='ij' )
+	( u, v ) = ( u.ravel(), v.ravel() )
+	vertices = np.array( [ ( 1.0 + 0.4 * np.cos( v ) ) * np.cos( u ), ( 1.0 + 0.4 * np.cos( v ) ) * np.sin( u ), 0.4 * np.sin( v ) ] ).T
+	( i, j ) = ( np.arange( major * minor ) // minor, np.arange( major * minor ) % minor )
+	index = lambda i, j : ( i % major ) * minor + j % minor
+	faces = np.concatenate( ( np.array( [ index( i, j ), index( i + 1, j ), index( i + 1, j + 1 ) ] ).T, np.array( [ index( i, j ), index( i + 1, j + 1 ), index( i, j + 1 ) ] ).T ) )
+	return mtk.Mesh( vertices=vertices, faces=faces )
+
+# Closed cone with its apex at the origin, along the given axis
+def GetCone( axis, sides = 16 ) :
+	angles = np.linspace( 0.0, 2.0 * np.pi, sides + 1 )[:-1]
+	ring = np.array( [ np.cos( angles ), np.sin( angles ), np.ones( sides ) ] ).T * [ 1.0, 1.0, axis ]
+	vertices = np.vstack( ( [ 0.0, 0.0, 0.0 ], ring, [ 0.0, 0.0, axis ] ) )
+	( current, following ) = ( 1 + np.arange( sides ), 1 + ( np.arange( sides ) + 1 ) % sides )
+	faces = np.vstack( ( np.array( [ np.zeros( sides, dtype=int ), following, current ] ).T, np.array( [ np.full( sides, sides + 1 ), current, following ] ).T ) )
+	if axis < 0 : faces = faces[ :, [ 1, 0, 2 ] ]
+	return mtk.Mesh( vertices=vertices, faces=faces )
+
+# Check the element numbers, the Euler characteristic and the genus, and return the report
+def CheckReport( mesh, characteristic, genus, loops = 0 ) :
+	report = mtk.GetCheckReport( mesh )
+	assert ( report[ 'Vertex number' ], report[ 'Face number' ] ) == ( mesh.vertex_number, mesh.face_number )
+	assert report[ 'Edge number' ] == len( np.unique( np.sort( mesh.faces[ :, [ [ 0, 1 ], [ 1, 2 ], [ 2, 0 ] ] ].reshape( -1, 2 ), axis=1 ), axis=0 ) )
+	assert report[ 'Euler characteristic' ] == mesh.vertex_number - report[ 'Edge number' ] + mesh.face_number == characteristic
+	assert report[ 'Genus' ] == genus
+	assert report[ 'Border loops' ] == loops
+	assert report[ 'Components' ] == 1
+	for name in ( 'Isolated vertices', 'Duplicated vertices', 'Degenerated faces', 'Non-manifold edges', 'Inconsistent edges' ) :
+		assert not len( report[ name ] )
+	return report
+
+# A closed sphere has a genus 0
+def test_sphere_report() :
+	report = CheckReport( mtk.GenerateIcosphere( 2 ), 2, 0 )
+	assert not len( report[ 'Non-manifold vertices' ] )
+
+# A torus has a genus 1
+def test_torus_report() :
+	report = CheckReport( GetTorus(), 0, 1 )
+	assert not len( report[ 'Non-manifold vertices' ] )
+
+# Two closed cones touching at their apex share a non-manifold vertex (two fans of faces)
+def test_cones_report() :
+	( top, bottom ) = ( GetCone( 1.0 ), GetCone( -1.0 ) )
+	vertices = np.vstack( ( top.vertices, bottom.vertices[ 1: ] ) )
+	faces = np.vstack( ( top.faces, np.where( bottom.faces > 0, bottom.faces + top.vertex_number - 1, 0 ) ) )
+	cones = mtk.Mesh( vertices=vertices, faces=faces )
+	# The genus is not defined on a non-manifold surface
+	report = CheckReport( cones, 3, None )
+	assert np.array_equal( report[ 'Non-manifold vertices' ], [ 0 ] )
+	assert 'Non-manifold vertices : 1' in mtk.Check( cones )
+	# Each cone alone is a sphere
+	CheckReport( top, 2, 0 )
+
+# Each hole in a sphere is a border loop, and reduces the Euler characteristic
+def test_holes_report() :
+	sphere = mtk.GenerateIcosphere( 2 )
+	# Remove three faces far from each other
+	centers = sphere.vertices[ sphere.faces ].mean( axis=1 )
+	removed = [ np.argmax( centers @ direction ) for direction in np.eye( 3 ) ]
+	sphere.faces = np.delete( sphere.faces, removed, axis=0 )
+	report = CheckReport( sphere, -1, 0, 3 )
+	assert not len( report[ 'Non-manifold vertices' ] )
+	assert 'Border loops : 3' in mtk.Check( sphere )
@@ -0,0 +1,74 @@
+# -*- coding:utf-8 -*-
+
+#
+# Compare the statistics accumulator with the statistics of all the values at once
+#
+
+# External dependencies
+import numpy as np
+import pytest
+import MeshToolkit as mtk
+
+# Random values given in chunks of different sizes, with some non-finite values
+def GetChunks() :
+	generator = np.random.default_rng( 0 )
+	chunks = [ generator.normal( 3.0, 2.0, size ) for size in ( 1, 10, 1000, 25000 ) ]
+	chunks.append( generator.exponential( 5.0, 5000 ) )
+	chunks[2][ :3 ] = ( np.nan, np.inf, -np.inf )
+	return chunks
+
+# Accumulate the chunks
+def Accumulate( chunks, value_range = None ) :
+	accumulator = mtk.StatisticsAccumulator( value_range=value_range )
+	for chunk in chunks : accumulator.Add( chunk )
+	return accumulator
+
+# The moments are exact, and the quantiles are within a fine bin of the exact quantiles
+def test_statistics() :
+	chunks = GetChunks()
+	values = np.concatenate( chunks )
+	values = values[ np.isfinite( values ) ]
+	for value_range in ( None, ( -5.0, 10.0 ) ) :
+		accumulator = Accumulate( chunks, value_range )
+		stats = accumulator.GetStatistics()
+		assert stats[ 'Number' ] == len( values )
+		assert stats[ 'Minimum' ] == values.min()
+		assert stats[ 'Maximum' ] == values.max()
+		assert np.isclose( stats[ 'Mean' ], values.mean(), rtol=1e-12 )
+		assert np.isclose( stats[ 'Variance' ], values.var(), rtol=1e-12 )
+		assert np.isclose( stats[ 'Deviation' ], values.std(), rtol=1e-12 )
+		# Quantiles inside the histogram range
+		( low, high ) = accumulator.value_range
+		q = np.linspace( 0.05, 0.95, 19 )
+		exact = np.quantile( values, q )
+		inside = ( exact > low ) & ( exact < high )
+		assert inside.any()
+		assert np.abs( accumulator.GetQuantiles( q )[ inside ] - exact[ inside ] ).max() <= ( high - low ) / accumulator.resolution
+
+# The histogram counts the values inside the range as numpy does
+def test_histogram() :
+	chunks = GetChunks()
+	values = np.concatenate( chunks )
+	values = values[ np.isfinite( values ) ]
+	accumulator = Accumulate( chunks, ( -5.0, 10.0 ) )
+	( counts, edges ) = accumulator.GetHistogram()
+	( reference_counts, reference_edges ) = np.histogram( values, bins=20, range=( -5.0, 10.0 ) )
+	assert np.array_equal( counts, reference_counts )
+	assert np.allclose( edges, reference_edges )
+	assert accumulator.underflow == np.count_nonzero( values < -5.0 )
+	assert accumulator.overflow == np.count_nonzero( values > 10.0 )
+
+# Merging the accumulators of several parts gives the accumulator of all the values
+def test_merge() :
+	chunks = GetChunks()
+	total = Accumulate( chunks, ( -5.0, 10.0 ) )
+	merged = mtk.StatisticsAccumulator()
+	for part in ( chunks[:2], chunks[2:4], chunks[4:] ) :
+		merged.Merge( Accumulate( part, ( -5.0, 10.0 ) ) )
+	assert np.array_equal( merged.counts, total.counts )
+	assert ( merged.underflow, merged.overflow ) == ( total.underflow, total.overflow )
+	for ( key, value ) in total.GetStatistics().items() :
+		assert np.isclose( merged.GetStatistics()[ key ], value, rtol=1e-12 )
+	# Different histogram ranges cannot be merged
+	with pytest.raises( RuntimeError ) :
+		merged.Merge( Accumulate( chunks, ( 0.0, 1.0 ) ) )
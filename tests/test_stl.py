@@ -0,0 +1,32 @@
+# -*- coding:utf-8 -*-
+
+#
+# Write and read back binary and ASCII STL files
+#
+
+# External dependencies
+import numpy as np
+import MeshToolkit as mtk
+
+# Write a sphere with arbitrary coordinates, and read it back
+def RoundTrip( path, binary_file ) :
+	sphere = mtk.GenerateIcosphere( 3 )
+	sphere.vertices = sphere.vertices * [ 12.345, 0.678, 3.21e-3 ] + [ -1e3, 42.0, 0.5 ]
+	filename = str( path / 'sphere.stl' )
+	mtk.WriteStl( sphere, filename, binary_file )
+	return ( sphere, mtk.ReadStl( filename ) )
+
+# The binary file stores the vertices in single precision
+def test_binary_stl( tmp_path ) :
+	( sphere, mesh ) = RoundTrip( tmp_path, True )
+	assert ( mesh.vertex_number, mesh.face_number ) == ( sphere.vertex_number, sphere.face_number )
+	assert mesh.name == 'sphere'
+	assert np.array_equal( mesh.vertices[ mesh.faces ], sphere.vertices[ sphere.faces ].astype( np.float32 ) )
+
+# The ASCII file stores the vertices with enough digits for single precision
+def test_ascii_stl( tmp_path ) :
+	( sphere, mesh ) = RoundTrip( tmp_path, False )
+	assert ( mesh.vertex_number, mesh.face_number ) == ( sphere.vertex_number, sphere.face_number )
+	assert mesh.name == 'sphere'
+	expected = sphere.vertices[ sphere.faces ]
+	assert ( np.abs( mesh.vertices[ mesh.faces ] - expected ) <= np.finfo( np.float32 ).eps * np.abs( expected ) ).all()
@@ -0,0 +1,92 @@
+# -*- coding:utf-8 -*-
+
+#
+# Check the Loop and midpoint subdivisions on closed and open meshes
+#
+
+# External dependencies
+import numpy as np
+import pytest
+import MeshToolkit as mtk
+
+# Regular grid on the square [-1, 1]x[-1, 1], with the given heights
+def GetGrid( size, height ) :
+	( x, y ) = np.meshgrid( np.linspace( -1, 1, size + 1 ), np.linspace( -1, 1, size + 1 ) )
+	vertices = np.array( [ x.ravel(), y.ravel(), height( x.ravel(), y.ravel() ) ] ).T
+	corners = ( np.arange( size )[ :, np.newaxis ] * ( size + 1 ) + np.arange( size ) ).ravel()
+	faces = np.concatenate( ( np.array( [ corners, corners + 1, corners + size + 2 ] ).T, np.array( [ corners, corners + size + 2, corners + size + 1 ] ).T ) )
+	return mtk.Mesh( vertices=vertices, faces=faces )
+
+# Border vertices of a mesh
+def GetBorderVertices( mesh ) :
+	( edges, labels, counts, twins ) = mtk.GetHalfEdges( mesh.faces, mesh.vertex_number )
+	return np.unique( edges[ counts == 1 ] )
+
+# Each level adds a vertex per edge, and splits each face into four faces
+@pytest.mark.parametrize( 'scheme', [ 'loop', 'midpoint' ] )
+def test_subdivision_counts( scheme ) :
+	for mesh in ( mtk.GenerateIcosphere( 0 ), GetGrid( 3, lambda x, y : x * y ) ) :
+		( vertex_number, face_number ) = ( mesh.vertex_number, mesh.face_number )
+		for level in range( 3 ) :
+			edge_number = len( mtk.GetHalfEdges( mesh.faces, mesh.vertex_number )[0] )
+			mtk.Subdivide( mesh, 1, scheme )
+			( vertex_number, face_number ) = ( vertex_number + edge_number, 4 * face_number )
+			assert ( mesh.vertex_number, mesh.face_number ) == ( vertex_number, face_number )
+			assert mesh.vertex_normal_number == vertex_number
+		# Several levels at once
+		subdivided = mtk.GenerateIcosphere( 0 )
+		mtk.Subdivide( subdivided, 3, scheme )
+		assert subdivided.face_number == 20 * 4 ** 3
+
+# The Loop subdivision of finer icospheres converges toward the sphere
+def test_loop_limit() :
+	deviations = []
+	for subdivisions in ( 1, 2, 3 ) :
+		# The vertices of the control mesh converge geometrically (the differences are divided by four at each level)
+		positions = []
+		for level in range( 5 ) :
+			sphere = mtk.GenerateIcosphere( subdivisions )
+			mtk.Subdivide( sphere, level )
+			positions.append( sphere.vertices[ : mtk.GenerateIcosphere( subdivisions ).vertex_number ] )
+		steps = [ np.abs( positions[ i + 1 ] - positions[ i ] ).max() for i in range( 4 ) ]
+		assert np.allclose( np.array( steps[ 1: ] ) / steps[ :-1 ], 0.25, atol=0.01 )
+		# Distance of the subdivided vertices to the unit sphere
+		deviations.append( np.abs( np.sqrt( mtk.SquaredNorm( sphere.vertices ) ) - 1.0 ).max() )
+	# The limit surface gets closer to the sphere by about four times with each finer icosphere
+	assert deviations[0] < 0.1
+	assert deviations[1] < deviations[0] / 3
+	assert deviations[2] < deviations[1] / 3
+
+# The borders of an open mesh are creases : their subdivision depends only on the border vertices
+def test_loop_creases() :
+	flat = GetGrid( 6, lambda x, y : np.zeros( len( x ) ) )
+	bumpy = GetGrid( 6, lambda x, y : np.cos( np.pi * x / 2 ) * np.cos( np.pi * y / 2 ) )
+	border_number = len( GetBorderVertices( flat ) )
+	for mesh in ( flat, bumpy ) :
+		mtk.Subdivide( mesh, 2 )
+	# Same border vertices, on the plane of the border
+	border = GetBorderVertices( bumpy )
+	assert len( border ) == 4 * border_number
+	assert np.array_equal( border, GetBorderVertices( flat ) )
+	assert np.allclose( bumpy.vertices[ border ], flat.vertices[ border ], rtol=0.0, atol=1e-12 )
+	assert np.allclose( bumpy.vertices[ border, 2 ], 0.0, rtol=0.0, atol=1e-12 )
+	# Straight borders stay straight away from the corners
+	sides = bumpy.vertices[ border, :2 ]
+	middle = ( np.abs( sides ) < 0.75 ).any( axis=1 )
+	assert np.array_equal( np.abs( sides[ middle ] ).max( axis=1 ), np.ones( np.count_nonzero( middle ) ) )
+	# The inner vertices are smoothed
+	assert bumpy.vertices[:,2].max() < 1.0
+
+# The 8-bit colors stay 8-bit colors, interpolated at the edge midpoints
+@pytest.mark.parametrize( 'scheme', [ 'loop', 'midpoint' ] )
+def test_subdivision_colors( scheme ) :
+	sphere = mtk.GenerateIcosphere( 1 )
+	colors = np.round( ( sphere.vertices + 1 ) * 127.5 ).astype( np.uint8 )
+	sphere.colors = colors
+	edges = mtk.GetHalfEdges( sphere.faces, sphere.vertex_number )[0]
+	mtk.Subdivide( sphere, 1, scheme )
+	assert sphere.colors.dtype == np.uint8
+	assert sphere.color_number == sphere.vertex_number
+	assert np.array_equal( sphere.colors[ : len( colors ) ], colors )
+	midpoints = ( colors[ edges[:,0] ].astype( np.float64 ) + colors[ edges[:,1] ] ) / 2
+	assert np.array_equal( sphere.colors[ len( colors ) : ], np.round( midpoints ).astype( np.uint8 ) )